@@ -0,0 +1,352 @@
+# api.py
+#
+# Headless HTTP API for HR-GPT.
+# Run with:  uvicorn api:app --host 0.0.0.0 --port 8000
+
+import asyncio
+import json
+import logging
+import numbers
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+from fastapi import FastAPI, Header, HTTPException
+from fastapi.responses import StreamingResponse
+from plotly.graph_objs import Figure
+from pydantic import BaseModel
+
+from config import APP_NAME, API_WORKERS, API_MAX_PENDING, API_TIMEOUT_SECONDS, DEFAULT_TENANT
+from modules.analytics_router import process_query, get_cached_dataset, secure_dataset, tenants
+from modules.batch_engine import process_batch
+from modules.charts import figure_json
+from modules.domain_guard import domain_stats
+from modules.session_context import get_session
+from modules.data_quality import quality_report, quarantined_rows
+from modules.data_optimizer import decode_employee_ids
+from modules.result_store import DEFAULT_PAGE_SIZE, EXPORT_FORMATS, ResultSet, get_result
+from modules.query_engine import compute_metric
+from modules.row_security import AccessError, restricted
+from modules.star_schema import get_star_schema
+from modules.sql_backend import get_sql_backend
+from ml.predict import load_attrition_model
+
+
+# ===============================
+# WORKER POOL
+# ===============================
+# Threads (not processes) so every worker reads the SAME cached
+# DataFrame and model; pandas releases the GIL in its heavy kernels.
+executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="hr-api")
+
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _warm_up():
+    df = get_cached_dataset()
+    logging.info(f"API dataset ready: {0 if df is None else len(df)} rows")
+
+    try:
+        load_attrition_model()
+    except Exception as e:
+        logging.warning(f"Attrition model not loaded: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await asyncio.get_running_loop().run_in_executor(executor, _warm_up)
+    yield
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title=f"{APP_NAME} API", lifespan=lifespan)
+
+
+async def run_in_pool(func, *args):
+    """
+    Runs CPU-bound work on the pool with backpressure + deadline
+    """
+    global _pending
+
+    with _pending_lock:
+        if _pending >= API_MAX_PENDING:
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, retry later.",
+                headers={"Retry-After": "1"}
+            )
+        _pending += 1
+
+    # Released when the WORK ends (finished, or cancelled before it
+    # started), not when a timed-out caller gives up on it
+    try:
+        future = executor.submit(func, *args)
+    except RuntimeError:
+        _release(None)
+        raise
+    future.add_done_callback(_release)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=API_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # The worker thread finishes in the background; only the caller is released
+        raise HTTPException(status_code=504, detail="Request deadline exceeded.")
+    except AccessError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _release(future):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+# ===============================
+# SERIALIZATION
+# ===============================
+def _records(frame):
+    return json.loads(frame.to_json(orient="records", date_format="iso"))
+
+
+def serialize_page(result, page):
+    return {
+        "type": "result_set",
+        "id": result.id,
+        "title": result.title,
+        "columns": result.columns,
+        "rows": _records(page["rows"]),
+        **{k: page[k] for k in ("page", "page_size", "total_rows", "total_pages")}
+    }
+
+
+def serialize_result(result):
+    """
+    Converts router output into JSON-safe payloads
+    """
+    if result is None:
+        return {"type": "empty"}
+
+    # Large tables: first page only, the rest via /results/{id}
+    if isinstance(result, ResultSet):
+        return serialize_page(result, result.page(1, DEFAULT_PAGE_SIZE))
+
+    if isinstance(result, Figure):
+        return {"type": "chart", "figure": json.loads(figure_json(result))}
+
+    if isinstance(result, pd.Series):
+        result = result.reset_index()
+
+    if isinstance(result, pd.DataFrame):
+        return {
+            "type": "table",
+            "columns": [str(c) for c in result.columns],
+            "rows": _records(result)
+        }
+
+    if isinstance(result, numbers.Number):
+        return {"type": "value", "value": float(result)}
+
+    return {"type": "text", "text": str(result)}
+
+
+# ===============================
+# REQUEST MODELS
+# ===============================
+class QueryRequest(BaseModel):
+    query: str
+    language: str = "en"
+    # Same id on consecutive calls → follow-ups ("now by location")
+    session_id: Optional[str] = None
+    # Organization whose dataset answers (None = default tenant)
+    tenant: Optional[str] = None
+
+
+class MetricRequest(BaseModel):
+    metric: str
+    dimension: Optional[str] = None
+    filters: Optional[Dict[str, Union[str, int, float, List[Union[str, int, float]]]]] = None
+    chart: Optional[str] = None
+    # "master" = wide hr_master, "star" = per-domain sheets joined on demand,
+    # "sql" = aggregation pushed down to the embedded database
+    source: str = "master"
+    tenant: Optional[str] = None
+
+
+class CrossDomainRequest(BaseModel):
+    measures: List[str]
+    by: str
+    agg: str = "mean"
+
+
+class PageRequest(BaseModel):
+    # Tenant the result set was computed for (None = default tenant)
+    tenant: Optional[str] = None
+    page: int = 1
+    page_size: int = DEFAULT_PAGE_SIZE
+    sort_by: Optional[str] = None
+    ascending: bool = True
+    filters: Optional[Dict[str, Union[str, int, float, List[Union[str, int, float]]]]] = None
+
+
+class BatchRequest(BaseModel):
+    items: List[Union[str, MetricRequest]]
+    language: str = "en"
+    tenant: Optional[str] = None
+
+
+# ===============================
+# ENDPOINTS
+# ===============================
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok", "pending": _pending, "max_pending": API_MAX_PENDING,
+        "domain_guard": domain_stats()
+    }
+
+
+@app.get("/tenants")
+async def tenant_stats():
+    return tenants.stats()
+
+
+# Quarantined rows returned with the quality report
+QUALITY_SAMPLE_ROWS = 50
+
+
+def _deny_restricted(tenant, role, what):
+    """
+    Whole-dataset sources (SQL / star schema / quarantine) are not
+    filtered per role: only unrestricted roles reach them
+    """
+    owner = tenants.get(tenant)
+    if restricted(role, owner.roles):
+        raise AccessError(f"{what} is not available to role {role or 'default'}")
+
+
+def _quality(tenant, role=None):
+    _deny_restricted(tenant, role, "The quality report")
+    df = get_cached_dataset(tenant)
+    report = quality_report(df) if df is not None else None
+    if report is None:
+        raise ValueError("No quality report for this dataset.")
+
+    sample = quarantined_rows(df).head(QUALITY_SAMPLE_ROWS).copy()
+    for col in ("Employee_ID", "Manager_ID"):
+        if col in sample.columns:
+            sample[col] = decode_employee_ids(df, sample[col]).to_numpy()
+    return {**report, "quarantined_sample": _records(sample)}
+
+
+@app.get("/quality")
+async def quality(tenant: Optional[str] = None, x_hr_role: Optional[str] = Header(None)):
+    return await run_in_pool(_quality, tenant, x_hr_role)
+
+
+@app.post("/query")
+async def query(req: QueryRequest, x_hr_role: Optional[str] = Header(None)):
+    session = get_session(req.session_id) if req.session_id else None
+    result = await run_in_pool(process_query, req.query, req.language, None, session, req.tenant, x_hr_role)
+    return serialize_result(result)
+
+
+def _compute_metric(metric, dimension, filters, source="master", tenant=None, role=None):
+    if source in ("sql", "star"):
+        # Both backends are built process-wide from the default tenant's hr_master
+        if (tenant or DEFAULT_TENANT) != DEFAULT_TENANT:
+            raise ValueError(f"The {source} source only serves the default tenant.")
+        _deny_restricted(tenant, role, f"The {source} source")
+
+    if source == "sql":
+        result = get_sql_backend().compute_metric(metric, dimension, filters)
+        if result is None:
+            raise ValueError(f"Unsupported metric/dimension: {metric}/{dimension}")
+        return result.rename(metric) if isinstance(result, pd.Series) else result
+
+    if source == "star":
+        df = get_star_schema().frame_for_metric(metric, dimension, filters)
+    else:
+        df = secure_dataset(get_cached_dataset(tenant), role, tenant)
+
+    if df is None or df.empty:
+        raise ValueError("HR dataset empty.")
+
+    result = compute_metric(df, metric, dimension, filters)
+    if result is None:
+        raise ValueError(f"Unsupported metric/dimension: {metric}/{dimension}")
+
+    if isinstance(result, pd.Series):
+        result = result.rename(metric)
+
+    return result
+
+
+@app.post("/metric")
+async def metric(req: MetricRequest, x_hr_role: Optional[str] = Header(None)):
+    result = await run_in_pool(_compute_metric, req.metric, req.dimension, req.filters, req.source, req.tenant, x_hr_role)
+    return serialize_result(result)
+
+
+def _cross_domain(measures, by, agg, role=None):
+    _deny_restricted(None, role, "Cross-domain analytics")
+    return get_star_schema().cross_domain(measures, by, agg).reset_index()
+
+
+@app.post("/cross-domain")
+async def cross_domain(req: CrossDomainRequest, x_hr_role: Optional[str] = Header(None)):
+    result = await run_in_pool(_cross_domain, req.measures, req.by, req.agg, x_hr_role)
+    return serialize_result(result)
+
+
+@app.post("/batch")
+async def batch(req: BatchRequest, x_hr_role: Optional[str] = Header(None)):
+    items = [
+        item if isinstance(item, str) else item.model_dump()
+        for item in req.items
+    ]
+    results = await run_in_pool(process_batch, items, req.language, req.tenant, x_hr_role)
+    return {"results": [serialize_result(r) for r in results]}
+
+
+def _result_or_404(result_id, tenant=None, role=None):
+    result = get_result(result_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Result set expired or unknown.")
+    if not result.visible_to(tenant, role):
+        raise HTTPException(status_code=403, detail="Result set belongs to another tenant or role.")
+    return result
+
+
+@app.post("/results/{result_id}")
+async def result_page(result_id: str, req: PageRequest, x_hr_role: Optional[str] = Header(None)):
+    result = _result_or_404(result_id, req.tenant, x_hr_role)
+    page = await run_in_pool(
+        result.page, req.page, req.page_size, req.sort_by, req.ascending, req.filters
+    )
+    return serialize_page(result, page)
+
+
+@app.get("/results/{result_id}/export")
+async def result_export(result_id: str, format: str = "csv", sort_by: Optional[str] = None, ascending: bool = True,
+                        tenant: Optional[str] = None, x_hr_role: Optional[str] = Header(None)):
+    result = _result_or_404(result_id, tenant, x_hr_role)
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+
+    chunks = result.iter_export(format, sort_by=sort_by, ascending=ascending)
+    # Pull the first chunk on the pool so sort / dependency errors become a 400
+    first = await run_in_pool(next, chunks)
+
+    def stream():
+        yield first
+        yield from chunks
+
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{result.id}.{format}"'}
+    )
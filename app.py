@@ -1,9 +1,31 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
 import streamlit as st
 import pandas as pd
 from plotly.graph_objs import Figure
 
-from config import APP_NAME
-from modules.analytics_router import process_query
+from config import APP_NAME, INSIGHTS_ENABLED, APP_QUERY_WORKERS, CHAT_VISIBLE
+from modules.analytics_router import process_query, QueryCancelled
+from modules.conversation_store import ConversationStore, resolve
+from modules.session_context import SessionContext
+from modules.result_store import DEFAULT_PAGE_SIZE, ResultSet
+from modules.insight_engine import narrate_async
+
+# Seconds to wait for the narrative below an answer
+INSIGHT_TIMEOUT = 30
+# How often the page polls a running query (seconds)
+POLL_INTERVAL = 0.1
+
+STAGE_LABELS = {
+    "queued": "⏳ Queued…",
+    "translating": "🌍 Translating…",
+    "parsing": "🔎 Reading the question…",
+    "classifying": "🧭 Understanding the request…",
+    "explaining": "📖 Writing the explanation…",
+    "computing": "📊 Crunching the numbers…"
+}
 
 
 # ==================================================
@@ -38,8 +60,13 @@ with st.sidebar:
 
     st.markdown("---")
 
-    if st.button("🆕 New Chat"):
-        st.session_state.messages = []
+    if st.button("🆕 New Chat") and "conversation" in st.session_state:
+        st.session_state.conversation.clear()
+        st.session_state.session_context.clear()
+        st.session_state.visible_turns = CHAT_VISIBLE
+        pending = st.session_state.pop("pending", None)
+        if pending:
+            pending["context"]["cancel"].set()
 
     st.markdown("---")
     st.info("🔒 This assistant answers HR-related questions only.")
@@ -52,26 +79,180 @@ st.title("HR-GPT 3.0")
 # ==================================================
 # CHAT STATE
 # ==================================================
-if "messages" not in st.session_state:
-    st.session_state.messages = []
+# Bounded: recent turns in memory, older ones in SQLite, artifacts by reference
+if "conversation" not in st.session_state:
+    st.session_state.conversation = ConversationStore()
+    st.session_state.visible_turns = CHAT_VISIBLE
+    # Last answer, for follow-ups ("now by location", "as a pie chart")
+    st.session_state.session_context = SessionContext()
 
 
 def add_message(role, content):
-    st.session_state.messages.append({
-        "role": role,
-        "content": content
-    })
+    return st.session_state.conversation.add(role, content)
 
 
 # ==================================================
-# DISPLAY CHAT HISTORY
+# BACKGROUND QUERIES
 # ==================================================
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        if isinstance(msg["content"], str):
-            st.markdown(msg["content"])
-        else:
-            st.write(msg["content"])
+@st.cache_resource
+def query_executor():
+    """
+    One pool per server process, shared by every session
+    """
+    return ThreadPoolExecutor(max_workers=APP_QUERY_WORKERS, thread_name_prefix="hr-query")
+
+
+def cancel_pending():
+    """
+    A newer question supersedes the running one: stop it at its next
+    stage (or before it starts)
+    """
+    pending = st.session_state.get("pending")
+    if pending:
+        pending["context"]["cancel"].set()
+        pending["future"].cancel()
+    st.session_state.pending = None
+
+
+def submit_query(query, language):
+    cancel_pending()
+    context = {"cancel": threading.Event(), "stage": "queued"}
+    st.session_state.pending = {
+        "query": query,
+        "language": language,
+        "context": context,
+        "future": query_executor().submit(
+            process_query, query, language, context, st.session_state.session_context
+        )
+    }
+    return st.session_state.pending
+
+
+def await_answer(pending):
+    """
+    Polls the background query, showing its current stage. A new chat
+    message reruns the script, which stops this loop at the next
+    Streamlit call.
+    """
+    future, context = pending["future"], pending["context"]
+
+    with st.status(STAGE_LABELS["queued"], expanded=False) as status:
+        started = time.perf_counter()
+        while not future.done():
+            status.update(label=STAGE_LABELS.get(context.get("stage"), "⏳ Working…"))
+            wait([future], timeout=POLL_INTERVAL)
+        status.update(
+            label=f"✅ Answered in {time.perf_counter() - started:.1f}s",
+            state="complete"
+        )
+
+    try:
+        return future.result()
+    except QueryCancelled:
+        return None
+    except Exception as e:
+        return f"⚠ Unable to process this request ({type(e).__name__})."
+
+
+def await_insight(future, placeholder):
+    """
+    Narrative below the answer; the answer is already on screen
+    """
+    deadline = time.perf_counter() + INSIGHT_TIMEOUT
+    placeholder.caption("💡 Generating insight…")
+
+    while not future.done() and time.perf_counter() < deadline:
+        wait([future], timeout=POLL_INTERVAL)
+        placeholder.caption("💡 Generating insight…")
+
+    try:
+        return future.result(timeout=0) if future.done() else ""
+    except Exception:
+        return ""
+
+
+# ==================================================
+# PAGED RESULT SETS
+# ==================================================
+def render_result_set(result):
+    """
+    One page at a time; sort / filter / export run server-side
+    """
+    key = result.id
+    columns = result.columns
+    filterable = [c for c in columns if result.frame[c].nunique() <= 50]
+
+    c1, c2, c3, c4 = st.columns([2, 1, 2, 2])
+    sort_by = c1.selectbox("Sort by", ["—"] + columns, key=f"{key}_sort")
+    ascending = c2.toggle("Ascending", value=False, key=f"{key}_asc")
+    filter_col = c3.selectbox("Filter", ["—"] + filterable, key=f"{key}_fcol")
+
+    filters = None
+    if filter_col != "—":
+        options = sorted(result.frame[filter_col].dropna().unique().tolist(), key=str)
+        chosen = c4.multiselect("Values", options, key=f"{key}_fval")
+        if chosen:
+            filters = {filter_col: chosen}
+
+    view = {
+        "sort_by": None if sort_by == "—" else sort_by,
+        "ascending": ascending,
+        "filters": filters
+    }
+
+    _, total = result.window(0, 0, **view)
+    total_pages = max((total + DEFAULT_PAGE_SIZE - 1) // DEFAULT_PAGE_SIZE, 1)
+    # New sort / filter → back to page 1
+    page_no = st.number_input("Page", 1, total_pages, 1, key=f"{key}_page_{hash(str(view))}")
+    page = result.page(page_no, DEFAULT_PAGE_SIZE, **view)
+
+    st.dataframe(page["rows"], use_container_width=True, hide_index=True)
+    st.caption(
+        f"Page {page['page']} of {page['total_pages']} · "
+        f"{page['total_rows']:,} of {len(result):,} rows"
+    )
+
+    st.download_button(
+        "⬇️ Download CSV",
+        data=lambda: result.export_file("csv", **view),
+        file_name=f"{result.title or 'result'}.csv".replace(" ", "_").lower(),
+        mime="text/csv",
+        key=f"{key}_csv"
+    )
+
+
+def render_content(content, key):
+    """
+    A stored turn, re-served from the chart cache / result store
+    """
+    if isinstance(content, Figure):
+        st.plotly_chart(content, use_container_width=True, key=f"chart_{key}")
+    elif isinstance(content, ResultSet):
+        render_result_set(content)
+    elif isinstance(content, pd.DataFrame):
+        st.dataframe(content, use_container_width=True)
+    elif isinstance(content, (int, float)):
+        st.metric(label="Result", value=content)
+    elif isinstance(content, str):
+        st.markdown(content)
+    else:
+        st.caption("⌛ This answer has expired — ask again to see it.")
+
+
+# ==================================================
+# DISPLAY CHAT HISTORY (visible window only)
+# ==================================================
+conversation = st.session_state.conversation
+turns = conversation.recent(st.session_state.visible_turns)
+
+if len(conversation) > len(turns):
+    if st.button(f"⬆️ Show earlier messages ({len(conversation) - len(turns)} more)", key="show_earlier"):
+        st.session_state.visible_turns += CHAT_VISIBLE
+        st.rerun()
+
+for turn in turns:
+    with st.chat_message(turn["role"]):
+        render_content(resolve(turn), turn["seq"])
 
 
 # ==================================================
@@ -87,32 +268,45 @@ if user_query:
     with st.chat_message("user"):
         st.markdown(user_query)
 
-    # ASSISTANT RESPONSE
-    response = process_query(user_query, lang_code)
+    pending = submit_query(user_query, lang_code)
+else:
+    # A widget rerun while a query is still running: keep waiting on it
+    pending = st.session_state.get("pending")
 
+if pending:
     with st.chat_message("assistant"):
+        response = await_answer(pending)
+        context = pending["context"]
+        st.session_state.pending = None
 
         # ---------------------------
         # CASE 1: CHART
         # ---------------------------
         if isinstance(response, Figure):
             st.markdown("📊 **Here’s the chart you requested**")
-            st.plotly_chart(response, use_container_width=True)
-            add_message("assistant", "[Chart generated]")
+            turn = add_message("assistant", response)
+            st.plotly_chart(response, use_container_width=True, key=f"chart_{turn['seq']}")
+
+        # ---------------------------
+        # CASE 2: LARGE TABLE (server-side result set)
+        # ---------------------------
+        elif isinstance(response, ResultSet):
+            render_result_set(response)
+            add_message("assistant", response)
 
         # ---------------------------
-        # CASE 2: TABLE (DataFrame)
+        # CASE 2b: TABLE (DataFrame)
         # ---------------------------
         elif isinstance(response, pd.DataFrame):
             st.dataframe(response, use_container_width=True)
-            add_message("assistant", "[Table displayed]")
+            add_message("assistant", response)
 
         # ---------------------------
         # CASE 3: KPI (int / float)
         # ---------------------------
         elif isinstance(response, (int, float)):
             st.metric(label="Result", value=response)
-            add_message("assistant", f"Result: {response}")
+            add_message("assistant", response)
 
         # ---------------------------
         # CASE 4: TEXT (LLM / fallback)
@@ -127,3 +321,21 @@ if user_query:
         else:
             st.warning("⚠️ Unable to process this request with available data.")
             add_message("assistant", "⚠️ Unable to process this request.")
+
+        # ---------------------------
+        # INSIGHT (answer is already on screen)
+        # ---------------------------
+        if (
+            INSIGHTS_ENABLED
+            and context.get("metric")
+            and isinstance(response, (Figure, pd.DataFrame, int, float))
+        ):
+            placeholder = st.empty()
+            future = narrate_async(response, context["metric"], context.get("dimension"), lang_code)
+            insight = await_insight(future, placeholder)
+
+            if insight:
+                placeholder.info(f"💡 {insight}")
+                add_message("assistant", f"💡 {insight}")
+            else:
+                placeholder.empty()
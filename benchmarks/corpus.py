@@ -0,0 +1,132 @@
+# benchmarks/corpus.py
+#
+# Replay corpus: realistic questions in every UI language.
+# "en" doubles as the translation the fake LLM returns.
+
+QUESTIONS = [
+    {
+        "kind": "metric",
+        "en": "Show headcount by department",
+        "de": "Zeige die Mitarbeiterzahl nach Abteilung",
+        "fr": "Afficher l'effectif par département",
+        "es": "Mostrar la plantilla por departamento",
+        "it": "Mostra l'organico per reparto"
+    },
+    {
+        "kind": "metric",
+        "en": "Show headcount by year",
+        "de": "Zeigen Sie die Mitarbeiterzahl pro Jahr",
+        "fr": "Afficher l'effectif par année",
+        "es": "Mostrar la plantilla por año",
+        "it": "Mostra l'organico per anno"
+    },
+    {
+        "kind": "metric",
+        "en": "Give attrition rate by department",
+        "de": "Fluktuationsrate nach Abteilung",
+        "fr": "Taux d'attrition par département",
+        "es": "Tasa de rotación por departamento",
+        "it": "Tasso di abbandono per reparto"
+    },
+    {
+        "kind": "metric",
+        "en": "Attrition by location",
+        "de": "Fluktuation nach Standort",
+        "fr": "Attrition par site",
+        "es": "Rotación por ubicación",
+        "it": "Abbandono per sede"
+    },
+    {
+        "kind": "metric",
+        "en": "Attrition trend by year as a line chart",
+        "de": "Fluktuation pro Jahr als Liniendiagramm",
+        "fr": "Attrition par année en graphique linéaire",
+        "es": "Rotación por año como gráfico de líneas",
+        "it": "Abbandono per anno come grafico a linee"
+    },
+    {
+        "kind": "metric",
+        "en": "Show salary comparison by region",
+        "de": "Gehaltsvergleich nach Region",
+        "fr": "Comparaison des salaires par région",
+        "es": "Comparación salarial por región",
+        "it": "Confronto degli stipendi per regione"
+    },
+    {
+        "kind": "metric",
+        "en": "Average salary by department bar chart",
+        "de": "Durchschnittsgehalt nach Abteilung als Balkendiagramm",
+        "fr": "Salaire moyen par département en diagramme à barres",
+        "es": "Salario medio por departamento en gráfico de barras",
+        "it": "Stipendio medio per reparto grafico a barre"
+    },
+    {
+        "kind": "metric",
+        "en": "Engagement score by location",
+        "de": "Engagement-Wert nach Standort",
+        "fr": "Score d'engagement par site",
+        "es": "Puntuación de compromiso por ubicación",
+        "it": "Punteggio di coinvolgimento per sede"
+    },
+    {
+        "kind": "metric",
+        "en": "Gender diversity pie chart",
+        "de": "Geschlechterdiversität als Kreisdiagramm",
+        "fr": "Diversité de genre en camembert",
+        "es": "Diversidad de género en gráfico circular",
+        "it": "Diversità di genere grafico a torta"
+    },
+    {
+        "kind": "metric",
+        "en": "Total headcount",
+        "de": "Gesamte Mitarbeiterzahl",
+        "fr": "Effectif total",
+        "es": "Plantilla total",
+        "it": "Organico totale"
+    },
+    {
+        "kind": "definition",
+        "en": "Explain attrition rate",
+        "de": "Erkläre die Fluktuationsrate",
+        "fr": "Expliquez le taux d'attrition",
+        "es": "Explica la tasa de rotación",
+        "it": "Spiega il tasso di abbandono"
+    },
+    {
+        "kind": "greeting",
+        "en": "hello",
+        "de": "hallo",
+        "fr": "bonjour",
+        "es": "hola",
+        "it": "ciao"
+    },
+    {
+        "kind": "ml",
+        "en": "Predict attrition risk",
+        "de": "Fluktuationsrisiko vorhersagen",
+        "fr": "Prédire le risque d'attrition",
+        "es": "Predecir el riesgo de rotación",
+        "it": "Prevedere il rischio di abbandono"
+    },
+    {
+        "kind": "out_of_domain",
+        "en": "What's the weather in Berlin",
+        "de": "Wie ist das Wetter in Berlin",
+        "fr": "Quel temps fait-il à Berlin",
+        "es": "Qué tiempo hace en Berlín",
+        "it": "Che tempo fa a Berlino"
+    }
+]
+
+LANGUAGES = ["en", "de", "fr", "es", "it"]
+
+
+def replay(languages=LANGUAGES, kinds=None):
+    """
+    Yields (language, question, english) in a stable order
+    """
+    for lang in languages:
+        for item in QUESTIONS:
+            if kinds and item["kind"] not in kinds:
+                continue
+            yield lang, item[lang], item["en"]
@@ -0,0 +1,75 @@
+# benchmarks/fake_llm.py
+#
+# Deterministic stand-in for modules.llm_engine.call_llm.
+# Answers every prompt the app sends, offline, with a fixed latency.
+
+import json
+import threading
+import time
+from collections import Counter
+
+from benchmarks.corpus import QUESTIONS, LANGUAGES
+from modules.nlu import extract_metric, extract_dimension, extract_chart_type
+
+
+class FakeLLM:
+
+    def __init__(self, latency_ms=0.0):
+        self.latency = latency_ms / 1000.0
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self.translations = {
+            item[lang].lower(): item["en"]
+            for item in QUESTIONS
+            for lang in LANGUAGES
+        }
+
+    def __call__(self, prompt, language="en"):
+        kind, reply = self._answer(prompt)
+
+        with self._lock:
+            self.calls[kind] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        return reply
+
+    # ---------------------------
+    # Prompt dispatch
+    # ---------------------------
+    def _answer(self, prompt):
+        if "Translate each of the following" in prompt:
+            questions = json.loads(_after(prompt, "Questions:"))
+            return "translate_batch", json.dumps([self.translate(q) for q in questions])
+
+        if "Translate the following" in prompt:
+            return "translate", self.translate(_after(prompt, "Question:"))
+
+        if "intent classifier" in prompt and "JSON array" in prompt:
+            questions = json.loads(_after(prompt, "Questions:"))
+            return "intent_batch", json.dumps([self.intent(q) for q in questions])
+
+        if "intent classifier" in prompt:
+            return "intent", json.dumps(self.intent(_after(prompt, "Question:")))
+
+        return "text", "This is a deterministic benchmark answer."
+
+    def translate(self, text):
+        return self.translations.get(text.strip().lower(), text.strip())
+
+    def intent(self, query):
+        metric = extract_metric(query)
+        if not metric:
+            return {"metric": None, "dimension": None, "chart": "NONE", "confidence": 0.0}
+
+        return {
+            "metric": metric,
+            "dimension": extract_dimension(query) or "NONE",
+            "chart": extract_chart_type(query),
+            "confidence": 0.9
+        }
+
+
+def _after(prompt, marker):
+    return prompt.split(marker, 1)[-1].strip().strip('"')
@@ -0,0 +1,130 @@
+# benchmarks/parse_benchmark.py
+#
+# Query classification cost: the unified one-pass parser vs the old
+# chain of substring scans (router triggers + nlu fallbacks + time /
+# comparison extractors), over a large generated query corpus.
+#
+#   python -m benchmarks.parse_benchmark --queries 50000
+#
+# Exit code 1 when more than --max-over-budget of the parses overrun
+# QUERY_PARSE_BUDGET_US.
+
+import argparse
+import itertools
+import logging
+import random
+import time
+
+import numpy as np
+
+from config import QUERY_PARSE_BUDGET_US
+from modules.analytics import prepare_master
+from modules.comparison_extractor import SEPARATOR, extract_comparison, get_vocabulary
+from modules.nlu import extract_metric, extract_dimension, extract_chart_type
+from modules.query_parser import parse_query, get_matcher, reset_parser_stats, parser_stats
+from modules.time_extractor import extract_time_window
+from modules.time_index import get_time_index
+from benchmarks.synthetic import generate
+
+OPENERS = ["", "show ", "give me ", "what is the ", "plot ", "list ", "how many "]
+METRICS = ["headcount", "attrition", "turnover", "average salary", "compensation", "engagement", "gender diversity", "employees"]
+DIMENSIONS = ["", " by department", " by location", " by year", " by gender", " per team"]
+FILTERS = ["", " in Berlin", " for Sales", " in IT", " at level 3", " for female employees"]
+WINDOWS = ["", " last year", " in 2023", " for Q3 2024", " ytd", " over the past 6 months", " since march 2022"]
+CHARTS = ["", " as a bar chart", " line chart", " pie chart"]
+OTHERS = [
+    "hello", "hi", "explain attrition rate", "define span of control", "predict attrition risk",
+    "who will leave next quarter", "what is the auc of the model", "finance vs it attrition",
+    "headcount 2023 vs 2024", "berlin versus london salary", "why is engagement low",
+    "what's the weather in berlin"
+]
+
+# Old router checks, kept here only as the comparison point
+LEGACY_GREETINGS = ["hi", "hello", "hey", "hola", "hallo"]
+LEGACY_DEFINITION = ["what is", "define", "explain", "meaning"]
+LEGACY_MODEL_METRICS = ["auc", "precision", "recall"]
+LEGACY_PREDICTION = ["predict", "risk"]
+LEGACY_CHART = ["chart", "plot", "graph", "bar", "line", "pie"]
+
+
+def corpus(n, seed=7):
+    rng = random.Random(seed)
+    templates = [
+        "".join(parts) for parts in itertools.product(OPENERS, METRICS, DIMENSIONS, FILTERS, WINDOWS, CHARTS)
+    ]
+    return [
+        rng.choice(OTHERS) if rng.random() < 0.1 else rng.choice(templates)
+        for _ in range(n)
+    ]
+
+
+def legacy_parse(query, vocabulary, as_of):
+    q = query.lower().strip()
+    if q in LEGACY_GREETINGS:
+        return "GREETING"
+    if any(k in q for k in LEGACY_DEFINITION):
+        return "DEFINITION"
+
+    metric, dimension, chart = extract_metric(q), extract_dimension(q), extract_chart_type(q)
+    wants_chart = any(k in q for k in LEGACY_CHART)
+
+    if any(k in q for k in LEGACY_MODEL_METRICS) or any(k in q for k in LEGACY_PREDICTION):
+        return "ML"
+
+    comparison = extract_comparison(q, vocabulary, as_of=as_of) if SEPARATOR.search(q) else None
+    window = extract_time_window(q, as_of=as_of)
+    if window is not None and dimension == "YEAR":
+        dimension = extract_dimension(q.replace(window["text"], " "))
+
+    return metric, dimension, chart, wants_chart, comparison, window
+
+
+def _time(func, queries):
+    timings = np.empty(len(queries))
+    for i, q in enumerate(queries):
+        start = time.perf_counter()
+        func(q)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query parser benchmark")
+    parser.add_argument("--queries", type=int, default=50000)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--max-over-budget", type=float, default=0.001)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    df = prepare_master(generate(args.rows))
+    as_of = get_time_index(df).as_of
+    vocabulary = get_vocabulary(df)
+    get_matcher(df)
+
+    queries = corpus(args.queries)
+    reset_parser_stats()
+
+    results = {
+        "unified": _time(lambda q: parse_query(q, df, as_of=as_of), queries),
+        "legacy": _time(lambda q: legacy_parse(q, vocabulary, as_of), queries)
+    }
+    stats = parser_stats()
+
+    print(f"{args.queries} queries, parse budget {QUERY_PARSE_BUDGET_US} µs")
+    print("parser        p50 µs     p95 µs     p99 µs    total ms")
+    for name, us in results.items():
+        print(
+            f"{name:<10} {np.percentile(us, 50):>9.1f} {np.percentile(us, 95):>10.1f}"
+            f" {np.percentile(us, 99):>10.1f} {us.sum() / 1000:>11.1f}"
+        )
+
+    over = stats.get("over_budget", 0) / max(stats["parsed"], 1)
+    print(f"types {({k: v for k, v in stats.items() if k.isalpha() and k not in ('parsed',)})}")
+    print(f"over budget {stats.get('over_budget', 0)} ({over:.3%})")
+
+    raise SystemExit(1 if over > args.max_over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# benchmarks/run_benchmark.py
+#
+# Offline load test for process_query.
+#
+#   python -m benchmarks.run_benchmark --rows 10000 35000 1000000
+#   python -m benchmarks.run_benchmark --layout enterprise --concurrency 8
+#   python -m benchmarks.run_benchmark --save-baseline
+#
+# Exit code 1 when a run regresses past --tolerance vs the baseline.
+# The baseline holds this machine's numbers, so it is not committed:
+# save it once per machine, scenarios without one are not compared.
+
+import argparse
+import json
+import logging
+import os
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+import numpy as np
+
+import modules.analytics_router as router
+from modules.analytics import prepare_master
+from modules.snapshot_store import get_snapshots
+from benchmarks.corpus import replay, LANGUAGES
+from benchmarks.fake_llm import FakeLLM
+from benchmarks.synthetic import generate
+
+BASELINE_PATH = "benchmarks/baseline.json"
+
+# Router-level names → stage they belong to
+STAGES = {
+    "call_llm": "llm",
+    "parse_query": "nlu",
+    "active_headcount": "aggregate",
+    "active_headcount_by": "aggregate",
+    "active_headcount_by_year": "aggregate",
+    "attrition_rate": "aggregate",
+    "attrition_rate_by": "aggregate",
+    "attrition_by_year": "aggregate",
+    "average_salary": "aggregate",
+    "average_salary_by": "aggregate",
+    "average_engagement": "aggregate",
+    "engagement_by": "aggregate",
+    "gender_distribution": "aggregate",
+    "snapshot_metric": "aggregate",
+    "survival_metric": "aggregate",
+    "build_chart": "chart",
+    "predict_attrition": "predict",
+    "add_risk_bucket": "predict"
+}
+
+_local = threading.local()
+
+
+# ===============================
+# STAGE INSTRUMENTATION
+# ===============================
+def _timed(stage, func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stages = getattr(_local, "stages", None)
+            if stages is not None:
+                stages[stage] += time.perf_counter() - start
+    return wrapper
+
+
+def instrument(fake_llm, df):
+    originals = {name: getattr(router, name) for name in STAGES}
+    originals["load_master"] = router.load_master
+    originals["get_snapshots"] = router.get_snapshots
+
+    # Synthetic data must not overwrite the real snapshot store
+    snapshot_dir = tempfile.mkdtemp(prefix="hr_bench_snapshots_")
+    router.get_snapshots = lambda frame: get_snapshots(frame, root=snapshot_dir)
+    router.call_llm = fake_llm
+    for name, stage in STAGES.items():
+        setattr(router, name, _timed(stage, getattr(router, name)))
+
+    router.load_master = lambda: df
+    router.reset_dataset_cache()
+    router.classify_intent_llm_cached.cache_clear()
+    router.clear_answer_cache()
+
+    return originals
+
+
+def restore(originals):
+    for name, func in originals.items():
+        setattr(router, name, func)
+    router.reset_dataset_cache()
+    router.classify_intent_llm_cached.cache_clear()
+
+
+def run_one(language, question, cold):
+    _local.stages = defaultdict(float)
+
+    if cold:
+        router.classify_intent_llm_cached.cache_clear()
+        router.clear_answer_cache()
+
+    start = time.perf_counter()
+    error = None
+    try:
+        router.process_query(question, language)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    total = time.perf_counter() - start
+
+    stages = dict(_local.stages)
+    stages["other"] = max(total - sum(stages.values()), 0.0)
+    return total, stages, error
+
+
+# ===============================
+# ONE SCENARIO
+# ===============================
+def run_scenario(rows, layout, languages, concurrency, repeat, latency_ms, cold, kinds, trace_memory):
+    logging.disable(logging.INFO)
+
+    t0 = time.perf_counter()
+    df = prepare_master(generate(rows, layout))
+    setup_s = time.perf_counter() - t0
+
+    fake = FakeLLM(latency_ms)
+    originals = instrument(fake, df)
+
+    workload = list(replay(languages, kinds)) * repeat
+
+    if trace_memory:
+        tracemalloc.start()
+
+    try:
+        # Warm the dataset cache outside the timed window
+        router.get_cached_dataset()
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda w: run_one(w[0], w[1], cold), workload))
+        wall = time.perf_counter() - start
+    finally:
+        traced_peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        if trace_memory:
+            tracemalloc.stop()
+        restore(originals)
+        logging.disable(logging.NOTSET)
+
+    totals = np.array([r[0] for r in results]) * 1000
+    stage_ms = defaultdict(list)
+    for _, stages, _ in results:
+        for stage, seconds in stages.items():
+            stage_ms[stage].append(seconds * 1000)
+
+    errors = defaultdict(int)
+    for _, _, error in results:
+        if error:
+            errors[error[:120]] += 1
+
+    report = {
+        "rows": rows,
+        "layout": layout,
+        "concurrency": concurrency,
+        "queries": len(results),
+        "setup_s": round(setup_s, 3),
+        "p50_ms": round(float(np.percentile(totals, 50)), 3),
+        "p95_ms": round(float(np.percentile(totals, 95)), 3),
+        "max_ms": round(float(totals.max()), 3),
+        "qps": round(len(results) / wall, 2),
+        "stages_p50_ms": {s: round(float(np.percentile(v, 50)), 3) for s, v in sorted(stage_ms.items())},
+        "stages_p95_ms": {s: round(float(np.percentile(v, 95)), 3) for s, v in sorted(stage_ms.items())},
+        "llm_calls": dict(fake.calls),
+        "errors": dict(errors),
+        # ru_maxrss is KB on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+    if traced_peak is not None:
+        report["traced_peak_mb"] = round(traced_peak / 1e6, 1)
+
+    return report
+
+
+# ===============================
+# BASELINE
+# ===============================
+def scenario_key(report):
+    return f"{report['layout']}:{report['rows']}:c{report['concurrency']}"
+
+
+def compare(report, baseline, tolerance):
+    """
+    Returns human-readable regressions vs the stored baseline
+    """
+    base = baseline.get(scenario_key(report))
+    if not base:
+        return []
+
+    regressions = []
+    for field in ["p50_ms", "p95_ms"]:
+        if report[field] > base[field] * (1 + tolerance):
+            regressions.append(f"{field}: {base[field]} → {report[field]}")
+
+    if report["qps"] < base["qps"] * (1 - tolerance):
+        regressions.append(f"qps: {base['qps']} → {report['qps']}")
+
+    return regressions
+
+
+def print_report(report, regressions):
+    print(f"\n=== {scenario_key(report)}  ({report['queries']} queries, setup {report['setup_s']}s)")
+    print(f"latency  p50 {report['p50_ms']} ms | p95 {report['p95_ms']} ms | max {report['max_ms']} ms")
+    print(f"throughput {report['qps']} q/s | peak RSS {report['peak_rss_mb']} MB"
+          + (f" | traced peak {report['traced_peak_mb']} MB" if "traced_peak_mb" in report else ""))
+
+    print("stage      p50 ms     p95 ms")
+    for stage, p50 in report["stages_p50_ms"].items():
+        print(f"{stage:<10} {p50:>8} {report['stages_p95_ms'][stage]:>10}")
+
+    print(f"llm calls {report['llm_calls']}")
+    for error, count in report["errors"].items():
+        print(f"⚠ {count}x {error}")
+    for regression in regressions:
+        print(f"❌ REGRESSION {regression}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HR-GPT query pipeline benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 35000])
+    parser.add_argument("--layout", choices=["10000", "enterprise"], default="10000")
+    parser.add_argument("--languages", nargs="+", default=LANGUAGES)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="fake LLM latency per call")
+    parser.add_argument("--cold", action="store_true", help="clear the intent / answer caches before every query")
+    parser.add_argument("--with-ml", action="store_true", help="include prediction questions (needs ml/models)")
+    parser.add_argument("--trace-memory", action="store_true", help="tracemalloc peak (slows the run)")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--json", help="write the full report to this path")
+    args = parser.parse_args()
+
+    kinds = None if args.with_ml else ["metric", "definition", "greeting", "out_of_domain"]
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    reports, failed = [], False
+    for rows in args.rows:
+        report = run_scenario(
+            rows, args.layout, args.languages, args.concurrency,
+            args.repeat, args.latency_ms, args.cold, kinds, args.trace_memory
+        )
+        regressions = compare(report, baseline, args.tolerance)
+        failed |= bool(regressions)
+        print_report(report, regressions)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=2)
+
+    if args.save_baseline:
+        for report in reports:
+            baseline[scenario_key(report)] = {
+                k: report[k] for k in ["p50_ms", "p95_ms", "qps", "peak_rss_mb"]
+            }
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nBaseline saved → {args.baseline}")
+
+    raise SystemExit(1 if failed and not args.save_baseline else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/sketch_benchmark.py
+#
+# Distinct-count sketches vs exact nunique: build cost, per-query cost
+# and relative error for headcount / attrition queries (KPI, breakdowns,
+# filters, by year) at several error targets. --copies repeats every
+# employee as monthly snapshots (one Snapshot_Date per copy) so distinct
+# IDs ≠ rows.
+#
+#   python -m benchmarks.sketch_benchmark --rows 1000000 --errors 0.02,0.01,0.005
+#
+# Exit code 1 when a count misses by more than --max-sigma standard errors.
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+import modules.analytics as analytics
+from modules.analytics import prepare_master
+from modules.distinct_sketch import DistinctSketches, _cache
+from benchmarks.synthetic import generate
+
+
+def queries(df):
+    """
+    {name: (query, returns counts)}; rates are timed but not error-checked
+    """
+    location = df["Location"].mode()[0]
+    department = df["Department"].mode()[0]
+    filters = {"Location": [location]}
+    return {
+        "headcount": (lambda: analytics.active_headcount(df), True),
+        "headcount by department": (lambda: analytics.active_headcount_by(df, "Department"), True),
+        f"headcount in {location}": (lambda: analytics.active_headcount(df, filters), True),
+        f"headcount by year in {location}": (lambda: analytics.active_headcount_by_year(df, filters), True),
+        "attrition rate by location": (lambda: analytics.attrition_rate_by(df, "Location"), False),
+        f"exits by year in {department}": (lambda: analytics.attrition_by_year(df, {"Department": [department]}), True),
+        "total employees": (lambda: analytics.total_headcount(df), True)
+    }
+
+
+def _run(func, repeat):
+    result = func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return result, (time.perf_counter() - start) / repeat * 1000
+
+
+def _rel_errors(exact, approx, counts):
+    """
+    Relative errors per value (empty for rate results)
+    """
+    if not counts:
+        return np.array([])
+    if isinstance(exact, pd.Series):
+        approx = approx.reindex(exact.index).fillna(0)
+        keep = exact > 0
+        return (approx[keep] - exact[keep]).abs().to_numpy() / exact[keep].to_numpy()
+    return np.array([abs(approx - exact) / exact]) if exact else np.array([])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distinct-count sketch benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--copies", type=int, default=4, help="rows per employee")
+    parser.add_argument("--errors", default="0.02,0.01,0.005")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-sigma", type=float, default=4.0)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    base = generate(max(args.rows // args.copies, 1))
+    months = pd.date_range(end="2025-12-31", periods=args.copies, freq="ME")
+    df = prepare_master(pd.concat([base.assign(Snapshot_Date=m) for m in months], ignore_index=True))
+    print(f"{len(df)} rows, {df['Employee_ID'].nunique()} employees")
+
+    analytics.DISTINCT_MODE = "exact"
+    exact = {name: _run(func, args.repeat) for name, (func, _) in queries(df).items()}
+
+    failed = False
+    for error in [float(e) for e in args.errors.split(",")]:
+        analytics.DISTINCT_MODE = "approx"
+        analytics.SKETCH_MIN_ROWS = 0
+        _cache.clear()
+
+        start = time.perf_counter()
+        sketches = DistinctSketches(df, error=error)
+        build_ms = (time.perf_counter() - start) * 1000
+        analytics.get_sketches = lambda frame, s=sketches: s
+
+        print(f"\nerror target {error:.2%}: p={sketches.precision}, "
+              f"standard error {sketches.error:.2%}, hashing {build_ms:.0f} ms")
+        print(f"{'query':<34} {'exact ms':>9} {'approx ms':>10} {'first ms':>9} {'max err':>8}")
+
+        for name, (func, counts) in queries(df).items():
+            start = time.perf_counter()
+            func()
+            first_ms = (time.perf_counter() - start) * 1000
+
+            approx, approx_ms = _run(func, args.repeat)
+            truth, exact_ms = exact[name]
+            errors = _rel_errors(truth, approx, counts)
+            worst = errors.max() if len(errors) else float("nan")
+            if worst > args.max_sigma * sketches.error:
+                failed = True
+
+            print(f"{name:<34} {exact_ms:>9.2f} {approx_ms:>10.2f} {first_ms:>9.1f} {worst:>8.2%}")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
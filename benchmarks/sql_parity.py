@@ -0,0 +1,158 @@
+# benchmarks/sql_parity.py
+#
+# Parity + speed check: pandas metric engine vs the embedded SQL backend,
+# and both against the modules/analytics.py functions the chat and batch
+# paths call, for every spec those functions answer.
+#
+#   python -m benchmarks.sql_parity --rows 10000 1000000
+#   python -m benchmarks.sql_parity --engines sqlite
+#
+# Exit code 1 on any result mismatch.
+
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.analytics import (
+    prepare_master,
+    active_headcount,
+    active_headcount_by,
+    attrition_rate,
+    attrition_rate_by,
+    average_salary,
+    average_salary_by,
+    average_engagement,
+    engagement_by,
+    gender_distribution
+)
+from modules.filter_engine import apply_filters
+from modules.query_engine import compute_metric
+from modules.schema_registry import DIMENSIONS as DIMENSION_COLUMNS
+from modules.sql_backend import SQLBackend, build_database, duckdb
+from benchmarks.synthetic import generate
+
+METRICS = ["headcount", "attrition", "salary", "engagement", "gender", "tenure"]
+DIMENSIONS = [None, "DEPARTMENT", "LOCATION", "GENDER", "JOB_LEVEL", "YEAR"]
+FILTERS = [None, {"Location": ["Berlin", "Tokyo"]}, {"Department": "IT", "Gender": ["F"]}]
+
+
+def _normalize(result):
+    """
+    Comparable form: {key-as-str: value rounded to 6 dp}
+    """
+    if not isinstance(result, pd.Series):
+        return None if result is None else round(float(result), 6)
+
+    def key(k):
+        if isinstance(k, tuple):
+            return tuple(_key(v) for v in k)
+        return _key(k)
+
+    return {key(k): round(float(v), 6) for k, v in result.items()}
+
+
+def _key(value):
+    if isinstance(value, (int, float, np.number)):
+        return str(float(value))
+    return str(value)
+
+
+def analytics_metric(df, metric, dimension, filters):
+    """
+    The spec answered by modules/analytics.py; None where it has no
+    equivalent (its YEAR series are active stock / exit counts per year,
+    not a Hire_Year grouping; no tenure or gender-by-dimension function)
+    """
+    if dimension == "YEAR":
+        return None
+    column = DIMENSION_COLUMNS.get(dimension) if dimension else None
+
+    if metric == "headcount":
+        return active_headcount_by(df, column, filters) if column else active_headcount(df, filters)
+    if metric == "attrition":
+        return attrition_rate_by(df, column, filters) if column else attrition_rate(df, filters)
+
+    sub = apply_filters(df, filters)
+    if metric == "salary":
+        return average_salary_by(sub, column) if column else average_salary(sub)
+    if metric == "engagement":
+        return engagement_by(sub, column) if column else average_engagement(sub)
+    if metric == "gender" and column is None:
+        return gender_distribution(sub)
+    return None
+
+
+def run(rows, engines, workdir):
+    raw = generate(rows)
+    df = prepare_master(raw.copy())
+
+    backends = {}
+    for engine in engines:
+        path = os.path.join(workdir, f"parity_{rows}.{engine}")
+        start = time.perf_counter()
+        build_database(path=path, engine=engine, frames={"hr_master": raw})
+        print(f"[{rows}] built {engine} in {time.perf_counter() - start:.2f}s")
+        backends[engine] = SQLBackend(path, engine)
+
+    timings = {name: 0.0 for name in ["pandas"] + engines}
+    mismatches = 0
+    specs = 0
+    analytics_specs = 0
+    analytics_mismatches = 0
+
+    for metric in METRICS:
+        for dimension in DIMENSIONS:
+            for filters in FILTERS:
+                specs += 1
+
+                start = time.perf_counter()
+                expected = _normalize(compute_metric(df, metric, dimension, filters))
+                timings["pandas"] += time.perf_counter() - start
+
+                for engine, backend in backends.items():
+                    start = time.perf_counter()
+                    got = _normalize(backend.compute_metric(metric, dimension, filters))
+                    timings[engine] += time.perf_counter() - start
+
+                    if got != expected:
+                        mismatches += 1
+                        print(f"❌ {engine}: {metric} / {dimension} / {filters}")
+
+                direct = analytics_metric(df, metric, dimension, filters)
+                if direct is not None:
+                    analytics_specs += 1
+                    if _normalize(direct) != expected:
+                        analytics_mismatches += 1
+                        print(f"❌ analytics: {metric} / {dimension} / {filters}")
+
+    print(f"[{rows}] {specs} specs, {mismatches} mismatches")
+    print(f"[{rows}] analytics.py: {analytics_specs} specs, {analytics_mismatches} mismatches")
+    for name, seconds in timings.items():
+        print(f"[{rows}] {name:<7} total {seconds * 1000:9.1f} ms | per spec {seconds / specs * 1000:7.2f} ms")
+
+    return mismatches + analytics_mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pandas vs SQL backend parity")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000])
+    parser.add_argument("--engines", nargs="+", default=["sqlite"] + (["duckdb"] if duckdb else []))
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    failed = 0
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            failed += run(rows, args.engines, workdir)
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# benchmarks/survival_benchmark.py
+#
+# Kaplan–Meier engine cost at scale (curves per dimension, median
+# tenure, cohort retention matrix) and its agreement with a textbook
+# per-event-time Kaplan–Meier on a sample.
+#
+#   python -m benchmarks.survival_benchmark --rows 1000000
+#
+# Exit code 1 when any curve differs from the reference by more than 1e-9.
+
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from modules.analytics import prepare_master
+from modules.survival import (
+    DAYS_PER_YEAR, survival_curves, kaplan_meier, median_tenure, cohort_retention, tenure_events
+)
+from benchmarks.synthetic import generate
+
+DIMENSIONS = [None, "DEPARTMENT", "LOCATION", "GENDER", "JOB_LEVEL", "YEAR"]
+
+
+def reference_survival(durations, exited, at_days):
+    """
+    S(t) the textbook way: product over distinct exit times ≤ t of
+    (1 − exits / at risk)
+    """
+    survival, result = 1.0, []
+    times = np.unique(durations[exited])
+    pending = list(at_days)
+    for t in times:
+        while pending and pending[0] < t:
+            result.append(survival)
+            pending.pop(0)
+        survival *= 1 - ((durations == t) & exited).sum() / (durations >= t).sum()
+    return result + [survival] * len(pending)
+
+
+def _time(func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Survival analysis benchmark")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--check-rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    df = prepare_master(generate(args.rows))
+    print(f"{len(df)} employees")
+
+    print(f"{'query':<28} {'ms':>9}")
+    print(f"{'tenure events':<28} {_time(lambda: tenure_events(df), args.repeat):>9.1f}")
+    for dim in DIMENSIONS:
+        name = f"km curves by {dim or 'ALL'}".lower()
+        print(f"{name:<28} {_time(lambda: kaplan_meier(df, dim), args.repeat):>9.1f}")
+    print(f"{'median tenure by department':<28} {_time(lambda: median_tenure(df, 'DEPARTMENT'), args.repeat):>9.1f}")
+    print(f"{'cohort retention matrix':<28} {_time(lambda: cohort_retention(df), args.repeat):>9.1f}")
+    filters = {"Location": [df["Location"].mode()[0]]}
+    print(f"{'km by department, filtered':<28} {_time(lambda: kaplan_meier(df, 'DEPARTMENT', filters), args.repeat):>9.1f}")
+
+    # ---------------------------
+    # Agreement with the reference on a sample
+    # ---------------------------
+    sample = df.iloc[:args.check_rows]
+    curves = survival_curves(sample, "DEPARTMENT")
+    durations, exited, usable = tenure_events(sample)
+    years = np.arange(0, 11)
+    engine = curves.at(years)
+
+    worst = 0.0
+    for label in curves.labels:
+        rows = usable & (sample["Department"] == label).to_numpy()
+        expected = np.array(reference_survival(durations[rows], exited[rows], years * DAYS_PER_YEAR))
+        got = engine[label].to_numpy()
+        observed = ~np.isnan(got)
+        worst = max(worst, float(np.abs(got[observed] - expected[observed]).max()))
+
+    print(f"\nmax |engine − reference| on {len(sample)} rows: {worst:.2e}")
+    raise SystemExit(1 if worst > 1e-9 else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# benchmarks/synthetic.py
+#
+# Synthetic HR master data at any row count, with the same schema
+# (and joint value distributions) as the shipped CSVs.
+
+import numpy as np
+import pandas as pd
+
+LAYOUTS = {
+    "10000": "data/hr_master_10000.csv",
+    "enterprise": "data/hr_master_enterprise.csv"
+}
+
+DATE_COLUMNS = ["Hire_Date", "Termination_Date", "Exit_Date"]
+
+
+def generate(rows, layout="10000", seed=42):
+    """
+    Bootstraps rows of the template file, then re-keys IDs and
+    jitters dates so distinct counts / date ranges scale with `rows`.
+    """
+    template = pd.read_csv(LAYOUTS[layout])
+    rng = np.random.default_rng(seed)
+
+    df = template.iloc[rng.integers(0, len(template), size=rows)].reset_index(drop=True)
+
+    # ---------------------------
+    # Unique IDs in the template's format
+    # ---------------------------
+    if layout == "enterprise":
+        df["Employee_ID"] = np.arange(100001, 100001 + rows)
+    else:
+        width = max(5, len(str(rows)))
+        df["Employee_ID"] = [f"E{i:0{width}d}" for i in range(1, rows + 1)]
+
+    if "Manager_ID" in df.columns:
+        df["Manager_ID"] = df["Employee_ID"].to_numpy()[rng.integers(0, rows, size=rows)]
+
+    # ---------------------------
+    # Date jitter (same offset for hire + exit keeps ordering)
+    # ---------------------------
+    offset = pd.to_timedelta(rng.integers(-90, 90, size=rows), unit="D")
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            dates = pd.to_datetime(df[col], errors="coerce") + offset
+            df[col] = dates.dt.strftime("%Y-%m-%d")
+
+    return df
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 # ===== GROQ API KEY FROM ENV =====
 # Streamlit secrets or system env will fill this
@@ -7,3 +8,100 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 # ===== APP SETTINGS =====
 APP_NAME = "HR Analytics Assistant V3"
 DEFAULT_LANGUAGE = "en"
+# Background threads answering chat questions (shared by all sessions)
+APP_QUERY_WORKERS = int(os.getenv("HR_APP_QUERY_WORKERS", "4"))
+
+# ===== DATA SETTINGS =====
+# Categoricals / downcast numerics / int Employee_ID keys at load time
+OPTIMIZE_DTYPES = os.getenv("HR_OPTIMIZE_DTYPES", "1") == "1"
+# Quarantine invalid rows / impute bad values at load (modules/data_quality.py)
+QUALITY_CHECKS = os.getenv("HR_QUALITY_CHECKS", "1") == "1"
+# Map ONE copy of the dataset from /dev/shm in every session / process
+SHARED_DATASET = os.getenv("HR_SHARED_DATASET", "0") == "1"
+# Seconds before the shared dataset is reloaded from the source
+DATASET_TTL = int(os.getenv("HR_DATASET_TTL", "300"))
+# Anchor for "last year" / "YTD" windows ("" = latest date in the data)
+AS_OF_DATE = os.getenv("HR_AS_OF_DATE", "")
+
+# ===== TENANTS =====
+# JSON {tenant: {"source": "supabase" | "csv" | "parquet", ...}}; "" = default tenant only
+TENANTS_FILE = os.getenv("HR_TENANTS_FILE", "")
+# Tenant served when a request names none (the Supabase hr_master by default)
+DEFAULT_TENANT = os.getenv("HR_DEFAULT_TENANT", "default")
+# Resident datasets of all tenants together; least recently used are evicted above it
+TENANT_MEMORY_MB = int(os.getenv("HR_TENANT_MEMORY_MB", "2048"))
+
+# ===== ROW-LEVEL SECURITY =====
+# JSON {role: {"Department": [...], "Location": [...], "manager": "<Employee_ID>"}}
+ROLES_FILE = os.getenv("HR_ROLES_FILE", "")
+# Role applied when a request carries none ("" = every row visible)
+DEFAULT_ROLE = os.getenv("HR_DEFAULT_ROLE", "")
+
+# ===== DISTINCT COUNTS =====
+# "approx" answers headcount / attrition from HyperLogLog sketches
+# (built once per dataset, merged per filter / breakdown); "exact" counts rows
+DISTINCT_MODE = os.getenv("HR_DISTINCT_MODE", "exact")
+# Target relative standard error of an approximate count
+SKETCH_ERROR = float(os.getenv("HR_SKETCH_ERROR", "0.01"))
+# Smaller datasets are always counted exactly
+SKETCH_MIN_ROWS = int(os.getenv("HR_SKETCH_MIN_ROWS", "100000"))
+
+# ===== SNAPSHOTS =====
+# Monthly workforce snapshots (Parquet, one partition per month)
+SNAPSHOT_DIR = os.getenv("HR_SNAPSHOT_DIR", "data/snapshots")
+
+# ===== CHAT HISTORY =====
+# Turns kept in memory per session; older ones spill to SQLite
+CHAT_WINDOW = int(os.getenv("HR_CHAT_WINDOW", "40"))
+# Turns rendered per page of history
+CHAT_VISIBLE = int(os.getenv("HR_CHAT_VISIBLE", "20"))
+# Tables up to this many rows are stored inline; bigger ones by result ID
+CHAT_INLINE_ROWS = int(os.getenv("HR_CHAT_INLINE_ROWS", "200"))
+CHAT_DB_PATH = os.getenv("HR_CHAT_DB_PATH", os.path.join(tempfile.gettempdir(), "hr_chat_history.sqlite"))
+CHAT_RETENTION_DAYS = int(os.getenv("HR_CHAT_RETENTION_DAYS", "7"))
+
+# ===== FOLLOW-UPS =====
+# Resolved answers memoized per dataset (follow-ups mostly hit this)
+ANSWER_CACHE_SIZE = int(os.getenv("HR_ANSWER_CACHE_SIZE", "256"))
+# API sessions remembered for follow-ups (least recently used dropped)
+SESSION_LIMIT = int(os.getenv("HR_SESSION_LIMIT", "1000"))
+
+# ===== DOMAIN GUARD =====
+# Local HR / non-HR confidence inside this band is checked by the LLM
+DOMAIN_BAND_LOW = float(os.getenv("HR_DOMAIN_BAND_LOW", "0.3"))
+DOMAIN_BAND_HIGH = float(os.getenv("HR_DOMAIN_BAND_HIGH", "0.7"))
+
+# ===== QUERY PARSER =====
+# Longer questions are truncated before parsing; parses slower than the
+# budget are logged and counted (query_parser.parser_stats)
+QUERY_MAX_CHARS = int(os.getenv("HR_QUERY_MAX_CHARS", "500"))
+QUERY_PARSE_BUDGET_US = int(os.getenv("HR_QUERY_PARSE_BUDGET_US", "2000"))
+
+# ===== INSIGHTS =====
+# LLM narrative under each answer (after the table / chart is shown)
+INSIGHTS_ENABLED = os.getenv("HR_INSIGHTS", "1") == "1"
+# Narration requests arriving within this window share one LLM call
+INSIGHT_BATCH_WINDOW_MS = int(os.getenv("HR_INSIGHT_BATCH_WINDOW_MS", "50"))
+INSIGHT_BATCH_SIZE = int(os.getenv("HR_INSIGHT_BATCH_SIZE", "8"))
+
+# ===== RESULT SETS =====
+# Tables with at least this many rows stay server-side and are paged
+RESULT_SET_MIN_ROWS = int(os.getenv("HR_RESULT_SET_MIN_ROWS", "500"))
+# Memory budget for all stored result sets (LRU eviction beyond it)
+RESULT_STORE_MAX_MB = int(os.getenv("HR_RESULT_STORE_MAX_MB", "256"))
+# Seconds a result set stays available after its last access
+RESULT_STORE_TTL = int(os.getenv("HR_RESULT_STORE_TTL", "1800"))
+
+# ===== SQL BACKEND =====
+# Embedded database built from data/*.csv ("" engine = duckdb if installed, else sqlite)
+SQL_DB_PATH = os.getenv("HR_SQL_DB", "data/hr_analytics.db")
+SQL_ENGINE = os.getenv("HR_SQL_ENGINE", "")
+SQL_MASTER_CSV = os.getenv("HR_MASTER_CSV", "hr_master_10000.csv")
+
+# ===== HTTP API SETTINGS =====
+# Worker threads share ONE in-memory dataset + model
+API_WORKERS = int(os.getenv("HR_API_WORKERS", "4"))
+# Requests allowed in flight (running + queued) before 503
+API_MAX_PENDING = int(os.getenv("HR_API_MAX_PENDING", "32"))
+# Per-request deadline in seconds (504 when exceeded)
+API_TIMEOUT_SECONDS = float(os.getenv("HR_API_TIMEOUT_SECONDS", "30"))
@@ -1,19 +1,22 @@
 import joblib
 import pandas as pd
+from functools import lru_cache
 
 MODEL_PATH = "ml/models/attrition_ensemble.pkl"
 
 # -------------------------------
-# Load trained ML model
+# Load trained ML model (once per process and path; tenants may
+# bring their own model file)
 # -------------------------------
-def load_attrition_model():
-    return joblib.load(MODEL_PATH)
+@lru_cache(maxsize=8)
+def load_attrition_model(path=MODEL_PATH):
+    return joblib.load(path)
 
 # -------------------------------
 # Predict attrition probability
 # -------------------------------
-def predict_attrition(df):
-    model = load_attrition_model()
+def predict_attrition(df, model=None):
+    model = model if model is not None else load_attrition_model()
 
     features = [
         "Age",
@@ -28,8 +31,10 @@ def predict_attrition(df):
     if missing:
         raise ValueError(f"Missing ML features: {missing}")
 
-    X = df[features].copy()
-    X = X.fillna(X.mean(numeric_only=True))
+    X = df[features]
+    # Validated datasets come with these columns already imputed at load
+    if not set(features) <= set(df.attrs.get("imputed", ())):
+        X = X.fillna(X.mean(numeric_only=True))
 
     df_out = df.copy()
     df_out["Attrition_Risk"] = model.predict_proba(X)[:, 1]
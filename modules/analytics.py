@@ -1,32 +1,81 @@
 # modules/analytics.py
 
+import logging
+import os
+
 import pandas as pd
 import requests
 import streamlit as st
 
-SUPABASE_URL = st.secrets["SUPABASE_URL"]
-SUPABASE_KEY = st.secrets["SUPABASE_ANON_KEY"]
+from config import OPTIMIZE_DTYPES, QUALITY_CHECKS, DISTINCT_MODE, SKETCH_MIN_ROWS
+from modules.data_optimizer import optimize_dtypes
+from modules.data_quality import validate
+from modules.distinct_sketch import get_sketches
+from modules.filter_engine import apply_filters
+from modules.schema_mapper import map_schema, SchemaError
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-}
 
-@st.cache_data(ttl=300)
-def load_master():
+def _secret(name):
+    """
+    Streamlit secrets first, environment second (headless API / scripts)
+    """
     try:
-        url = f"{SUPABASE_URL}/rest/v1/hr_master?select=*"
-        resp = requests.get(url, headers=HEADERS, timeout=20)
+        return st.secrets[name]
+    except Exception:
+        return os.getenv(name, "")
+
+
+def supabase_source(url=None, key=None, table="hr_master"):
+    """
+    Connection settings of one Supabase table (app secrets by default)
+    """
+    return {
+        "url": url or _secret("SUPABASE_URL"),
+        "key": key or _secret("SUPABASE_ANON_KEY"),
+        "table": table
+    }
+
+
+def fetch_master(source=None, layout=None):
+    """
+    Uncached Supabase read (tenant registry / shared store / scripts)
+    """
+    source = source or supabase_source()
+    headers = {
+        "apikey": source["key"],
+        "Authorization": f"Bearer {source['key']}",
+        "Content-Type": "application/json",
+    }
+    try:
+        url = f"{source['url']}/rest/v1/{source['table']}?select=*"
+        resp = requests.get(url, headers=headers, timeout=20)
         resp.raise_for_status()
         df = pd.DataFrame(resp.json())
     except Exception:
         return pd.DataFrame()
 
+    try:
+        return prepare_master(df, layout=layout)
+    except SchemaError as e:
+        logging.error(f"{source['table']} rejected: {e}")
+        return pd.DataFrame()
+
+
+@st.cache_data(ttl=300)
+def load_master():
+    return fetch_master()
+
+
+def prepare_master(df, optimize=OPTIMIZE_DTYPES, layout=None):
+    """
+    Normalizes raw master rows (Supabase / CSV / synthetic) of any known
+    layout into the canonical schema; raises SchemaError on bad data
+    """
     if df.empty:
         return df
 
     df.columns = [c.strip() for c in df.columns]
+    df = map_schema(df, layout)
 
     if "Employee_ID" in df.columns:
         df["Employee_ID"] = df["Employee_ID"].astype(str)
@@ -35,36 +84,123 @@ def load_master():
         df["Hire_Date"] = pd.to_datetime(df["Hire_Date"], errors="coerce")
         df["Hire_Year"] = df["Hire_Date"].dt.year
 
-    # ✅ FIXED COLUMN NAME
+    # Exit_Date (enterprise layout) is mapped onto Termination_Date
     if "Termination_Date" in df.columns:
         df["Termination_Date"] = pd.to_datetime(df["Termination_Date"], errors="coerce")
         df["Exit_Year"] = df["Termination_Date"].dt.year
 
+    if optimize:
+        df = optimize_dtypes(df)
+
+    # After the optimizer: int keys / categoricals make the checks and
+    # the quarantine copy cheap
+    if QUALITY_CHECKS:
+        df = validate(df)
+
     return df
 
 
+# ===============================
+# DISTINCT COUNTS (exact / sketches)
+# ===============================
+ACTIVE = {"Status": ["Active"]}
+EXITED = {"Status": ["Resigned", "Terminated"]}
+
+
+def _sketches(df):
+    """
+    HyperLogLog sketches of df when approximate distinct counts are on
+    and the dataset is big enough for them to pay off
+    """
+    if DISTINCT_MODE != "approx" or len(df) < SKETCH_MIN_ROWS or "Employee_ID" not in df.columns:
+        return None
+    return get_sketches(df)
+
+
+def _with(filters, population):
+    """
+    User filters + the Status population; None when they cannot overlap
+    """
+    merged = dict(filters or {})
+    for col, values in (population or {}).items():
+        if col in merged:
+            own = merged[col] if isinstance(merged[col], (list, tuple, set)) else [merged[col]]
+            values = [v for v in values if v in own]
+            if not values:
+                return None
+        merged[col] = values
+    return merged
+
+
+def _distinct(df, filters=None, population=None, by=None, where=None, columns=()):
+    """
+    Distinct Employee_IDs: sketch merge when enabled (None if the
+    grouping cannot be sketched), else None → caller computes exactly
+    """
+    sketches = _sketches(df)
+    if sketches is None:
+        return None
+
+    merged = _with(filters, population)
+    if merged is None:
+        return 0 if by is None else pd.Series(dtype="int64")
+    return sketches.distinct(merged, by=by, where=where, columns=columns)
+
+
 # ===============================
 # HEADCOUNT
 # ===============================
-def active_headcount(df):
+def active_headcount(df, filters=None):
+    approx = _distinct(df, filters, ACTIVE)
+    if approx is not None:
+        return approx
+
+    df = apply_filters(df, filters)
     return df[df["Status"] == "Active"]["Employee_ID"].nunique()
 
 
-def total_headcount(df):
-    return df["Employee_ID"].nunique()
+def total_headcount(df, filters=None):
+    approx = _distinct(df, filters)
+    if approx is not None:
+        return approx
 
+    return apply_filters(df, filters)["Employee_ID"].nunique()
 
-def active_headcount_by(df, column):
-    active = df[df["Status"] == "Active"]
-    if column not in active.columns:
+
+def active_headcount_by(df, column, filters=None):
+    if column not in df.columns:
         return None
-    return active.groupby(column)["Employee_ID"].nunique().sort_values(ascending=False)
 
+    approx = _distinct(df, filters, ACTIVE, by=column)
+    if approx is not None:
+        return approx[approx > 0].sort_values(ascending=False)
 
-def active_headcount_by_year(df):
+    df = apply_filters(df, filters)
+    active = df[df["Status"] == "Active"]
+    return active.groupby(column, observed=True)["Employee_ID"].nunique().sort_values(ascending=False)
+
+
+def active_headcount_by_year(df, filters=None):
     if "Hire_Year" not in df.columns:
         return None
 
+    hired = _distinct(df, filters, by="Hire_Year")
+    if hired is not None:
+        # Active in year y: union of the (Hire_Year, Exit_Year) sketches
+        # hired by y and not exited by y
+        results = {}
+        for year in sorted(y for y in hired.index if pd.notna(y)):
+            count = _distinct(
+                df, filters, columns=("Hire_Year", "Exit_Year"),
+                where=lambda c, y=year: (c["Hire_Year"] <= y) & (c["Exit_Year"].isna() | (c["Exit_Year"] > y))
+            )
+            if count is None:
+                break
+            results[year] = count
+        else:
+            return pd.Series(results, dtype="int64").sort_index()
+
+    df = apply_filters(df, filters)
     results = {}
     years = sorted(df["Hire_Year"].dropna().unique())
 
@@ -84,34 +220,52 @@ def active_headcount_by_year(df):
 # ===============================
 # ATTRITION
 # ===============================
-def attrition_count(df):
+def attrition_count(df, filters=None):
+    approx = _distinct(df, filters, EXITED)
+    if approx is not None:
+        return approx
+
+    df = apply_filters(df, filters)
     return df[df["Status"].isin(["Resigned", "Terminated"])]["Employee_ID"].nunique()
 
 
-def attrition_rate(df):
-    total = total_headcount(df)
-    exited = attrition_count(df)
+def attrition_rate(df, filters=None):
+    total = total_headcount(df, filters)
+    exited = attrition_count(df, filters)
     return round((exited / total) * 100, 2) if total else 0
 
 
-def attrition_rate_by(df, column):
+def attrition_rate_by(df, column, filters=None):
     if column not in df.columns:
         return None
 
+    total = _distinct(df, filters, by=column)
+    exited = _distinct(df, filters, EXITED, by=column)
+    if total is not None and exited is not None:
+        exited = exited.reindex(total.index, fill_value=0)
+        rate = (exited / total.where(total > 0) * 100).round(2).fillna(0)
+        return rate.sort_values(ascending=False)
+
+    df = apply_filters(df, filters)
     results = {}
     for val in df[column].dropna().unique():
         sub = df[df[column] == val]
-        total = total_headcount(sub)
-        exited = attrition_count(sub)
+        total = sub["Employee_ID"].nunique()
+        exited = sub[sub["Status"].isin(["Resigned", "Terminated"])]["Employee_ID"].nunique()
         results[val] = round((exited / total) * 100, 2) if total else 0
 
     return pd.Series(results).sort_values(ascending=False)
 
 
-def attrition_by_year(df):
+def attrition_by_year(df, filters=None):
     if "Exit_Year" not in df.columns:
         return None
 
+    approx = _distinct(df, filters, EXITED, by="Exit_Year")
+    if approx is not None:
+        return approx[approx.index.notna()].sort_index()
+
+    df = apply_filters(df, filters)
     exited = df[df["Status"].isin(["Resigned", "Terminated"])]
     return exited.groupby("Exit_Year")["Employee_ID"].nunique().sort_index()
 
@@ -126,7 +280,7 @@ def average_salary(df):
 def average_salary_by(df, column):
     if column not in df.columns:
         return None
-    return df.groupby(column)["Salary"].mean().round(2).sort_values(ascending=False)
+    return df.groupby(column, observed=True)["Salary"].mean().round(2).sort_values(ascending=False)
 
 
 # ===============================
@@ -139,7 +293,44 @@ def average_engagement(df):
 def engagement_by(df, column):
     if column not in df.columns:
         return None
-    return df.groupby(column)["Engagement_Score"].mean().round(2).sort_values(ascending=False)
+    return df.groupby(column, observed=True)["Engagement_Score"].mean().round(2).sort_values(ascending=False)
+
+
+# ===============================
+# SHARED GROUPBY (BATCH)
+# ===============================
+def dimension_summary(df, column):
+    """
+    ONE groupby computing every per-dimension metric.
+    Matches active_headcount_by / attrition_rate_by /
+    average_salary_by / engagement_by.
+    """
+    if column not in df.columns:
+        return None
+
+    ids = df["Employee_ID"]
+    frame = pd.DataFrame({
+        "total": ids,
+        "active": ids.where(df["Status"] == "Active"),
+        "exited": ids.where(df["Status"].isin(["Resigned", "Terminated"])),
+        "salary": df["Salary"] if "Salary" in df.columns else None,
+        "engagement": df["Engagement_Score"] if "Engagement_Score" in df.columns else None,
+    })
+
+    summary = frame.groupby(df[column], observed=True).agg(
+        total=("total", "nunique"),
+        active=("active", "nunique"),
+        exited=("exited", "nunique"),
+        salary=("salary", "mean"),
+        engagement=("engagement", "mean"),
+    )
+
+    return pd.DataFrame({
+        "Headcount": summary["active"],
+        "Attrition Rate": (summary["exited"] / summary["total"] * 100).round(2),
+        "Average Salary": summary["salary"].round(2),
+        "Engagement Score": summary["engagement"].round(2),
+    })
 
 
 # ===============================
@@ -147,4 +338,5 @@ def engagement_by(df, column):
 # ===============================
 def gender_distribution(df):
     active = df[df["Status"] == "Active"]
-    return active["Gender"].value_counts()
+    counts = active["Gender"].value_counts()
+    return counts[counts > 0]
@@ -1,10 +1,13 @@
 # modules/analytics_router.py
 
 import pandas as pd
-import json
 import logging
+import threading
+from collections import OrderedDict
 from functools import lru_cache
 
+from plotly.graph_objs import Figure
+
 # ===============================
 # LOGGING CONFIG
 # ===============================
@@ -18,6 +21,7 @@ logging.basicConfig(
 # ===============================
 from modules.analytics import (
     load_master,
+    fetch_master,
     active_headcount,
     active_headcount_by,
     active_headcount_by_year,
@@ -32,16 +36,24 @@ from modules.analytics import (
 )
 
 # ===============================
-# FALLBACK NLU
+# QUERY PARSING (one pass)
 # ===============================
-from modules.nlu import (
-    extract_metric,
-    extract_dimension,
-    extract_chart_type
-)
-
-from modules.charts import build_chart
-from modules.llm_engine import call_llm
+from modules.query_parser import parse_query, GREETING, DEFINITION, MODEL_METRICS, PREDICTION, METRIC
+
+from modules.charts import build_chart, build_curves
+from modules.result_store import as_result
+from modules.tenant_registry import get_registry
+from modules.row_security import secure_view, AccessError
+from modules.time_index import get_time_index
+from modules.session_context import dataset_scope
+from modules.snapshot_store import get_snapshots
+from modules.survival import kaplan_meier, median_tenure, cohort_retention
+from modules.comparison_engine import compare, comparison_table, comparison_chart_series
+from modules.filter_engine import apply_filters, build_mask
+from config import SHARED_DATASET, ANSWER_CACHE_SIZE
+from modules.data_optimizer import decode_employee_ids
+from modules.llm_engine import call_llm, parse_llm_json
+from modules.domain_guard import classify_domain
 
 # ===============================
 # ML
@@ -51,34 +63,78 @@ from ml.evaluate import load_ml_metrics
 
 
 # ======================================================
-# DATASET CACHING
+# DATASET CACHING (per tenant)
 # ======================================================
-@lru_cache(maxsize=1)
-def get_cached_dataset():
-    return load_master()
+def _load_default():
+    # Looked up at call time: benchmarks swap load_master
+    return fetch_master() if SHARED_DATASET else load_master()
+
+
+tenants = get_registry(_load_default)
+
+
+def get_cached_dataset(tenant=None):
+    return tenants.dataset(tenant)
+
+
+def reset_dataset_cache(tenant=None):
+    tenants.reset(tenant)
+
+
+def secure_dataset(df, role=None, tenant=None):
+    """
+    Rows of df visible to `role` under `tenant`'s role rules. The role
+    views / masks live in the tenant's caches while df is its current
+    version; a frame evicted / reloaded since keeps the tenant's rules,
+    uncached, and a frame of another tenant is refused.
+    """
+    named = tenants.get(tenant)
+    if df is not None and df.attrs.get("tenant", named.name) != named.name:
+        raise AccessError(f"This dataset does not belong to tenant {named.name}")
+
+    owner = tenants.owner(df)
+    return secure_view(df, role, owner.caches if owner is named else None, named.roles)
 
 
 # ======================================================
-# INTENT CACHING
+# ANSWERS / DIMENSIONS
 # ======================================================
-@lru_cache(maxsize=100)
-def classify_intent_llm_cached(query: str):
+OUT_OF_DOMAIN_MESSAGE = (
+    "⚠ This assistant is limited to HR analytics.\n\n"
+    "Supported topics:\n"
+    "- Headcount\n"
+    "- Attrition\n"
+    "- Salary\n"
+    "- Engagement\n"
+    "- Workforce diversity\n"
+    "- Retention / cohorts / tenure"
+)
 
-    prompt = f"""
-You are an HR analytics intent classifier.
+DIMENSION_COLUMNS = {
+    "DEPARTMENT": "Department",
+    "LOCATION": "Location",
+    "GENDER": "Gender",
+    "JOB_LEVEL": "Job_Level"
+}
 
+INTENT_SCHEMA = """
 Supported metrics:
 - headcount
 - attrition
 - salary
 - engagement
 - gender
+- retention
+- survival
+- median_tenure
 
 Supported dimensions:
+- MONTH
 - YEAR
 - DEPARTMENT
 - LOCATION
 - GENDER
+- JOB_LEVEL
 - NONE
 
 Supported chart types:
@@ -87,24 +143,57 @@ Supported chart types:
 - PIE
 - NONE
 
-Return ONLY valid JSON in this format:
+Each intent is a JSON object:
 
-{{
+{
   "metric": "...",
   "dimension": "...",
   "chart": "...",
   "confidence": 0.0
-}}
+}
 
 Confidence must be between 0 and 1.
 
 If not HR-related:
-{{
+{
   "metric": null,
   "dimension": null,
   "chart": "NONE",
   "confidence": 0.0
-}}
+}
+"""
+
+
+# ======================================================
+# STAGES / CANCELLATION
+# ======================================================
+class QueryCancelled(Exception):
+    """
+    A newer query superseded this one (raised between stages)
+    """
+
+
+def _stage(context, name):
+    """
+    Marks the current stage in `context` for callers polling from
+    another thread; stops here if context["cancel"] (Event) is set
+    """
+    cancel = context.get("cancel")
+    if cancel is not None and cancel.is_set():
+        raise QueryCancelled(name)
+    context["stage"] = name
+
+
+# ======================================================
+# INTENT CACHING
+# ======================================================
+@lru_cache(maxsize=100)
+def classify_intent_llm_cached(query: str):
+
+    prompt = f"""
+You are an HR analytics intent classifier.
+{INTENT_SCHEMA}
+Return ONLY one valid JSON intent object.
 
 Question:
 {query}
@@ -112,9 +201,7 @@ Question:
 
     try:
         response = call_llm(prompt, language="en")
-        response = response.strip()
-        response = response.replace("```json", "").replace("```", "")
-        parsed = json.loads(response)
+        parsed = parse_llm_json(response)
 
         logging.info(f"LLM intent: {parsed}")
 
@@ -125,10 +212,203 @@ Question:
         return None
 
 
+# ======================================================
+# TIME WINDOWS (served from the date index)
+# ======================================================
+def _time_index_or_none(df):
+    try:
+        return get_time_index(df)
+    except ValueError as e:
+        logging.info(f"Time windows unavailable: {e}")
+        return None
+
+
+def windowed_metric(time_index, metric, dimension, window, chart_type, wants_chart):
+    start, end = window["start"], window["end"]
+    column = DIMENSION_COLUMNS.get(dimension)
+
+    if metric == "headcount":
+        label = f"Headcount as of {end - pd.Timedelta(days=1):%Y-%m-%d}"
+        if dimension == "YEAR":
+            data = time_index.by_year("headcount", start, end)
+        elif column:
+            data = time_index.headcount_at(end, column)
+        else:
+            return pd.DataFrame({"Metric": [label], "Value": [time_index.headcount_at(end)]})
+        name = "Headcount"
+    else:
+        label = f"Attrition Rate (%) {window['label']}"
+        if dimension == "YEAR":
+            data = time_index.by_year("attrition", start, end)
+            name = "Exits"
+        elif column:
+            data = time_index.attrition_rate(start, end, column)
+            name = "Attrition Rate"
+        else:
+            return pd.DataFrame({"Metric": [label], "Value": [time_index.attrition_rate(start, end)]})
+
+    return build_chart(data, chart_type) if wants_chart else data.reset_index(name=name)
+
+
+def filtered_windowed_metric(df, time_index, metric, dimension, window, filters, chart_type, wants_chart):
+    """
+    Windowed headcount / attrition of a filtered population: one
+    comparison side per group, evaluated in one pass
+    """
+    start, end = window["start"], window["end"]
+    column = DIMENSION_COLUMNS.get(dimension)
+
+    if dimension == "YEAR":
+        sides = []
+        for year in range(start.year, (end - pd.Timedelta(days=1)).year + 1):
+            y_start = max(pd.Timestamp(year=year, month=1, day=1), start)
+            y_end = min(pd.Timestamp(year=year + 1, month=1, day=1), end)
+            sides.append({"label": year, "filters": filters, "window": {"start": y_start, "end": y_end}})
+    elif column:
+        values = sorted(df.loc[build_mask(df, filters), column].dropna().unique())
+        sides = [{"label": v, "filters": {**filters, column: [v]}, "window": window} for v in values]
+    else:
+        sides = [{"label": window["label"], "filters": filters, "window": window}]
+
+    data = compare(df, metric, sides, time_index)
+    name = "Headcount" if metric == "headcount" else "Attrition Rate"
+
+    if not column and dimension != "YEAR":
+        label = f"Headcount as of {end - pd.Timedelta(days=1):%Y-%m-%d}" if metric == "headcount" \
+            else f"Attrition Rate (%) {window['label']}"
+        return pd.DataFrame({"Metric": [label], "Value": [data.iloc[0]]})
+
+    data = data.rename_axis("Year" if dimension == "YEAR" else column)
+    if dimension != "YEAR":
+        data = data[data > 0].sort_values(ascending=False) if metric == "headcount" else data.sort_values(ascending=False)
+
+    return build_chart(data, chart_type) if wants_chart else data.reset_index(name=name)
+
+
+# ======================================================
+# TRENDS (served from the monthly snapshot store)
+# ======================================================
+SNAPSHOT_UNAVAILABLE = "⚠ Monthly trends need the snapshot store (pip install pyarrow)."
+
+
+def _snapshots_or_none(df):
+    try:
+        return get_snapshots(df)
+    except (ValueError, OSError) as e:
+        logging.info(f"Snapshots unavailable: {e}")
+        return None
+
+
+def snapshot_metric(df, request, metric, dimension, chart_type, wants_chart):
+    """
+    Monthly headcount / attrition, rolling attrition and (unwindowed)
+    yearly trends from the snapshots; None when the request is none of
+    these or the snapshots cannot answer it
+    """
+    rolling = request.get("rolling")
+    window = request["window"]
+
+    if metric == "attrition" and rolling:
+        kind = "rolling"
+    elif metric in ("headcount", "attrition") and dimension == "MONTH":
+        kind = "monthly"
+    elif metric in ("headcount", "attrition") and dimension == "YEAR" and window is None:
+        kind = "yearly"
+    else:
+        return None
+
+    store = _snapshots_or_none(df)
+    filters = request["filters"]
+    if store is None or any(col not in store.manifest["columns"] for col in filters):
+        # Yearly trends fall back to the row-level functions
+        return None if kind == "yearly" else SNAPSHOT_UNAVAILABLE
+
+    start, end = (window["start"], window["end"]) if window else (None, None)
+    column = DIMENSION_COLUMNS.get(dimension)
+
+    if kind == "yearly":
+        data = store.yearly(metric, filters)
+        name = "Headcount" if metric == "headcount" else "Exits"
+    elif kind == "rolling":
+        data = store.rolling_attrition(rolling, column, filters, start, end)
+        name = f"Rolling {rolling}M Attrition Rate (%)"
+    else:
+        data = store.monthly(metric, column, filters, start, end)
+        name = "Headcount" if metric == "headcount" else "Attrition Rate (%)"
+
+    if isinstance(data.index, pd.PeriodIndex):
+        data.index = data.index.astype(str)
+        data = data.rename_axis("Month")
+
+    if isinstance(data, pd.DataFrame):
+        # One column per dimension value: shown as a table
+        data.columns.name = None
+        return data.reset_index()
+
+    return build_chart(data, chart_type if chart_type != "NONE" else "LINE") if wants_chart else data.reset_index(name=name)
+
+
+# ======================================================
+# SURVIVAL (Kaplan–Meier on hire → exit durations)
+# ======================================================
+def survival_metric(df, metric, dimension, filters, chart_type, wants_chart, window=None):
+    """
+    Retention curves, median tenure and cohort retention (hire-year
+    cohorts unless another dimension is asked for; every breakdown is
+    the same Kaplan–Meier anniversary retention, so they compare)
+    """
+    try:
+        if metric == "survival":
+            if wants_chart:
+                return build_curves(kaplan_meier(df, dimension, filters), "Still Employed (%)")
+            return kaplan_meier(df, dimension, filters, steps_per_year=1).reset_index()
+
+        if metric == "retention":
+            dimension = "YEAR" if dimension in (None, "NONE") else dimension
+            data = cohort_retention(df, dimension, filters)
+            if window is not None and dimension == "YEAR":
+                last = (window["end"] - pd.Timedelta(days=1)).year
+                data = data[(data.index >= window["start"].year) & (data.index <= last)]
+            if wants_chart:
+                return build_curves(data.T, "Retained (%)")
+            return data.reset_index()
+
+        data = median_tenure(df, dimension, filters)
+    except ValueError as e:
+        logging.info(f"Survival analysis unavailable: {e}")
+        return f"⚠ {e}"
+
+    if not isinstance(data, pd.Series):
+        return pd.DataFrame({
+            "Metric": ["Median Tenure (Years)"],
+            "Value": [data if pd.notna(data) else "Not reached (over half still employed)"]
+        })
+
+    if data.isna().all():
+        return "Median tenure not reached in any group (over half of every group is still employed)."
+    if wants_chart:
+        return build_chart(data.dropna(), chart_type)
+    return data.astype(object).where(data.notna(), "Not reached").reset_index()
+
+
 # ======================================================
 # MAIN ROUTER
 # ======================================================
-def process_query(query: str, language: str = "en"):
+def process_query(query: str, language: str = "en", context: dict = None, session=None, tenant: str = None,
+                  role: str = None):
+    """
+    `context` (optional dict) receives the parsed request, the resolved
+    metric / dimension (e.g. for narrating the answer afterwards) and
+    the current stage; setting context["cancel"] (threading.Event)
+    abandons the query at the next stage boundary.
+    `session` (SessionContext) lets follow-ups ("now by location",
+    "as a pie chart") reuse the previous request without the LLM.
+    `tenant` selects the organization's dataset (default tenant if None);
+    `role` restricts it to the rows that role may see (HR_DEFAULT_ROLE
+    if None).
+    """
+    if context is None:
+        context = {}
 
     if not query or not query.strip():
         return "Please enter a valid HR analytics question."
@@ -139,8 +419,9 @@ def process_query(query: str, language: str = "en"):
     # TRANSLATION
     # ==================================================
     if language != "en":
+        _stage(context, "translating")
         try:
-            translated_query = call_llm(
+            text = call_llm(
                 f"""
 Translate the following HR analytics question into English.
 Return ONLY the translated sentence.
@@ -149,37 +430,75 @@ Question:
 {original_query}
 """,
                 language="en"
-            )
-            q = translated_query.lower().strip()
-            logging.info(f"Translated query: {q}")
+            ).strip()
+            logging.info(f"Translated query: {text}")
         except Exception as e:
             logging.error(f"Translation failed: {e}")
             return "⚠ Unable to process multilingual request."
     else:
-        q = original_query.lower().strip()
+        text = original_query
+
+    q = text.lower()
+
+    # ==================================================
+    # LOAD DATA (CACHED)
+    # ==================================================
+    _stage(context, "parsing")
+    load_error = False
+    try:
+        df = secure_dataset(get_cached_dataset(tenant), role, tenant)
+    except AccessError as e:
+        logging.warning(f"Access denied (role {role}): {e}")
+        return f"⛔ {e}"
+    except Exception as e:
+        logging.error(f"Dataset load failed: {e}")
+        df, load_error = None, True
+
+    # ==================================================
+    # PARSE ONCE (type, metric, dimension, filters, window, comparison, chart)
+    # ==================================================
+    request = parse_query(text, df if df is not None and not df.empty else None)
+    context["request"] = request
 
     # ==================================================
     # GREETING
     # ==================================================
-    if q in ["hi", "hello", "hey", "hola", "hallo"]:
+    if request["type"] == GREETING:
         return "👋 Hello! Ask me about headcount, attrition, salary, engagement, or diversity."
 
+    # ==================================================
+    # FOLLOW-UP (delta on the previous answer, no LLM)
+    # ==================================================
+    scope = dataset_scope(df) if df is not None else None
+    followup = session.resolve(request, scope) if session is not None and df is not None and not df.empty else None
+    if followup is not None:
+        _stage(context, "computing")
+        logging.info(f"Follow-up {followup['delta']} → {followup['metric']} / {followup['dimension']}")
+        context.update({"metric": followup["metric"], "dimension": followup["dimension"], "followup": followup["delta"]})
+
+        result = session.reuse(followup, scope)
+        if result is None:
+            result = cached_answer(df, followup, followup["metric"], followup["dimension"], followup["chart"], context)
+        session.remember({**followup, "dimension": context["dimension"]}, result, scope)
+        return result
+
+    # ==================================================
+    # DOMAIN CHECK (local classifier, LLM only when unsure)
+    # ==================================================
+    if classify_domain(q)["domain"] == "NON_HR":
+        return OUT_OF_DOMAIN_MESSAGE
+
     # ==================================================
     # DEFINITION
     # ==================================================
-    if any(k in q for k in ["what is", "define", "explain", "meaning"]):
+    if request["type"] == DEFINITION:
+        _stage(context, "explaining")
         return call_llm(
             f"Explain this HR concept clearly:\n\n{q}",
             language="en"
         )
 
-    # ==================================================
-    # LOAD DATA (CACHED)
-    # ==================================================
-    try:
-        df = get_cached_dataset()
-    except Exception as e:
-        logging.error(f"Dataset load failed: {e}")
+    if load_error:
         return "⚠ Unable to load HR data."
 
     if df is None or df.empty:
@@ -188,7 +507,9 @@ Question:
     # ==================================================
     # LLM INTENT CLASSIFICATION
     # ==================================================
+    _stage(context, "classifying")
     intent = classify_intent_llm_cached(q)
+    _stage(context, "computing")
 
     metric = None
     dimension = None
@@ -205,28 +526,29 @@ Question:
     # CONFIDENCE THRESHOLD
     # ==================================================
     if confidence < 0.6:
-        logging.info("Low confidence → fallback to rule-based NLU")
-        metric = extract_metric(q)
-        dimension = extract_dimension(q)
-        chart_type = extract_chart_type(q)
-
-    explicit_chart_keywords = ["chart", "plot", "graph", "bar", "line", "pie"]
-
-    wants_chart = any(k in q for k in explicit_chart_keywords)
+        logging.info("Low confidence → fallback to parsed request")
+        metric = request["metric"]
+        dimension = request["dimension"]
+        chart_type = request["chart"]
 
+    wants_chart = request["wants_chart"]
+    filters = request["filters"]
+    context.update({"metric": metric, "dimension": dimension})
 
     # ==================================================
     # MODEL METRICS
     # ==================================================
-    if any(k in q for k in ["auc", "precision", "recall"]):
+    if request["type"] == MODEL_METRICS:
         return load_ml_metrics()
 
     # ==================================================
     # PREDICTION
     # ==================================================
-    if any(k in q for k in ["predict", "risk"]):
-        pred_df = predict_attrition(df)
+    if request["type"] == PREDICTION:
+        owner = tenants.owner(df)
+        pred_df = predict_attrition(apply_filters(df, filters), model=owner.model() if owner else None)
         pred_df = add_risk_bucket(pred_df)
+        pred_df["Employee_ID"] = decode_employee_ids(df, pred_df["Employee_ID"])
 
         if wants_chart:
             return build_chart(
@@ -234,27 +556,191 @@ Question:
                 chart_type
             )
 
-        return pred_df.sort_values("Attrition_Risk", ascending=False)
+        return as_result(
+            pred_df.sort_values("Attrition_Risk", ascending=False),
+            title="Attrition risk", tenant=tenant, role=role
+        )
 
     # ==================================================
     # DOMAIN GUARD
     # ==================================================
     if not metric:
-        return (
-            "⚠ This assistant is limited to HR analytics.\n\n"
-            "Supported topics:\n"
-            "- Headcount\n"
-            "- Attrition\n"
-            "- Salary\n"
-            "- Engagement\n"
-            "- Workforce diversity"
-        )
+        return OUT_OF_DOMAIN_MESSAGE
+
+    result = cached_answer(df, request, metric, dimension, chart_type, context)
+    if session is not None:
+        session.remember({**request, "metric": metric, "dimension": context["dimension"], "chart": chart_type}, result, scope)
+    return result
 
-    col_map = {
-        "DEPARTMENT": "Department",
-        "LOCATION": "Location",
-        "GENDER": "Gender"
+
+# ======================================================
+# ANSWERS (no LLM; shared by new questions and follow-ups)
+# ======================================================
+# Frames outside the tenant registry (scripts); tenants keep their own
+_answers = {"df": None, "entries": OrderedDict()}
+_answers_lock = threading.Lock()
+
+
+def _answer_cache(df):
+    # One cache per role: switching roles never evicts another role's answers
+    tenant = tenants.owner(df)
+    if tenant is None:
+        return _answers
+    with _answers_lock:
+        return tenant.caches.setdefault(("answers", df.attrs.get("role")), {"df": df, "entries": OrderedDict()})
+
+
+def _answer_key(request, metric, dimension, chart_type):
+    window = request["window"]
+    comparison = request["comparison"]
+    return (
+        metric, dimension, request["dimension"], chart_type, request["wants_chart"],
+        tuple(sorted((col, tuple(map(str, vals))) for col, vals in request["filters"].items())),
+        (window["start"], window["end"]) if window else None,
+        request.get("rolling"),
+        tuple(side["label"] for side in comparison["sides"]) if comparison else None
+    )
+
+
+def clear_answer_cache():
+    with _answers_lock:
+        _answers["df"], _answers["entries"] = None, OrderedDict()
+    tenants.clear_caches("answers")
+
+
+def cached_answer(df, request, metric, dimension, chart_type, context):
+    """
+    answer_request, memoized per dataset object on the resolved request
+    (tables / figures only; result sets stay in the result store)
+    """
+    key = _answer_key(request, metric, dimension, chart_type)
+    answers = _answer_cache(df)
+
+    with _answers_lock:
+        if answers["df"] is not df:
+            answers["df"], answers["entries"] = df, OrderedDict()
+        entry = answers["entries"].get(key)
+        if entry is not None:
+            answers["entries"].move_to_end(key)
+
+    if entry is not None:
+        result, resolved_dimension = entry
+        context["dimension"] = resolved_dimension
+        return result.copy() if isinstance(result, pd.DataFrame) else result
+
+    result = answer_request(df, request, metric, dimension, chart_type, context)
+
+    if isinstance(result, (pd.DataFrame, Figure)):
+        with _answers_lock:
+            if answers["df"] is df:
+                answers["entries"][key] = (result.copy() if isinstance(result, pd.DataFrame) else result, context.get("dimension"))
+                while len(answers["entries"]) > ANSWER_CACHE_SIZE:
+                    answers["entries"].popitem(last=False)
+    return result
+
+
+def answer_spec(df, spec):
+    """
+    Structured spec {"metric", "dimension", "filters", "chart"} answered
+    like a parsed question (batch items the shared groupbys cannot serve)
+    """
+    metric = spec.get("metric")
+    if not metric:
+        return OUT_OF_DOMAIN_MESSAGE
+
+    chart = spec.get("chart") or "NONE"
+    request = {
+        "text": "", "type": METRIC, "metric": metric, "dimension": spec.get("dimension"),
+        "chart": chart, "wants_chart": chart != "NONE", "filters": spec.get("filters") or {},
+        "window": None, "comparison": None, "rolling": spec.get("rolling")
     }
+    return cached_answer(df, request, metric, request["dimension"], chart, {})
+
+
+def _not_available(metric, dimension):
+    return f"⚠ {metric.replace('_', ' ').capitalize()} is not available by {dimension.replace('_', ' ').lower()}."
+
+
+def answer_request(df, request, metric, dimension, chart_type, context):
+    """
+    Table / chart for a resolved request
+    """
+    wants_chart = request["wants_chart"]
+    filters = request["filters"]
+    col_map = DIMENSION_COLUMNS
+
+    # Layouts differ (no Job_Level in the enterprise one): say so up front
+    column = col_map.get(dimension)
+    if column is not None and column not in df.columns:
+        return f"⚠ This dataset has no {column} column."
+
+    # ==================================================
+    # COMPARISON ("Finance vs IT", "2023 vs 2024", N-way)
+    # ==================================================
+    if request["comparison"]:
+        unresolved = request["comparison"].get("unresolved")
+        if unresolved:
+            names = ", ".join(f"'{u}'" for u in unresolved)
+            return f"⚠ Could not tell what to compare: {names} names no department, location, level, gender or period."
+
+        result = compare(df, metric, request["comparison"]["sides"], _time_index_or_none(df))
+        if result is None:
+            return f"⚠ {metric.replace('_', ' ').capitalize()} cannot be compared side by side."
+        if wants_chart:
+            return build_chart(comparison_chart_series(result), chart_type)
+        return comparison_table(result)
+
+    # ==================================================
+    # TRENDS (monthly, rolling 12M, yearly from snapshots)
+    # ==================================================
+    trend = snapshot_metric(df, request, metric, dimension, chart_type, wants_chart)
+    if trend is not None:
+        return trend
+
+    # ==================================================
+    # SURVIVAL (retention curves, median tenure, cohorts by dimension)
+    # ==================================================
+    if metric in ("survival", "median_tenure", "retention"):
+        return survival_metric(df, metric, dimension, filters, chart_type, wants_chart, request["window"])
+
+    # ==================================================
+    # TIME WINDOW ("last year", "Q3 2024", "YTD", ranges)
+    # ==================================================
+    window = request["window"]
+    if window is not None:
+        time_index = _time_index_or_none(df)
+
+        if time_index is not None:
+            # "last year" names the window, not a YEAR breakdown:
+            # keep the parsed dimension ("attrition 2023 by department")
+            if dimension == "YEAR" and request["dimension"] != "YEAR":
+                dimension = request["dimension"]
+                context["dimension"] = dimension
+
+            if metric in ("headcount", "attrition"):
+                if filters:
+                    return filtered_windowed_metric(
+                        df, time_index, metric, dimension, window, filters, chart_type, wants_chart
+                    )
+                return windowed_metric(time_index, metric, dimension, window, chart_type, wants_chart)
+
+            # Other metrics: employees on payroll during the window
+            df = df.iloc[time_index.window_rows(window["start"], window["end"])]
+
+    # ==================================================
+    # FILTERS ("in Berlin", "for Sales", "level 3")
+    # Headcount / attrition take them directly (distinct-count sketches
+    # are merged per filter instead of rebuilt per subset)
+    # ==================================================
+    if metric in ("headcount", "attrition"):
+        where = filters
+    else:
+        df, where = apply_filters(df, filters), None
+
+    # Breakdowns without a master column (salary by month: the snapshots
+    # only hold counts) are refused instead of computed on None
+    if dimension not in (None, "NONE", "YEAR") and col_map.get(dimension) is None:
+        return _not_available(metric, dimension)
 
     # ==================================================
     # HEADCOUNT
@@ -264,14 +750,16 @@ Question:
         if not dimension or dimension == "NONE":
             return pd.DataFrame({
                 "Metric": ["Active Headcount"],
-                "Value": [active_headcount(df)]
+                "Value": [active_headcount(df, where)]
             })
 
         if dimension == "YEAR":
-            data = active_headcount_by_year(df)
+            data = active_headcount_by_year(df, where)
         else:
-            data = active_headcount_by(df, col_map.get(dimension))
+            data = active_headcount_by(df, col_map.get(dimension), where)
 
+        if data is None:
+            return _not_available(metric, dimension)
         return build_chart(data, chart_type) if wants_chart else data.reset_index(name="Headcount")
 
     # ==================================================
@@ -282,14 +770,16 @@ Question:
         if not dimension or dimension == "NONE":
             return pd.DataFrame({
                 "Metric": ["Attrition Rate (%)"],
-                "Value": [attrition_rate(df)]
+                "Value": [attrition_rate(df, where)]
             })
 
         if dimension == "YEAR":
-            data = attrition_by_year(df)
+            data = attrition_by_year(df, where)
         else:
-            data = attrition_rate_by(df, col_map.get(dimension))
+            data = attrition_rate_by(df, col_map.get(dimension), where)
 
+        if data is None:
+            return _not_available(metric, dimension)
         return build_chart(data, chart_type) if wants_chart else data.reset_index(name="Attrition Rate")
 
     # ==================================================
@@ -304,6 +794,8 @@ Question:
             })
 
         data = average_salary_by(df, col_map.get(dimension))
+        if data is None:
+            return _not_available(metric, dimension)
 
         return build_chart(data, chart_type) if wants_chart else data.reset_index(name="Average Salary")
 
@@ -319,6 +811,8 @@ Question:
             })
 
         data = engagement_by(df, col_map.get(dimension))
+        if data is None:
+            return _not_available(metric, dimension)
 
         return build_chart(data, chart_type) if wants_chart else data.reset_index(name="Engagement Score")
 
@@ -0,0 +1,341 @@
+# modules/batch_engine.py
+
+import json
+import logging
+
+import pandas as pd
+
+from config import DISTINCT_MODE
+from modules.analytics import (
+    dimension_summary,
+    active_headcount,
+    active_headcount_by_year,
+    attrition_rate,
+    attrition_by_year,
+    average_salary,
+    average_engagement,
+    gender_distribution
+)
+from modules.analytics_router import (
+    get_cached_dataset,
+    secure_dataset,
+    answer_spec,
+    process_query,
+    INTENT_SCHEMA
+)
+from modules.charts import build_chart
+from modules.filter_engine import apply_filters
+from modules.llm_engine import call_llm, parse_llm_json
+from modules.query_parser import parse_query, METRIC
+from modules.row_security import AccessError
+from modules.schema_registry import DIMENSIONS
+
+
+# ===============================
+# OUTPUT LABELS (same as router)
+# ===============================
+KPI_LABELS = {
+    "headcount": "Active Headcount",
+    "attrition": "Attrition Rate (%)",
+    "salary": "Average Salary",
+    "engagement": "Average Engagement Score"
+}
+
+VALUE_LABELS = {
+    "headcount": "Headcount",
+    "attrition": "Attrition Rate",
+    "salary": "Average Salary",
+    "engagement": "Engagement Score",
+    "gender": "Count"
+}
+
+
+# ======================================================
+# ONE LLM CALL PER BATCH
+# ======================================================
+def translate_batch(questions, language):
+    if language == "en" or not questions:
+        return questions
+
+    prompt = f"""
+Translate each of the following HR analytics questions into English.
+Return ONLY a JSON array of strings, same order, same length.
+
+Questions:
+{json.dumps(questions, ensure_ascii=False)}
+"""
+    try:
+        translated = parse_llm_json(call_llm(prompt, language="en"))
+        if isinstance(translated, list) and len(translated) == len(questions):
+            return [str(t) for t in translated]
+        logging.error("Batch translation returned a wrong-sized array")
+    except Exception as e:
+        logging.error(f"Batch translation failed: {e}")
+
+    return None
+
+
+def classify_batch(questions):
+    """
+    Returns one intent dict (or None) per question
+    """
+    if not questions:
+        return []
+
+    prompt = f"""
+You are an HR analytics intent classifier.
+{INTENT_SCHEMA}
+Return ONLY a JSON array with one intent object per question, same order.
+
+Questions:
+{json.dumps(questions, ensure_ascii=False)}
+"""
+    try:
+        intents = parse_llm_json(call_llm(prompt, language="en"))
+        if isinstance(intents, list) and len(intents) == len(questions):
+            return [i if isinstance(i, dict) else None for i in intents]
+        logging.error("Batch intent classification returned a wrong-sized array")
+    except Exception as e:
+        logging.error(f"Batch intent classification failed: {e}")
+
+    return [None] * len(questions)
+
+
+# Metrics the shared groupbys answer; retention / survival / tenure,
+# MONTH breakdowns and rolling rates go through the router
+SHARED_METRICS = ("headcount", "attrition", "salary", "engagement", "gender")
+
+
+def is_shared_spec(spec):
+    return (
+        spec.get("metric") in SHARED_METRICS
+        and spec.get("dimension") != "MONTH"
+        and not spec.get("rolling")
+    )
+
+
+def is_metric_question(request):
+    """
+    Questions the shared groupby may answer (the LLM intent can still
+    send them on); everything else (greetings, definitions, ML, time
+    windows, comparisons, trends, survival) goes through process_query
+    """
+    return (
+        request["type"] == METRIC
+        and request["window"] is None
+        and request["comparison"] is None
+        and (request["metric"] is None or is_shared_spec(request))
+    )
+
+
+def question_to_spec(request, intent):
+    metric, dimension, chart = None, None, "NONE"
+    confidence = 0.0
+
+    if intent:
+        metric = intent.get("metric")
+        dimension = intent.get("dimension")
+        chart = intent.get("chart") or "NONE"
+        confidence = intent.get("confidence", 0.0)
+
+    if confidence < 0.6:
+        metric = request["metric"]
+        dimension = request["dimension"]
+        chart = request["chart"]
+
+    return {
+        "metric": metric,
+        "dimension": dimension,
+        "filters": request["filters"] or None,
+        "chart": chart,
+        "wants_chart": request["wants_chart"]
+    }
+
+
+# ======================================================
+# SHARED AGGREGATION
+# ======================================================
+def _filter_key(filters):
+    if not filters:
+        return ()
+    return tuple(sorted(
+        (col, tuple(val) if isinstance(val, (list, tuple, set)) else (val,))
+        for col, val in filters.items()
+    ))
+
+
+def compute_specs(df, specs):
+    """
+    Groups specs by (filters, dimension) so every groupby runs once
+    and is shared by every metric that needs it.
+    """
+    frames = {}
+    aggregates = {}
+    results = []
+
+    for spec in specs:
+        metric = spec.get("metric")
+        dimension = spec.get("dimension") or "NONE"
+        fkey = _filter_key(spec.get("filters"))
+
+        if fkey not in frames:
+            frames[fkey] = apply_filters(df, spec.get("filters"))
+        sub = frames[fkey]
+
+        # Distinct counts: sketches need the full frame + raw filters;
+        # exact counts reuse the shared filtered frame
+        if DISTINCT_MODE == "approx":
+            count_args = (df, spec.get("filters"))
+        else:
+            count_args = (sub, None)
+
+        if metric == "gender":
+            key = (fkey, "GENDER_DISTRIBUTION")
+            if key not in aggregates:
+                aggregates[key] = gender_distribution(sub)
+            results.append(aggregates[key])
+            continue
+
+        if dimension == "NONE":
+            key = (fkey, "KPI", metric)
+            if key not in aggregates:
+                kpi = {
+                    "headcount": active_headcount,
+                    "attrition": attrition_rate,
+                    "salary": average_salary,
+                    "engagement": average_engagement
+                }.get(metric)
+                if metric in ("headcount", "attrition"):
+                    aggregates[key] = kpi(*count_args)
+                else:
+                    aggregates[key] = kpi(sub) if kpi else None
+            results.append(aggregates[key])
+            continue
+
+        if dimension == "YEAR" and metric in ("headcount", "attrition"):
+            key = (fkey, "YEAR", metric)
+            if key not in aggregates:
+                year_fn = active_headcount_by_year if metric == "headcount" else attrition_by_year
+                aggregates[key] = year_fn(*count_args)
+            results.append(aggregates[key])
+            continue
+
+        key = (fkey, dimension)
+        if key not in aggregates:
+            aggregates[key] = dimension_summary(sub, DIMENSIONS.get(dimension))
+
+        summary = aggregates[key]
+        label = VALUE_LABELS.get(metric)
+        if summary is None or label not in summary.columns:
+            results.append(None)
+            continue
+
+        data = summary[label]
+        if metric == "headcount":
+            data = data[data > 0]
+        results.append(data.sort_values(ascending=False))
+
+    logging.info(f"Batch: {len(specs)} specs → {len(aggregates)} shared aggregates")
+
+    return results
+
+
+def render_result(spec, data):
+    metric = spec.get("metric")
+
+    if data is None:
+        return None
+
+    if not isinstance(data, pd.Series):
+        return pd.DataFrame({
+            "Metric": [KPI_LABELS.get(metric, metric)],
+            "Value": [data]
+        })
+
+    if spec.get("wants_chart"):
+        return build_chart(data, spec.get("chart") or "NONE")
+
+    return data.reset_index(name=VALUE_LABELS.get(metric, "Value"))
+
+
+# ======================================================
+# BATCH ENTRY POINT
+# ======================================================
+def process_batch(items, language="en", tenant=None, role=None):
+    """
+    items: list of questions (str) and/or structured specs
+           {"metric", "dimension", "filters", "chart"}
+    Returns one answer per item, in order, from the rows of `tenant`'s
+    dataset that `role` may see.
+    """
+    results = [None] * len(items)
+
+    try:
+        df = secure_dataset(get_cached_dataset(tenant), role, tenant)
+    except AccessError as e:
+        logging.warning(f"Access denied (role {role}): {e}")
+        return [f"⛔ {e}"] * len(items)
+    except Exception as e:
+        logging.error(f"Dataset load failed: {e}")
+        return ["⚠ Unable to load HR data."] * len(items)
+
+    if df is None or df.empty:
+        return ["⚠ HR dataset empty."] * len(items)
+
+    # ---------------------------
+    # Questions → English (1 LLM call)
+    # ---------------------------
+    q_pos = [i for i, item in enumerate(items) if isinstance(item, str)]
+    questions = [items[i].strip() for i in q_pos]
+
+    translated = translate_batch(questions, language)
+    if translated is None:
+        for i in q_pos:
+            results[i] = "⚠ Unable to process multilingual request."
+        q_pos, translated = [], []
+
+    english = {i: t.strip() for i, t in zip(q_pos, translated)}
+    requests = {i: parse_query(english[i], df) for i in q_pos}
+
+    # ---------------------------
+    # Intents (1 LLM call)
+    # ---------------------------
+    metric_pos = [i for i in q_pos if english[i] and is_metric_question(requests[i])]
+    intents = classify_batch([requests[i]["text"] for i in metric_pos])
+
+    specs = {}
+    for i, intent in zip(metric_pos, intents):
+        specs[i] = question_to_spec(requests[i], intent)
+
+    for i, item in enumerate(items):
+        if isinstance(item, dict):
+            specs[i] = {
+                "metric": item.get("metric"),
+                "dimension": item.get("dimension"),
+                "filters": item.get("filters"),
+                "chart": item.get("chart") or "NONE",
+                "wants_chart": bool(item.get("chart")) and item.get("chart") != "NONE",
+                "rolling": item.get("rolling")
+            }
+
+    # ---------------------------
+    # Everything else → router
+    # ---------------------------
+    for i in q_pos:
+        if i not in specs or not is_shared_spec(specs[i]):
+            results[i] = process_query(english[i], "en", tenant=tenant, role=role)
+            specs.pop(i, None)
+
+    for i in [i for i in specs if not is_shared_spec(specs[i])]:
+        results[i] = answer_spec(df, specs.pop(i))
+
+    # ---------------------------
+    # Shared groupbys
+    # ---------------------------
+    order = sorted(specs)
+    computed = compute_specs(df, [specs[i] for i in order])
+
+    for i, data in zip(order, computed):
+        results[i] = render_result(specs[i], data)
+
+    return results
@@ -0,0 +1,261 @@
+# modules/bulk_loader.py
+#
+# Streams data/*.csv into a database in chunks and UPSERTS on the key
+# (Employee_ID), so re-runs update rows in place instead of drop + reload.
+# Tables left without that key by older loaders are rebuilt keyed first.
+#
+#   sqlite:///data/hr.db         (stdlib)
+#   duckdb:///data/hr.duckdb     (pip install duckdb)
+#   mysql+mysqlconnector://...   (SQLAlchemy)
+#   postgresql://...             (SQLAlchemy)
+
+import logging
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Indexes the analytics filter / group on
+INDEX_COLUMNS = [
+    "Status", "Department", "Location", "Gender",
+    "Job_Level", "Hire_Date", "Termination_Date", "Exit_Date"
+]
+
+
+# ==================================================
+# CONNECTIONS
+# ==================================================
+def connect(url):
+    """
+    Returns (dbapi_connection, dialect)
+    """
+    if url.startswith("sqlite:///"):
+        return sqlite3.connect(url[len("sqlite:///"):]), "sqlite"
+
+    if url.startswith("duckdb:///"):
+        if duckdb is None:
+            raise ImportError("duckdb is not installed (pip install duckdb)")
+        return duckdb.connect(url[len("duckdb:///"):]), "duckdb"
+
+    from sqlalchemy import create_engine
+
+    engine = create_engine(url)
+    dialect = "mysql" if engine.dialect.name in ("mysql", "mariadb") else engine.dialect.name
+    return engine.raw_connection(), dialect
+
+
+def _placeholder(dialect):
+    return "?" if dialect in ("sqlite", "duckdb") else "%s"
+
+
+def _quote(col, dialect):
+    return f"`{col}`" if dialect == "mysql" else f'"{col}"'
+
+
+# ==================================================
+# SCHEMA
+# ==================================================
+FLOAT_TYPES = {"mysql": "DOUBLE", "duckdb": "DOUBLE", "postgresql": "DOUBLE PRECISION"}
+
+
+def _sql_type(series, col, dialect, key):
+    if col.endswith("_Date"):
+        return "DATE"
+    if pd.api.types.is_integer_dtype(series):
+        return "BIGINT"
+    if pd.api.types.is_float_dtype(series):
+        return FLOAT_TYPES.get(dialect, "REAL")
+    if dialect == "mysql":
+        # MySQL cannot index unbounded TEXT
+        return "VARCHAR(64)" if col == key or col in INDEX_COLUMNS else "VARCHAR(255)"
+    return "TEXT"
+
+
+# Schema of the table a key constraint lives in, per dialect
+CURRENT_SCHEMA = {"mysql": "DATABASE()", "postgresql": "current_schema()", "duckdb": "current_schema()"}
+
+
+def _create_table(conn, dialect, table, chunk, key):
+    cols = ", ".join(
+        f"{_quote(c, dialect)} {_sql_type(chunk[c], c, dialect, key)}"
+        + (" PRIMARY KEY" if c == key else "")
+        for c in chunk.columns
+    )
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table, dialect)} ({cols})")
+    conn.commit()
+
+
+def has_key(conn, dialect, table, key):
+    """
+    True when `key` alone is the table's PRIMARY KEY / UNIQUE constraint,
+    i.e. what ON CONFLICT / ON DUPLICATE KEY match on
+    """
+    cursor = conn.cursor()
+
+    if dialect == "sqlite":
+        cursor.execute(f"PRAGMA table_info({_quote(table, dialect)})")
+        return [row[1] for row in cursor.fetchall() if row[5]] == [key]
+
+    ph = _placeholder(dialect)
+    cursor.execute(
+        "SELECT tc.constraint_name, k.column_name "
+        "FROM information_schema.table_constraints tc "
+        "JOIN information_schema.key_column_usage k "
+        "ON k.constraint_name = tc.constraint_name AND k.table_name = tc.table_name "
+        "AND k.table_schema = tc.table_schema "
+        f"WHERE tc.table_name = {ph} AND tc.constraint_type IN ('PRIMARY KEY', 'UNIQUE') "
+        f"AND tc.table_schema = {CURRENT_SCHEMA.get(dialect, 'current_schema()')}",
+        [table]
+    )
+    constraints = {}
+    for name, column in cursor.fetchall():
+        constraints.setdefault(name, []).append(column)
+    return [key] in constraints.values()
+
+
+def add_key(conn, dialect, table, chunk, key, batch_size=5_000):
+    """
+    Rebuilds a table that has no key on `key` (CREATE TABLE IF NOT EXISTS
+    kept it, so every upsert appended): existing rows are copied into a
+    keyed table with the incoming chunk's schema, last duplicate wins
+    """
+    q = lambda c: _quote(c, dialect)
+    keyed = f"{table}__keyed"
+    cursor = conn.cursor()
+
+    cursor.execute(f"SELECT * FROM {q(table)}")
+    existing = pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+    existing = existing.reindex(columns=chunk.columns)
+    existing = _clean_chunk(existing[existing[key].notna()], key)
+
+    cursor.execute(f"DROP TABLE IF EXISTS {q(keyed)}")
+    conn.commit()
+    _create_table(conn, dialect, keyed, chunk, key)
+    if len(existing):
+        write_chunk(conn, dialect, keyed, existing, key, batch_size)
+    conn.commit()
+
+    # The old table (and its indexes) goes only once the keyed copy is in
+    cursor.execute(f"DROP TABLE {q(table)}")
+    cursor.execute(f"ALTER TABLE {q(keyed)} RENAME TO {q(table)}")
+    conn.commit()
+    logging.warning(f"{table}: had no key on {key}, rebuilt with {len(existing)} distinct rows")
+
+
+def ensure_table(conn, dialect, table, chunk, key, batch_size=5_000):
+    _create_table(conn, dialect, table, chunk, key)
+    if not has_key(conn, dialect, table, key):
+        add_key(conn, dialect, table, chunk, key, batch_size)
+
+
+def ensure_indexes(conn, dialect, table, columns):
+    cursor = conn.cursor()
+    for col in columns:
+        if col not in INDEX_COLUMNS:
+            continue
+        name = f"ix_{table}_{col}"
+        exists = "" if dialect == "mysql" else "IF NOT EXISTS "
+        try:
+            cursor.execute(f"CREATE INDEX {exists}{name} ON {_quote(table, dialect)} ({_quote(col, dialect)})")
+        except Exception as e:
+            # MySQL has no IF NOT EXISTS for indexes: duplicate name = already there
+            logging.info(f"Index {name} skipped: {e}")
+    conn.commit()
+
+
+# ==================================================
+# UPSERT
+# ==================================================
+def upsert_sql(dialect, table, columns, key):
+    q = lambda c: _quote(c, dialect)
+    names = ", ".join(q(c) for c in columns)
+    values = ", ".join(_placeholder(dialect) for _ in columns)
+    updates = [c for c in columns if c != key]
+
+    sql = f"INSERT INTO {q(table)} ({names}) VALUES ({values})"
+
+    if dialect == "mysql":
+        return sql + " ON DUPLICATE KEY UPDATE " + ", ".join(f"{q(c)} = VALUES({q(c)})" for c in updates)
+
+    return sql + f" ON CONFLICT ({q(key)}) DO UPDATE SET " + ", ".join(f"{q(c)} = excluded.{q(c)}" for c in updates)
+
+
+def _clean_chunk(chunk, key):
+    chunk.columns = [c.strip() for c in chunk.columns]
+    chunk[key] = chunk[key].astype(str)
+
+    for col in [c for c in chunk.columns if c.endswith("_Date")]:
+        chunk[col] = pd.to_datetime(chunk[col], errors="coerce").dt.strftime("%Y-%m-%d")
+
+    # Last row wins inside a chunk, same as across chunks
+    return chunk.drop_duplicates(subset=[key], keep="last")
+
+
+def write_chunk(conn, dialect, table, chunk, key, batch_size):
+    if dialect == "duckdb":
+        # Vectorized path: the whole chunk in one INSERT ... SELECT
+        conn.register("_chunk", chunk)
+        columns = ", ".join(_quote(c, dialect) for c in chunk.columns)
+        updates = ", ".join(f"{_quote(c, dialect)} = excluded.{_quote(c, dialect)}" for c in chunk.columns if c != key)
+        conn.execute(
+            f"INSERT INTO {_quote(table, dialect)} ({columns}) SELECT {columns} FROM _chunk "
+            f"ON CONFLICT ({_quote(key, dialect)}) DO UPDATE SET {updates}"
+        )
+        conn.unregister("_chunk")
+        return
+
+    sql = upsert_sql(dialect, table, list(chunk.columns), key)
+    rows = chunk.astype(object).where(chunk.notna(), None).to_numpy().tolist()
+
+    cursor = conn.cursor()
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(sql, rows[start:start + batch_size])
+
+
+# ==================================================
+# LOADER
+# ==================================================
+def load_csv(path, url, table=None, key="Employee_ID", chunksize=50_000, batch_size=5_000):
+    """
+    Streams one CSV into `table` (default: file name), one transaction
+    per chunk. Returns a load report.
+    """
+    table = table or os.path.splitext(os.path.basename(path))[0]
+    conn, dialect = connect(url)
+
+    report = {"file": path, "table": table, "dialect": dialect, "rows": 0, "chunks": 0}
+    start = time.perf_counter()
+
+    try:
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            chunk = _clean_chunk(chunk, key)
+
+            if report["chunks"] == 0:
+                ensure_table(conn, dialect, table, chunk, key, batch_size)
+
+            t0 = time.perf_counter()
+            write_chunk(conn, dialect, table, chunk, key, batch_size)
+            conn.commit()
+
+            report["rows"] += len(chunk)
+            report["chunks"] += 1
+            logging.info(
+                f"{table}: chunk {report['chunks']} → {len(chunk)} rows "
+                f"({len(chunk) / max(time.perf_counter() - t0, 1e-9):,.0f} rows/s)"
+            )
+
+        if report["chunks"]:
+            ensure_indexes(conn, dialect, table, list(chunk.columns))
+    finally:
+        conn.close()
+
+    report["seconds"] = round(time.perf_counter() - start, 3)
+    report["rows_per_sec"] = round(report["rows"] / max(report["seconds"], 1e-9))
+    return report
@@ -1,5 +1,41 @@
-import plotly.express as px
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
+
+# Browser never receives more than this many marks per chart
+MAX_POINTS = 500
+# Bar / pie charts show the top categories, the rest become "Other"
+MAX_CATEGORIES = 30
+# Per-entity series (e.g. risk per employee) become a histogram
+HISTOGRAM_BINS = 20
+
+FIGURE_CACHE_SIZE = 256
+
+# Axes recognized by index name (dimension columns / trend indexes), not
+# dtype: time axes stay in order and are never cut to a top N; entity
+# keys (int32 surrogate IDs) carry one value per employee
+TIME_AXES = {
+    "Year", "Month", "Hire_Year", "Hire_Month", "Exit_Year", "Cohort",
+    "Years Since Hire", "Tenure (Years)"
+}
+ENTITY_KEYS = {"Employee_ID", "Manager_ID"}
+
+# Layout templates: built once, data swapped in per chart
+LAYOUTS = {
+    "BAR": go.Layout(margin={"t": 40}, bargap=0.2),
+    "LINE": go.Layout(margin={"t": 40}),
+    "PIE": go.Layout(margin={"t": 40})
+}
+
+_figure_cache = OrderedDict()
+_figure_keys = {}
+_figure_refs = {}
+_cache_lock = threading.Lock()
 
 
 # ==================================================
@@ -18,9 +54,188 @@ def render_table(data):
     return data
 
 
+# ==================================================
+# DOWNSAMPLING
+# ==================================================
+def _is_ordered_axis(index):
+    return (
+        pd.api.types.is_numeric_dtype(index)
+        or pd.api.types.is_datetime64_any_dtype(index)
+    )
+
+
+def axis_kind(index):
+    """
+    "time" | "entity" | "ordered" (other numeric axis, e.g. Age) | "category"
+    """
+    if index.name in ENTITY_KEYS:
+        return "entity"
+    if (
+        index.name in TIME_AXES
+        or pd.api.types.is_datetime64_any_dtype(index)
+        or isinstance(index, pd.PeriodIndex)
+    ):
+        return "time"
+    if index.name is None and _is_ordered_axis(index):
+        # Unnamed positional index: one value per row
+        return "entity"
+    return "ordered" if _is_ordered_axis(index) else "category"
+
+
+def reduce_series(series, chart_type):
+    """
+    Caps the number of plotted points.
+    Returns (series, note) — note explains any aggregation.
+    """
+    n = len(series)
+    values = pd.to_numeric(series, errors="coerce")
+    kind = axis_kind(series.index)
+
+    if n <= MAX_POINTS and (chart_type == "LINE" or kind == "time" or n <= MAX_CATEGORIES):
+        return series, None
+
+    # Ordered x axis (years, months, ages): equal-width buckets, mean per bucket
+    if kind in ("time", "ordered") and n > MAX_POINTS:
+        ordered = values.sort_index()
+        buckets = np.arange(n) * MAX_POINTS // n
+        reduced = ordered.groupby(buckets).mean()
+        reduced.index = ordered.index.to_numpy()[np.searchsorted(buckets, reduced.index)]
+        reduced.index.name = series.index.name
+        return reduced.rename(series.name), f"{n:,} points averaged into {len(reduced)} buckets"
+
+    # One value per entity (employee): show the distribution instead
+    if kind == "entity" or n > MAX_POINTS:
+        counts, edges = np.histogram(values.dropna(), bins=HISTOGRAM_BINS)
+        labels = [f"{lo:.2f}–{hi:.2f}" for lo, hi in zip(edges[:-1], edges[1:])]
+        hist = pd.Series(counts, index=pd.Index(labels, name=series.name or "Value"), name="Count")
+        return hist, f"Distribution of {n:,} values"
+
+    # Many categories: keep the largest, fold the tail into "Other"
+    top = values.sort_values(ascending=False)
+    head = top.iloc[:MAX_CATEGORIES]
+    if chart_type == "PIE":
+        head = pd.concat([head, pd.Series({"Other": top.iloc[MAX_CATEGORIES:].sum()})])
+        head.index.name = series.index.name
+    return head.rename(series.name), f"Top {MAX_CATEGORIES} of {n:,}"
+
+
+# ==================================================
+# FIGURE CACHE
+# ==================================================
+def _cache_key(series, chart_type):
+    # Row hashes in order: a reordered series is a different chart
+    digest = hashlib.sha1(pd.util.hash_pandas_object(series, index=True).to_numpy().tobytes()).hexdigest()
+    return (digest, len(series), str(series.name), str(series.index.name), chart_type)
+
+
+def _ref(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+
+
+def _cache_put(key, fig):
+    with _cache_lock:
+        _figure_cache[key] = [fig, None]
+        _figure_keys[id(fig)] = key
+        _figure_refs[_ref(key)] = key
+        while len(_figure_cache) > FIGURE_CACHE_SIZE:
+            old_key, (old, _) = _figure_cache.popitem(last=False)
+            _figure_keys.pop(id(old), None)
+            _figure_refs.pop(_ref(old_key), None)
+
+
+def figure_json(fig):
+    """
+    Serialized figure JSON, computed once per cached figure (for a
+    figure from build_chart: the chart as built; callers that restyle
+    their copy serialize it with fig.to_json())
+    """
+    with _cache_lock:
+        key = _figure_keys.get(id(fig))
+        entry = _figure_cache.get(key) if key else None
+        if entry and entry[1] is not None:
+            return entry[1]
+
+    payload = (entry[0] if entry else fig).to_json()
+
+    with _cache_lock:
+        if entry:
+            entry[1] = payload
+    return payload
+
+
+def figure_ref(fig):
+    """
+    Stable reference (data hash) of a figure built here, else None
+    """
+    with _cache_lock:
+        key = _figure_keys.get(id(fig))
+    return None if key is None else _ref(key)
+
+
+def _copy(fig, key):
+    """
+    Caller-owned copy of a cached figure; it keeps the cached figure's
+    key (figure_json / figure_ref) for as long as it lives
+    """
+    # Built here and validated once: the copy skips plotly's validation (~8x faster)
+    copy = go.Figure(fig.to_dict(), _validate=False)
+    with _cache_lock:
+        _figure_keys[id(copy)] = key
+    weakref.finalize(copy, _forget, id(copy), key)
+    return copy
+
+
+def _forget(fig_id, key):
+    with _cache_lock:
+        if _figure_keys.get(fig_id) == key:
+            del _figure_keys[fig_id]
+
+
+def cached_figure(ref):
+    """
+    Copy of the figure for a reference while it is still cached, else None
+    """
+    with _cache_lock:
+        key = _figure_refs.get(ref)
+        entry = _figure_cache.get(key)
+    return _copy(entry[0], key) if entry else None
+
+
+def clear_chart_cache():
+    with _cache_lock:
+        _figure_cache.clear()
+        _figure_keys.clear()
+        _figure_refs.clear()
+
+
 # ==================================================
 # CHART RENDERING
 # ==================================================
+def _make_figure(series, chart_type, note):
+    numeric_x = _is_ordered_axis(series.index) and axis_kind(series.index) != "entity"
+    x = [v if numeric_x else str(v) for v in series.index.tolist()]
+    y = series.tolist()
+    x_title = str(series.index.name or "")
+    y_title = str(series.name) if series.name is not None else "Value"
+
+    if chart_type == "LINE":
+        trace = go.Scatter(x=x, y=y, mode="lines+markers", name=y_title)
+    elif chart_type == "PIE":
+        trace = go.Pie(labels=x, values=y)
+    else:
+        trace = go.Bar(x=x, y=y, texttemplate="%{y}", textposition="auto", name=y_title)
+
+    fig = go.Figure(data=[trace], layout=LAYOUTS.get(chart_type, LAYOUTS["BAR"]))
+
+    if chart_type != "PIE":
+        fig.update_xaxes(title_text=x_title)
+        fig.update_yaxes(title_text=y_title)
+    if note:
+        fig.update_layout(title_text=note)
+
+    return fig
+
+
 def build_chart(data, chart_type):
     """
     Builds chart ONLY when explicitly requested
@@ -28,14 +243,62 @@ def build_chart(data, chart_type):
     if data is None or len(data) == 0:
         return None
 
-    df_plot = data.reset_index()
-    x_col, y_col = df_plot.columns
+    if isinstance(data, pd.DataFrame):
+        data = data.set_index(data.columns[0])[data.columns[1]]
 
-    if chart_type == "LINE":
-        return px.line(df_plot, x=x_col, y=y_col, markers=True)
+    chart_type = chart_type if chart_type in LAYOUTS else "BAR"
+
+    key = _cache_key(data, chart_type)
+    with _cache_lock:
+        entry = _figure_cache.get(key)
+        if entry:
+            _figure_cache.move_to_end(key)
+    if entry:
+        return _copy(entry[0], key)
+
+    series, note = reduce_series(data, chart_type)
+    fig = _make_figure(series, chart_type, note)
+
+    _cache_put(key, fig)
+    return _copy(fig, key)
+
+
+def build_curves(frame, y_title="Value"):
+    """
+    One step line per column (e.g. survival curve per department),
+    x = the frame's index
+    """
+    if frame is None or frame.empty:
+        return None
+
+    frame = frame.iloc[:, :MAX_CATEGORIES]
+    key = _cache_key(frame.stack().rename(y_title), "CURVES")
+    with _cache_lock:
+        entry = _figure_cache.get(key)
+        if entry:
+            _figure_cache.move_to_end(key)
+    if entry:
+        return _copy(entry[0], key)
+
+    note = None
+    if len(frame) > MAX_POINTS:
+        frame = frame.iloc[np.linspace(0, len(frame) - 1, MAX_POINTS).astype(int)]
+        note = f"Sampled at {MAX_POINTS} points"
+
+    fig = go.Figure(layout=LAYOUTS["LINE"])
+    x = frame.index.tolist()
+    for col in frame.columns:
+        fig.add_trace(go.Scatter(x=x, y=frame[col].tolist(), mode="lines", line_shape="hv", name=str(col)))
+
+    fig.update_xaxes(title_text=str(frame.index.name or ""))
+    fig.update_yaxes(title_text=y_title)
+    if note:
+        fig.update_layout(title_text=note)
+
+    _cache_put(key, fig)
+    return _copy(fig, key)
 
-    if chart_type == "PIE":
-        return px.pie(df_plot, names=x_col, values=y_col)
 
-    # Default BAR
-    return px.bar(df_plot, x=x_col, y=y_col, text_auto=True)
\ No newline at end of file
+def build_chart_json(data, chart_type):
+    fig = build_chart(data, chart_type)
+    return None if fig is None else figure_json(fig)
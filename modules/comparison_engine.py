@@ -0,0 +1,195 @@
+# modules/comparison_engine.py
+#
+# Evaluates "X vs Y (vs Z ...)" in ONE grouped pass: the rows of every
+# side are stacked with a side label and the metric is grouped by that
+# label once. Sides may overlap (IT vs Berlin) because rows are stacked,
+# not partitioned. Pure time comparisons (2023 vs 2024) are answered
+# from the date index without touching the rows.
+
+import numpy as np
+import pandas as pd
+
+from modules.filter_engine import build_mask
+from modules.metric_registry import HR_METRICS
+from modules.query_engine import compute_metric
+from modules.time_index import TERMINATION_COLUMNS
+
+SIDE = "Side"
+
+# Metrics with a point-in-time / in-window definition
+WINDOWED_METRICS = ["headcount", "attrition"]
+
+
+def _single_column_codes(df, sides):
+    """
+    Side code per row (-1 = no side) when every side filters the SAME
+    column on disjoint values: one lookup over the column codes
+    """
+    columns = {tuple(s["filters"]) for s in sides}
+    if len(columns) != 1 or len(next(iter(columns))) != 1:
+        return None
+
+    col = next(iter(columns))[0]
+    values = [v for s in sides for v in s["filters"][col]]
+    if len(set(values)) != len(values):
+        return None
+
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        row_codes, uniques = df[col].cat.codes.to_numpy(), df[col].cat.categories
+    else:
+        row_codes, uniques = pd.factorize(df[col])
+
+    lookup = np.full(len(uniques) + 1, -1, dtype=np.int32)
+    for i, side in enumerate(sides):
+        hits = uniques.get_indexer(side["filters"][col])
+        lookup[hits[hits >= 0]] = i
+
+    # NaN rows have code -1 → last lookup slot (-1)
+    return lookup[row_codes]
+
+
+def _stack(df, sides, time_index=None, windowed=False):
+    """
+    Row positions of every side + their side codes
+    """
+    has_windows = any(s["window"] for s in sides) and not windowed and time_index is not None
+    side_codes = None if has_windows else _single_column_codes(df, sides)
+    if side_codes is not None:
+        positions = np.flatnonzero(side_codes >= 0)
+        return positions, side_codes[positions]
+
+    positions, codes = [], []
+
+    for i, side in enumerate(sides):
+        mask = build_mask(df, side["filters"])
+        pos = np.flatnonzero(mask)
+
+        # Non-windowed metrics: employees on payroll during the window
+        if side["window"] is not None and not windowed and time_index is not None:
+            pos = np.intersect1d(pos, time_index.window_rows(side["window"]["start"], side["window"]["end"]))
+
+        positions.append(pos)
+        codes.append(np.full(len(pos), i, dtype=np.int32))
+
+    return np.concatenate(positions), np.concatenate(codes)
+
+
+def _window_bounds(sides, time_index):
+    full_end = time_index.as_of + pd.Timedelta(days=1)
+    starts = [s["window"]["start"] if s["window"] else pd.Timestamp.min.ceil("D") for s in sides]
+    ends = [s["window"]["end"] if s["window"] else full_end for s in sides]
+    return (
+        np.array(starts, dtype="datetime64[ns]"),
+        np.array(ends, dtype="datetime64[ns]")
+    )
+
+
+def _windowed_values(df, metric, sides, time_index):
+    """
+    Windowed headcount / attrition for every side in one vectorized pass
+    """
+    if not any(s["filters"] for s in sides):
+        # Windows only: O(log n) each from the date index
+        values = []
+        for side in sides:
+            window = side["window"] or {"start": pd.Timestamp.min.ceil("D"), "end": time_index.as_of + pd.Timedelta(days=1)}
+            if metric == "headcount":
+                values.append(time_index.headcount_at(window["end"]))
+            else:
+                values.append(time_index.attrition_rate(window["start"], window["end"]))
+        return np.array(values)
+
+    positions, codes = _stack(df, sides, windowed=True)
+    term_col = next(c for c in TERMINATION_COLUMNS if c in df.columns)
+
+    hire = pd.to_datetime(df["Hire_Date"].iloc[positions]).to_numpy("datetime64[ns]")
+    term = pd.to_datetime(df[term_col].iloc[positions]).to_numpy("datetime64[ns]")
+    # Same cleaning as the date index: exit before hire = exit on hire day
+    term = np.where(np.isnat(term) | np.isnat(hire), term, np.maximum(term, hire))
+    still_there = lambda t: np.isnat(term) | (term >= t)
+
+    starts, ends = _window_bounds(sides, time_index)
+    start, end = starts[codes], ends[codes]
+    hired = ~np.isnat(hire) & (hire < end)
+    n = len(sides)
+
+    if metric == "headcount":
+        return np.bincount(codes, weights=hired & still_there(end), minlength=n).astype(int)
+
+    exits = np.bincount(codes, weights=hired & ~np.isnat(term) & (term >= start) & (term < end), minlength=n)
+    population = np.bincount(codes, weights=hired & still_there(start), minlength=n)
+    return np.round(np.divide(exits * 100.0, population, out=np.zeros(n), where=population > 0), 2)
+
+
+def compare(df, metric, sides, time_index=None):
+    """
+    Series indexed by side label (distribution metrics: side × category)
+    """
+    if metric not in HR_METRICS:
+        return None
+
+    labels = [s["label"] for s in sides]
+    windowed = (
+        metric in WINDOWED_METRICS
+        and time_index is not None
+        and any(s["window"] for s in sides)
+    )
+
+    if windowed:
+        values = _windowed_values(df, metric, sides, time_index)
+        return pd.Series(values, index=pd.Index(labels, name=SIDE), name=metric)
+
+    positions, codes = _stack(df, sides, time_index)
+    cfg = HR_METRICS[metric]
+    columns = ["Employee_ID", cfg["column"]] + list(cfg.get("filter", {}))
+    if cfg["type"] == "ratio":
+        columns.append("Status")
+
+    frame = df[list(dict.fromkeys(columns))].iloc[positions]
+    frame[SIDE] = pd.Categorical.from_codes(codes, categories=pd.Index(range(len(sides))))
+
+    result = compute_metric(frame, metric, dimension=SIDE)
+
+    if cfg["type"] == "distribution":
+        return result.rename(index=dict(enumerate(labels)), level=0).rename(metric)
+
+    # Sides with no rows still get a row (0 / NaN), in the order asked
+    result = pd.Series(result.to_numpy(), index=result.index.astype(int)).reindex(range(len(sides)))
+    return pd.Series(result.to_numpy(), index=pd.Index(labels, name=SIDE), name=metric)
+
+
+# ==================================================
+# PRESENTATION
+# ==================================================
+def comparison_table(result):
+    """
+    Side-by-side values with deltas against the first side
+    """
+    if result.index.nlevels > 1:
+        table = result.unstack(level=0, fill_value=0)
+        first = table.columns[0]
+        for col in table.columns[1:]:
+            table[f"Δ {col} vs {first}"] = table[col] - table[first]
+        return table.reset_index()
+
+    values = result.to_numpy(dtype=float)
+    delta = values - values[0]
+
+    table = result.reset_index(name="Value")
+    table[f"Δ vs {result.index[0]}"] = delta.round(2)
+    table["Δ %"] = np.round(np.divide(
+        delta * 100, values[0], out=np.full(len(values), np.nan), where=values[0] != 0
+    ), 2)
+    return table
+
+
+def comparison_chart_series(result):
+    """
+    1-D series for the bar chart (side × category flattened)
+    """
+    if result.index.nlevels > 1:
+        flat = result.copy()
+        flat.index = [f"{side} · {cat}" for side, cat in result.index]
+        flat.index.name = SIDE
+        return flat
+    return result
@@ -1,14 +1,134 @@
 import re
+import threading
 
-def extract_comparison(query):
-    if " vs " not in query.lower():
-        return None
+from modules.time_extractor import extract_time_window
+
+# "X vs Y", "X vs Y vs Z", "X compared to Y", ...
+SEPARATOR = re.compile(r"\s+(?:vs\.?|versus|compared (?:to|with)|against)\s+")
+
+# Columns whose values can name a side
+COMPARE_COLUMNS = ["Department", "Location", "Job_Level", "Gender"]
+
+GENDER_WORDS = {"male": "M", "men": "M", "female": "F", "women": "F"}
+
+LABELS = {"Job_Level": "Level {}"}
+
+# Output words name the answer's shape, not a side: "2024 chart", "IT as a table"
+OUTPUT_WORDS = re.compile(
+    r"\s*\b(?:(?:as|in)\s+)?(?:an?\s+)?(?:(?:bar|line|pie)\s+)?(?:chart|table|graph|plot)s?\b"
+)
+
+
+# ==================================================
+# VOCABULARY (values present in the dataset)
+# ==================================================
+def vocabulary_phrases(df, columns=COMPARE_COLUMNS):
+    """
+    [(phrase, column, value)] for every value present in the dataset
+    """
+    entries = []
+
+    for col in columns:
+        if col not in df.columns:
+            continue
+
+        values = df[col].dropna().unique().tolist()
+
+        if col == "Job_Level":
+            for v in values:
+                entries.append((f"level {v}", col, v))
+                entries.append((f"l{v}", col, v))
+            continue
+
+        if col == "Gender":
+            for word, v in GENDER_WORDS.items():
+                if v in values:
+                    entries.append((word, col, v))
+            continue
+
+        for v in values:
+            entries.append((str(v).lower(), col, v))
+
+    return entries
+
+
+def build_vocabulary(df, columns=COMPARE_COLUMNS):
+    """
+    [(compiled pattern, column, value)], longest phrase first
+    """
+    entries = sorted(vocabulary_phrases(df, columns), key=lambda e: -len(e[0]))
+    return [(re.compile(r"\b" + re.escape(p) + r"\b"), col, v) for p, col, v in entries]
 
-    parts = query.split(" vs ")
-    if len(parts) != 2:
-        return None
+
+_cache = {"df": None, "vocabulary": None}
+_cache_lock = threading.Lock()
+
+
+def get_vocabulary(df):
+    with _cache_lock:
+        if _cache["df"] is df:
+            return _cache["vocabulary"]
+
+    vocabulary = build_vocabulary(df)
+
+    with _cache_lock:
+        _cache["df"] = df
+        _cache["vocabulary"] = vocabulary
+    return vocabulary
+
+
+# ==================================================
+# SIDE RESOLUTION
+# ==================================================
+def _resolve_side(text, vocabulary, as_of):
+    text = OUTPUT_WORDS.sub("", text)
+    filters = {}
+    remaining = text
+
+    for pattern, col, value in vocabulary:
+        if pattern.search(remaining):
+            filters.setdefault(col, []).append(value)
+            # Consumed: "new york" must not also match "york"
+            remaining = pattern.sub(" ", remaining)
+
+    window = extract_time_window(remaining, as_of=as_of)
+
+    parts = [
+        ", ".join(LABELS.get(col, "{}").format(v) for v in vals)
+        for col, vals in filters.items()
+    ]
+    if window:
+        parts.append(window["text"])
 
     return {
-        "left": parts[0].strip(),
-        "right": parts[1].strip()
+        "label": " · ".join(parts) or text.strip(),
+        "filters": filters,
+        "window": window
     }
+
+
+def extract_comparison(query, vocabulary=(), as_of=None):
+    """
+    Returns {"sides": [{"label", "filters", "window"}, ...]} for two or
+    more sides, else None. Sides naming no value or period are listed in
+    "unresolved" so the caller can refuse instead of answering unscoped.
+    """
+    parts = SEPARATOR.split(query.lower().strip())
+    if len(parts) < 2:
+        return None
+
+    sides = [_resolve_side(p, vocabulary, as_of) for p in parts]
+
+    unresolved = [s["label"] for s in sides if not s["filters"] and not s["window"]]
+    if unresolved:
+        return {"sides": sides, "unresolved": unresolved}
+
+    # "Finance vs IT in 2024": a window named on one side only applies to all
+    windows = [s["window"] for s in sides if s["window"]]
+    if len(windows) == 1 and all(s["filters"] for s in sides):
+        for side in sides:
+            if not side["window"]:
+                side["window"] = windows[0]
+                side["label"] += f" · {windows[0]['text']}"
+
+    return {"sides": sides}
@@ -0,0 +1,236 @@
+# modules/conversation_store.py
+#
+# Bounded chat history. The newest CHAT_WINDOW turns live in memory;
+# older turns spill to a local SQLite file. Turns hold artifacts by
+# reference, never by value:
+#   - charts      → figure reference (data hash), re-served from the
+#                   chart cache, else from its JSON stored once on disk
+#   - big tables  → result-set ID (paged from the result store)
+#   - small tables→ compact inline JSON
+# so a long session costs a fixed amount of memory and renders only
+# the turns on screen.
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from io import StringIO
+
+import pandas as pd
+import plotly.io as pio
+from plotly.graph_objs import Figure
+
+from config import CHAT_WINDOW, CHAT_DB_PATH, CHAT_INLINE_ROWS, CHAT_RETENTION_DAYS
+from modules.charts import figure_json, figure_ref, cached_figure
+from modules.result_store import ResultSet, get_result, register_result
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    content TEXT,
+    ref TEXT,
+    created REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    ref TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+"""
+
+COLUMNS = ["seq", "role", "kind", "content", "ref"]
+
+
+# ==================================================
+# SQLITE (one connection per file, shared by sessions)
+# ==================================================
+_connections = {}
+_db_lock = threading.Lock()
+
+
+def _connect(path):
+    with _db_lock:
+        if path not in _connections:
+            conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+            cutoff = time.time() - CHAT_RETENTION_DAYS * 86400
+            conn.execute("DELETE FROM messages WHERE created < ?", (cutoff,))
+            conn.execute("DELETE FROM artifacts WHERE created < ?", (cutoff,))
+            _connections[path] = conn
+        return _connections[path]
+
+
+# ==================================================
+# ARTIFACTS → COMPACT TURNS
+# ==================================================
+def to_turn(seq, role, content):
+    """
+    Message content (text / chart / table / result set / number) →
+    compact turn dict {seq, role, kind, content, ref}
+    """
+    turn = {"seq": seq, "role": role, "kind": "text", "content": None, "ref": None}
+
+    if isinstance(content, Figure):
+        turn["kind"] = "chart"
+        turn["ref"] = figure_ref(content)
+        if turn["ref"] is None:
+            # Not built by the chart module: keep the JSON itself
+            turn["content"] = content.to_json()
+
+    elif isinstance(content, ResultSet):
+        turn["kind"] = "result"
+        turn["ref"] = content.id
+
+    elif isinstance(content, pd.DataFrame):
+        if len(content) <= CHAT_INLINE_ROWS:
+            turn["kind"] = "table"
+            turn["content"] = content.to_json(orient="split", date_format="iso")
+        else:
+            turn["kind"] = "result"
+            turn["ref"] = register_result(content).id
+
+    elif isinstance(content, (int, float)):
+        turn["kind"] = "metric"
+        turn["content"] = json.dumps(content)
+
+    else:
+        turn["content"] = "" if content is None else str(content)
+
+    return turn
+
+
+class ConversationStore:
+
+    def __init__(self, session_id=None, window=CHAT_WINDOW, db_path=CHAT_DB_PATH):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.window = window
+        self.db_path = db_path
+        self.recent_turns = deque()
+        self.spilled = 0
+        self.next_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.spilled + len(self.recent_turns)
+
+    def _db(self):
+        return _connect(self.db_path)
+
+    # ---------------------------
+    # Write
+    # ---------------------------
+    def add(self, role, content):
+        with self._lock:
+            turn = to_turn(self.next_seq, role, content)
+            self.next_seq += 1
+            self.recent_turns.append(turn)
+
+            overflow = []
+            while len(self.recent_turns) > self.window:
+                overflow.append(self.recent_turns.popleft())
+
+        if turn["kind"] == "chart" and turn["ref"]:
+            self._save_artifact(turn["ref"], content)
+        if overflow:
+            self._spill(overflow)
+        return turn
+
+    def _save_artifact(self, ref, fig):
+        try:
+            self._db().execute(
+                "INSERT OR IGNORE INTO artifacts VALUES (?, ?, ?)",
+                (ref, figure_json(fig), time.time())
+            )
+        except sqlite3.Error as e:
+            logging.error(f"Chat artifact not saved: {e}")
+
+    def _spill(self, turns):
+        try:
+            self._db().executemany(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (self.session_id, t["seq"], t["role"], t["kind"], t["content"], t["ref"], time.time())
+                    for t in turns
+                ]
+            )
+            with self._lock:
+                self.spilled += len(turns)
+        except sqlite3.Error as e:
+            logging.error(f"Chat history spill failed: {e}")
+
+    # ---------------------------
+    # Read
+    # ---------------------------
+    def recent(self, n):
+        """
+        Last `n` turns, oldest first (older ones read back from SQLite)
+        """
+        with self._lock:
+            turns = list(self.recent_turns)[-n:] if n > 0 else []
+            missing = n - len(turns)
+            first_seq = turns[0]["seq"] if turns else self.next_seq
+
+        if missing > 0 and self.spilled:
+            rows = self._db().execute(
+                f"SELECT {', '.join(COLUMNS)} FROM messages "
+                "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?",
+                (self.session_id, first_seq, missing)
+            ).fetchall()
+            turns = [dict(zip(COLUMNS, row)) for row in reversed(rows)] + turns
+
+        return turns
+
+    def clear(self):
+        with self._lock:
+            self.recent_turns.clear()
+            self.spilled = 0
+        self._db().execute("DELETE FROM messages WHERE session_id = ?", (self.session_id,))
+
+    def stats(self):
+        return {
+            "turns": len(self),
+            "in_memory": len(self.recent_turns),
+            "spilled": self.spilled
+        }
+
+
+# ==================================================
+# TURN → RENDERABLE
+# ==================================================
+def resolve(turn, db_path=CHAT_DB_PATH):
+    """
+    Figure / ResultSet / DataFrame / number / text for a stored turn;
+    None when the referenced artifact is gone
+    """
+    kind = turn["kind"]
+
+    if kind == "chart":
+        if turn["content"]:
+            return pio.from_json(turn["content"])
+        fig = cached_figure(turn["ref"])
+        if fig is not None:
+            return fig
+        row = _connect(db_path).execute(
+            "SELECT payload FROM artifacts WHERE ref = ?", (turn["ref"],)
+        ).fetchone()
+        return pio.from_json(row[0]) if row else None
+
+    if kind == "result":
+        return get_result(turn["ref"])
+
+    if kind == "table":
+        return pd.read_json(StringIO(turn["content"]), orient="split")
+
+    if kind == "metric":
+        return json.loads(turn["content"])
+
+    return turn["content"]
@@ -0,0 +1,198 @@
+# modules/data_optimizer.py
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+# ==================================================
+# COLUMNS ANY ANALYTIC / ML FEATURE / DIMENSION READS
+# ==================================================
+ANALYTIC_COLUMNS = [
+    "Employee_ID", "Manager_ID",
+    "Gender", "Age", "Department", "Location", "Region",
+    "Job_Level", "Employment_Type", "Status",
+    "Salary", "Performance_Rating", "Engagement_Score",
+    "Last_Promotion_Year", "Experience_Years", "Tenure_Years", "Risk_Score",
+    "Hire_Date", "Hire_Year", "Hire_Month",
+    "Termination_Date", "Exit_Date", "Exit_Year", "Snapshot_Date"
+]
+
+# Strings with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+
+
+class SharedAttr:
+    """
+    df.attrs value handed as-is to every frame derived from df (pandas
+    deep-copies attrs on each one). It lives exactly as long as some
+    frame refers to it: nothing to evict, nothing to look up.
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"SharedAttr({type(self.value).__name__})"
+
+
+# ==================================================
+# EMPLOYEE SURROGATE KEY
+# ==================================================
+def encode_employee_ids(df):
+    """
+    Employee_ID → int32 key (Manager_ID mapped into the same key space).
+    Original labels stay reachable via df.attrs for display.
+    """
+    ids = df["Employee_ID"]
+
+    numeric = pd.to_numeric(ids, errors="coerce")
+    if numeric.notna().all() and (numeric == numeric.round()).all():
+        # Already numeric IDs (enterprise layout) are their own key
+        df["Employee_ID"] = pd.to_numeric(numeric.astype(np.int64), downcast="integer")
+        return df
+
+    # -1 = missing ID (quarantined by the quality checks)
+    labels = pd.Index(ids.dropna().astype(str).unique()).sort_values()
+    df["Employee_ID"] = labels.get_indexer(ids.astype(str)).astype(np.int32)
+
+    if "Manager_ID" in df.columns:
+        # -1 = manager not in this dataset (or missing)
+        df["Manager_ID"] = labels.get_indexer(df["Manager_ID"].astype(str)).astype(np.int32)
+
+    return register_employee_labels(df, labels)
+
+
+def _labels(df):
+    ref = df.attrs.get("employee_id_labels")
+    return None if ref is None else ref.value
+
+
+def employee_id_labels(df):
+    labels = _labels(df)
+    return None if labels is None else labels.tolist()
+
+
+def register_employee_labels(df, labels):
+    """
+    Attaches a label lookup (labels, or the SharedAttr of a lookup
+    attached before) to a frame rebuilt elsewhere (shared store, star
+    schema)
+    """
+    df.attrs["employee_id_labels"] = labels if isinstance(labels, SharedAttr) else SharedAttr(pd.Index(labels))
+    return df
+
+
+def employee_key(df, employee_id):
+    """
+    Original Employee_ID → the value stored in df (None if unknown)
+    """
+    labels = _labels(df)
+    if labels is not None:
+        pos = labels.get_indexer([str(employee_id)])[0]
+        return int(pos) if pos >= 0 else None
+
+    ids = df["Employee_ID"]
+    if pd.api.types.is_numeric_dtype(ids):
+        try:
+            return int(employee_id)
+        except (TypeError, ValueError):
+            return None
+    return str(employee_id)
+
+
+def decode_employee_ids(df, keys):
+    """
+    Surrogate keys → original Employee_ID strings (no-op if not encoded)
+    """
+    labels = _labels(df)
+    if labels is None:
+        return keys
+    codes = np.asarray(keys)
+    values = labels.take(np.maximum(codes, 0)).to_numpy(dtype=object)
+    values[codes < 0] = None
+    return pd.Series(values, index=getattr(keys, "index", None))
+
+
+# ==================================================
+# DTYPE OPTIMIZATION
+# ==================================================
+def _downcast(series):
+    if pd.api.types.is_bool_dtype(series):
+        return series
+
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast="integer")
+
+    if pd.api.types.is_float_dtype(series):
+        values = series.dropna()
+        # Only integral floats (years, scores) shrink — keeps means exact
+        if (values == values.round()).all() and values.abs().max() < 2 ** 24:
+            return series.astype(np.float32)
+
+    return series
+
+
+def optimize_dtypes(df):
+    """
+    Drops unused columns, categorizes low-cardinality strings,
+    downcasts numerics and re-keys Employee_ID.
+    """
+    df = df[[c for c in df.columns if c in ANALYTIC_COLUMNS]].copy()
+
+    if "Employee_ID" in df.columns:
+        df = encode_employee_ids(df)
+
+    for col in df.columns:
+        series = df[col]
+
+        if col in ("Employee_ID", "Manager_ID"):
+            continue
+
+        if pd.api.types.is_datetime64_any_dtype(series):
+            continue
+
+        if col.endswith("_Date"):
+            df[col] = pd.to_datetime(series, errors="coerce")
+            continue
+
+        if pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series):
+            if series.nunique() <= CATEGORY_MAX_RATIO * max(len(series), 1):
+                df[col] = series.astype("category")
+            continue
+
+        df[col] = _downcast(series)
+
+    return df
+
+
+# ==================================================
+# MEMORY REPORT
+# ==================================================
+def memory_report(before, after):
+    """
+    Per-column memory (MB) before vs after optimization
+    """
+    mb_before = before.memory_usage(deep=True, index=False) / 1e6
+    mb_after = after.memory_usage(deep=True, index=False) / 1e6
+
+    report = pd.DataFrame({
+        "Dtype_Before": before.dtypes.astype(str),
+        "Dtype_After": after.dtypes.reindex(before.columns).astype(str).replace("nan", "dropped"),
+        "MB_Before": mb_before.round(3),
+        "MB_After": mb_after.reindex(before.columns).fillna(0).round(3)
+    })
+    report.loc["TOTAL"] = ["", "", round(mb_before.sum(), 3), round(mb_after.sum(), 3)]
+
+    logging.info(
+        f"Master dataframe: {mb_before.sum():.1f} MB → {mb_after.sum():.1f} MB"
+    )
+    return report
@@ -0,0 +1,165 @@
+# modules/data_quality.py
+#
+# Load-time data quality pass over the canonical master frame. A
+# declarative rule list is evaluated as whole-column numpy checks ONCE
+# per loaded dataset (each load is a new version):
+#
+#   quarantine  row leaves the served dataset (kept for the report)
+#   impute      bad / missing value replaced by the column mean of the
+#               valid rows, so analytics and predict_attrition never
+#               fillna again (means are unchanged by mean imputation)
+#   flag        counted in the report only
+#
+# The report and quarantined rows travel with the served frame in
+# df.attrs["quality"] (a SharedAttr: every derived frame shares them and
+# they live as long as the dataset); the columns guaranteed NaN-free are
+# listed in df.attrs["imputed"].
+
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+from modules.data_optimizer import SharedAttr
+from modules.schema_mapper import STATUS_VALUES
+
+EXITED_VALUES = ["Resigned", "Terminated"]
+
+# ==================================================
+# RULES (skipped when a column is missing)
+# ==================================================
+RULES = [
+    {"name": "missing_employee_id", "check": "key", "column": "Employee_ID", "action": "quarantine"},
+    # One row per employee (per Snapshot_Date in monthly-snapshot extracts)
+    {"name": "duplicate_employee_id", "check": "unique", "column": "Employee_ID", "per": ["Snapshot_Date"],
+     "action": "quarantine"},
+    {"name": "missing_hire_date", "check": "not_null", "column": "Hire_Date", "action": "quarantine"},
+    {"name": "unknown_status", "check": "in", "column": "Status", "values": STATUS_VALUES, "action": "quarantine"},
+    {"name": "exit_before_hire", "check": "ordered", "columns": ["Hire_Date", "Termination_Date"], "action": "quarantine"},
+    {"name": "exited_without_exit_date", "check": "requires", "column": "Status", "values": EXITED_VALUES,
+     "requires": "Termination_Date", "action": "flag"},
+    {"name": "invalid_salary", "check": "range", "column": "Salary", "min": 1, "action": "impute"},
+    {"name": "invalid_age", "check": "range", "column": "Age", "min": 14, "max": 100, "action": "impute"},
+    {"name": "invalid_performance_rating", "check": "range", "column": "Performance_Rating", "min": 1, "max": 5, "action": "impute"},
+    {"name": "invalid_engagement_score", "check": "range", "column": "Engagement_Score", "min": 0, "max": 100, "action": "impute"},
+    {"name": "invalid_experience_years", "check": "range", "column": "Experience_Years", "min": 0, "max": 60, "action": "impute"}
+]
+
+
+def _columns(rule):
+    return rule.get("columns") or [rule["column"]] + ([rule["requires"]] if "requires" in rule else [])
+
+
+def violations(df, rule):
+    """
+    Bool array: rows breaking `rule`
+    """
+    check = rule["check"]
+    values = df[rule["column"]] if "column" in rule else None
+
+    if check == "not_null":
+        return values.isna().to_numpy()
+
+    if check == "key":
+        # Missing, or -1 once encoded as a surrogate key
+        missing = values.isna()
+        if pd.api.types.is_numeric_dtype(values):
+            missing |= values < 0
+        return missing.to_numpy()
+
+    if check == "unique":
+        # Later copies of an ID (within the same "per" values) are the
+        # violations; the first one stays
+        present = ~violations(df, {**rule, "check": "key"})
+        per = [c for c in rule.get("per", []) if c in df.columns]
+        duplicated = df.duplicated([rule["column"]] + per) if per else values.duplicated(keep="first")
+        return duplicated.to_numpy() & present
+
+    if check == "in":
+        return (~values.isin(rule["values"]) & values.notna()).to_numpy()
+
+    if check == "range":
+        numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+        bad = np.isnan(numbers)
+        if "min" in rule:
+            bad |= numbers < rule["min"]
+        if "max" in rule:
+            bad |= numbers > rule["max"]
+        return bad
+
+    if check == "ordered":
+        first, second = (df[c].to_numpy(dtype="datetime64[ns]") for c in rule["columns"])
+        return second < first
+
+    if check == "requires":
+        return (values.isin(rule["values"]) & df[rule["requires"]].isna()).to_numpy()
+
+    raise ValueError(f"Unknown quality check: {check}")
+
+
+def validate(df, rules=RULES):
+    """
+    Runs the rules once; returns the served frame (quarantined rows
+    removed, imputed columns filled) with its report attached. Rules
+    listed in the layout's "skip_rules" are not run.
+    """
+    started = time.perf_counter()
+    skip = set(df.attrs.get("skip_rules", []))
+    rules = [r for r in rules if r["name"] not in skip and all(c in df.columns for c in _columns(r))]
+
+    quarantine = np.zeros(len(df), dtype=bool)
+    results, impute = [], {}
+    for rule in rules:
+        bad = violations(df, rule)
+        results.append({"rule": rule["name"], "action": rule["action"], "rows": int(bad.sum())})
+        if rule["action"] == "quarantine":
+            quarantine |= bad
+        elif rule["action"] == "impute":
+            impute[rule["column"]] = impute.get(rule["column"], False) | bad
+
+    quarantined = df[quarantine] if quarantine.any() else df.iloc[:0]
+    if quarantine.any():
+        df = df[~quarantine].reset_index(drop=True)
+
+    # Fill values computed from the valid rows of the served frame
+    imputed = {}
+    for col, bad in impute.items():
+        bad = bad[~quarantine]
+        numbers = pd.to_numeric(df[col], errors="coerce")
+        fill = float(numbers[~bad].mean()) if (~bad).any() else 0.0
+        if bad.any():
+            df[col] = numbers.mask(bad, fill)
+        imputed[col] = {"rows": int(bad.sum()), "value": round(fill, 4)}
+
+    report = {
+        "rows": len(df) + len(quarantined),
+        "valid_rows": len(df),
+        "quarantined": len(quarantined),
+        "rules": results,
+        "imputed": imputed,
+        "ms": round((time.perf_counter() - started) * 1000, 1)
+    }
+
+    df.attrs["quality"] = SharedAttr((report, quarantined))
+    df.attrs["imputed"] = sorted(imputed)
+
+    failed = {r["rule"]: r["rows"] for r in results if r["rows"]}
+    logging.info(
+        f"Quality: {len(quarantined)} of {report['rows']} rows quarantined, "
+        f"{sum(v['rows'] for v in imputed.values())} values imputed {failed} ({report['ms']:.0f} ms)"
+    )
+    return df
+
+
+def quality_report(df):
+    """
+    Report of the load that produced df (None if it was not validated)
+    """
+    entry = df.attrs.get("quality")
+    return None if entry is None else entry.value[0]
+
+
+def quarantined_rows(df):
+    entry = df.attrs.get("quality")
+    return None if entry is None else entry.value[1]
@@ -0,0 +1,203 @@
+# modules/distinct_sketch.py
+#
+# Approximate distinct counts (HyperLogLog) for Employee_ID at scale.
+# IDs are hashed ONCE per dataset; per combination of grouping values
+# (e.g. Department × Status) a register row of 2^p uint8 cells keeps
+# the max rank seen. Any union of groups (filters, year ranges, a
+# dimension breakdown) is then a register-wise max over a handful of
+# rows, never a rescan of the IDs. Relative standard error is
+# 1.04 / sqrt(2^p); `precision_for(error)` picks p from a target.
+
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import SKETCH_ERROR
+from modules.filter_engine import build_mask
+
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+# Grouping with more combinations than this is left to the exact path
+MAX_GROUPS = 4096
+SKETCH_CACHE_SIZE = 4
+
+
+def precision_for(error):
+    """
+    Smallest p whose standard error 1.04 / sqrt(2^p) is <= error
+    """
+    p = math.ceil(math.log2((1.04 / error) ** 2))
+    return min(max(p, MIN_PRECISION), MAX_PRECISION)
+
+
+def _bit_length(x):
+    """
+    Vectorized int.bit_length for uint64
+    """
+    x = x.copy()
+    n = np.zeros(len(x), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        big = x >= np.uint64(1 << shift)
+        x[big] >>= np.uint64(shift)
+        n[big] += shift
+    n += (x > 0).astype(np.uint8)
+    return n
+
+
+def estimate(registers):
+    """
+    HLL estimate per register row (1-D → float, 2-D → array),
+    with linear counting for small cardinalities
+    """
+    regs = np.atleast_2d(registers)
+    m = regs.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+
+    raw = alpha * m * m / np.exp2(-regs.astype(np.float64)).sum(axis=1)
+    zeros = (regs == 0).sum(axis=1)
+
+    small = (raw <= 2.5 * m) & (zeros > 0)
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    result = np.where(small, linear, raw)
+
+    return float(result[0]) if np.ndim(registers) == 1 else result
+
+
+class DistinctSketches:
+
+    def __init__(self, df, id_column="Employee_ID", error=SKETCH_ERROR):
+        self.df = df
+        self.precision = precision_for(error)
+        self.error = 1.04 / math.sqrt(1 << self.precision)
+
+        p = self.precision
+        hashes = pd.util.hash_pandas_object(df[id_column], index=False).to_numpy(np.uint64)
+        self.bucket = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        self.rank = (64 - p) - _bit_length(rest) + 1
+
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Register rows per value combination
+    # ---------------------------
+    def _sketches(self, columns):
+        """
+        (combinations frame, registers[len(combinations), 2^p]) or None
+        when the grouping is too fine to sketch
+        """
+        with self._lock:
+            if columns in self._groups:
+                return self._groups[columns]
+
+        m = 1 << self.precision
+
+        if columns:
+            codes, uniques = [], []
+            for col in columns:
+                c, u = pd.factorize(self.df[col], use_na_sentinel=False)
+                codes.append(c)
+                uniques.append(u)
+            first_row, row_group = np.unique(
+                np.ravel_multi_index(codes, [len(u) for u in uniques]),
+                return_inverse=True, return_index=True
+            )[1:]
+            n_groups = len(first_row)
+            combos = pd.DataFrame({
+                col: np.asarray(u)[c[first_row]]
+                for col, c, u in zip(columns, codes, uniques)
+            })
+        else:
+            n_groups, combos = 1, pd.DataFrame(index=[0])
+            row_group = np.zeros(len(self.bucket), dtype=np.int64)
+
+        if n_groups > MAX_GROUPS:
+            result = None
+        else:
+            registers = np.zeros(n_groups * m, dtype=np.uint8)
+            np.maximum.at(registers, row_group * m + self.bucket, self.rank)
+            result = (combos, registers.reshape(n_groups, m))
+
+        with self._lock:
+            self._groups[columns] = result
+        return result
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def distinct(self, filters=None, by=None, where=None, columns=()):
+        """
+        Approximate distinct IDs matching `filters` ({column: values}),
+        optionally restricted by `where(combinations) → bool mask` over
+        extra `columns`; per value of `by` when given (Series), else a
+        number. None when the grouping cannot be sketched.
+        """
+        cols = tuple(dict.fromkeys(([by] if by else []) + list(filters or {}) + list(columns)))
+        sketches = self._sketches(cols)
+        if sketches is None:
+            return None
+
+        combos, registers = sketches
+        mask = build_mask(combos, filters) if filters else np.ones(len(combos), dtype=bool)
+        if where is not None:
+            mask &= np.asarray(where(combos), dtype=bool)
+
+        if by is None:
+            return round(estimate(registers[mask].max(axis=0, initial=0)))
+
+        keys = combos.loc[mask, by]
+        if keys.empty:
+            return pd.Series(dtype="int64", name=by)
+        codes, labels = pd.factorize(keys, sort=True)
+        order = np.argsort(codes, kind="stable")
+        starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+        merged = np.maximum.reduceat(registers[mask][order], starts, axis=0)
+
+        return pd.Series(
+            np.round(estimate(merged)).astype(np.int64),
+            index=pd.Index(labels, name=by)
+        )
+
+
+# ==================================================
+# CACHE (one set of sketches per dataset object)
+# ==================================================
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_sketches(df, error=SKETCH_ERROR):
+    key = (id(df), error)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry.df is df:
+            _cache.move_to_end(key)
+            return entry
+
+    sketches = DistinctSketches(df, error=error)
+
+    with _cache_lock:
+        _cache[key] = sketches
+        while len(_cache) > SKETCH_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return sketches
+
+
+def distinct_count(df, filters=None, by=None, exact=False, error=SKETCH_ERROR):
+    """
+    Distinct Employee_IDs (per `by`): exact nunique, or a sketch merge
+    """
+    if not exact:
+        result = get_sketches(df, error).distinct(filters, by)
+        if result is not None:
+            return result
+
+    sub = df[build_mask(df, filters)] if filters else df
+    if by is None:
+        return int(sub["Employee_ID"].nunique())
+    return sub.groupby(by, observed=True)["Employee_ID"].nunique()
@@ -1,15 +1,196 @@
-from modules.llm_engine import call_llm
-import json
+# modules/domain_guard.py
+#
+# HR vs non-HR in microseconds, without an LLM round trip.
+# A keyword-weighted scorer (HR vocabulary from question_pool / nlu,
+# plus a negative vocabulary) feeds a logistic calibration fitted at
+# import on a small labelled corpus. Only queries whose confidence
+# falls inside the uncertainty band are deferred to the LLM.
 
+import logging
+import re
+import threading
+from collections import Counter
 
-def classify_domain(query):
+import numpy as np
+
+from config import DOMAIN_BAND_LOW, DOMAIN_BAND_HIGH
+from modules.llm_engine import call_llm, parse_llm_json
+from modules.nlu import metric_keywords, dimension_keywords
+from modules.question_pool import HR_CONCEPTS, ML_TRIGGERS, METRIC_TRIGGERS, EXPLANATION_TRIGGERS
+
+# ==================================================
+# VOCABULARY → WEIGHTS
+# ==================================================
+# Output / time words say little about the domain on their own
+WEAK_TERMS = [
+    "table", "chart", "graph", "excel", "csv", "trend", "over time",
+    "by year", "by month", "year", "years", "annual", "annually", "per year"
+]
+
+NON_HR_TERMS = [
+    # Weather / news / politics
+    "weather", "temperature", "forecast", "rain", "snow", "news",
+    "election", "president", "prime minister", "politics", "war",
+    # Sports / entertainment
+    "football", "soccer", "cricket", "nba", "match", "score of the game",
+    "movie", "film", "song", "music", "lyrics", "netflix", "celebrity",
+    # Markets
+    "bitcoin", "crypto", "stock price", "share price", "stock market", "exchange rate",
+    # General knowledge / chit-chat
+    "capital of", "population of", "recipe", "cook", "restaurant",
+    "joke", "poem", "horoscope", "planet", "translate",
+    # Travel
+    "flight", "hotel", "travel", "tourist", "visa",
+    # Generic coding
+    "javascript", "python code", "write code", "compile", "regex"
+]
+
+
+def _weights():
+    weights = {}
+
+    def add(terms, weight):
+        for term in terms:
+            term = term.lower()
+            if weight < 0:
+                weights[term] = weight
+            elif weights.get(term, 0) >= 0:
+                weights[term] = max(weights.get(term, 0), weight)
+
+    add(EXPLANATION_TRIGGERS, 0.5)
+    add([w for words in dimension_keywords.values() for w in words], 1.0)
+    add(METRIC_TRIGGERS, 1.5)
+    add([w for words in metric_keywords.values() for w in words], 1.5)
+    add(HR_CONCEPTS, 2.0)
+    add(ML_TRIGGERS, 2.0)
+    add(["hr", "employee", "employees", "workforce", "people analytics", "manager", "payroll"], 2.0)
+
+    for term in WEAK_TERMS:
+        weights[term] = 0.3
+
+    add(NON_HR_TERMS, -2.5)
+    return weights
+
+
+WEIGHTS = _weights()
+
+# One alternation, longest phrase first; optional plural "s"
+_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(t) for t in sorted(WEIGHTS, key=len, reverse=True)) + r")s?\b"
+)
+
+
+def score(query):
     """
-    LLM-based domain classifier.
-    Returns:
-    {
-        "domain": "HR" | "NON_HR",
-        "confidence": 0-1
-    }
+    Sum of the weights of the distinct vocabulary terms in the query
+    (None = no vocabulary term at all)
+    """
+    terms = set(_PATTERN.findall(query.lower()))
+    return sum(WEIGHTS[t] for t in terms) if terms else None
+
+
+# ==================================================
+# CALIBRATION (logistic fit on score)
+# ==================================================
+POSITIVE_CORPUS = [
+    "show headcount by department", "total headcount", "headcount by year",
+    "give attrition rate by department", "attrition by location",
+    "attrition trend by year as a line chart", "average salary by department bar chart",
+    "show salary comparison by region", "engagement score by location",
+    "gender diversity pie chart", "explain attrition rate", "predict attrition risk",
+    "which employees are likely to leave", "how many people left last year",
+    "what is voluntary attrition", "retention of new joiners", "promotion rate by job level",
+    "pay gap between male and female", "time to hire by team", "who joined in march",
+    "staff turnover in berlin", "compensation of the it team", "workforce trend over time",
+    "average tenure of employees", "high risk employees in sales", "performance rating by manager"
+]
+
+NEGATIVE_CORPUS = [
+    "what's the weather in berlin", "will it rain tomorrow", "latest news today",
+    "who won the football match", "nba scores", "recommend a good movie",
+    "lyrics of my favourite song", "bitcoin price now", "stock market forecast",
+    "who is the president of france", "capital of australia", "population of tokyo",
+    "give me a pasta recipe", "tell me a joke", "write a poem about the sea",
+    "cheap flights to rome", "best hotel in paris", "translate this to spanish",
+    "write javascript for a button", "what is the distance to the moon",
+    "football transfer news", "hotel prices for the conference"
+]
+
+# L2 penalty keeps the fit finite (the corpora are separable)
+_L2 = 1.0
+
+
+def fit_calibration(positive=POSITIVE_CORPUS, negative=NEGATIVE_CORPUS, iterations=25):
+    """
+    (slope, intercept) of P(HR) = sigmoid(slope * score + intercept)
+    by Newton's method on the labelled corpus
+    """
+    samples = [(score(q), 1.0) for q in positive] + [(score(q), 0.0) for q in negative]
+    samples = [(s, label) for s, label in samples if s is not None]
+    x = np.array([s for s, _ in samples])
+    y = np.array([label for _, label in samples])
+    X = np.column_stack([x, np.ones_like(x)])
+    w = np.zeros(2)
+    penalty = np.diag([_L2, 0.0])
+
+    for _ in range(iterations):
+        p = 1 / (1 + np.exp(-X @ w))
+        gradient = X.T @ (p - y) + penalty @ w
+        hessian = (X.T * (p * (1 - p))) @ X + penalty
+        w -= np.linalg.solve(hessian, gradient)
+
+    return float(w[0]), float(w[1])
+
+
+SLOPE, INTERCEPT = fit_calibration()
+
+
+def confidence_hr(query):
+    """
+    Calibrated P(HR); 0.5 when the query has no known term (no evidence)
+    """
+    s = score(query)
+    if s is None:
+        return 0.5
+    return float(1 / (1 + np.exp(-(SLOPE * s + INTERCEPT))))
+
+
+# ==================================================
+# COUNTERS
+# ==================================================
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def domain_stats():
+    """
+    Decisions so far and how many needed the LLM
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    total = sum(stats.get(k, 0) for k in ("local_hr", "local_non_hr", "llm_deferred"))
+    stats["total"] = total
+    stats["llm_rate"] = round(stats.get("llm_deferred", 0) / total, 4) if total else 0.0
+    return stats
+
+
+def reset_domain_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+# ==================================================
+# CLASSIFIER
+# ==================================================
+def classify_domain_llm(query):
+    """
+    LLM-based domain classifier (uncertain band only).
     """
 
     prompt = f"""
@@ -41,14 +222,39 @@ User query:
 """
 
     try:
-        response = call_llm(prompt, language="en")
-        result = json.loads(response)
+        result = parse_llm_json(call_llm(prompt, language="en"))
 
-        if "domain" not in result:
+        if result.get("domain") not in ("HR", "NON_HR"):
+            _count("llm_failed")
             return {"domain": "HR", "confidence": 0.5}  # SAFE DEFAULT
 
-        return result
+        return {"domain": result["domain"], "confidence": float(result.get("confidence", 0.5))}
 
-    except Exception:
+    except Exception as e:
         # Fail-open for HR analytics (industry practice)
+        logging.info(f"Domain LLM fallback failed: {e}")
+        _count("llm_failed")
         return {"domain": "HR", "confidence": 0.4}
+
+
+def classify_domain(query, use_llm=True):
+    """
+    Returns:
+    {
+        "domain": "HR" | "NON_HR",
+        "confidence": 0-1,
+        "source": "local" | "llm"
+    }
+    """
+    p = confidence_hr(query)
+
+    if use_llm and DOMAIN_BAND_LOW <= p <= DOMAIN_BAND_HIGH:
+        _count("llm_deferred")
+        return {**classify_domain_llm(query), "source": "llm"}
+
+    if p >= 0.5:
+        _count("local_hr")
+        return {"domain": "HR", "confidence": round(p, 4), "source": "local"}
+
+    _count("local_non_hr")
+    return {"domain": "NON_HR", "confidence": round(1 - p, 4), "source": "local"}
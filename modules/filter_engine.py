@@ -0,0 +1,28 @@
+# modules/filter_engine.py
+
+import numpy as np
+
+
+# ==================================================
+# FILTERS
+# ==================================================
+def build_mask(df, filters):
+    """
+    Combines {column: value | [values]} filters into ONE boolean mask
+    """
+    mask = np.ones(len(df), dtype=bool)
+
+    for column, value in (filters or {}).items():
+        if column not in df.columns:
+            raise ValueError(f"Unknown filter column: {column}")
+
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        mask &= df[column].isin(list(values)).to_numpy()
+
+    return mask
+
+
+def apply_filters(df, filters):
+    if not filters:
+        return df
+    return df[build_mask(df, filters)]
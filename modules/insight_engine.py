@@ -1,18 +1,284 @@
-from modules.llm_engine import call_llm
+# modules/insight_engine.py
+#
+# Narrative insights for analytics results.
+# - The numbers are summarized LOCALLY (top / bottom groups, spread,
+#   z-scores), so prompts are small and deterministic.
+# - Narratives are cached on (metric, dimension, data hash, language).
+# - Requests arriving close together are batched into ONE LLM call and
+#   answered through futures, so the caller can show the table / chart
+#   first and narrate afterwards.
 
-def explain_insight(data, metric, dimension):
-    summary = data.describe().to_string()
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+from plotly.graph_objs import Figure
+
+from config import INSIGHT_BATCH_SIZE, INSIGHT_BATCH_WINDOW_MS
+from modules.llm_engine import call_llm, parse_llm_json
+
+INSIGHT_CACHE_SIZE = 512
+TOP_N = 3
+# |z| above this marks a group as an outlier
+OUTLIER_Z = 1.5
+
+
+# ==================================================
+# RESULT → SERIES
+# ==================================================
+def result_to_series(result):
+    """
+    Router output (Series / table / chart / scalar) → Series or scalar.
+    None when there is nothing to narrate.
+    """
+    if isinstance(result, (int, float, np.number)):
+        return result
+
+    if isinstance(result, pd.Series):
+        return result
+
+    if isinstance(result, Figure) and len(result.data):
+        trace = result.data[0]
+        if trace.type == "pie":
+            return pd.Series(list(trace.values), index=list(trace.labels))
+        return pd.Series(list(trace.y), index=list(trace.x), name=trace.name)
+
+    if isinstance(result, pd.DataFrame) and len(result):
+        if list(result.columns[:2]) == ["Metric", "Value"]:
+            return result["Value"].iloc[0] if len(result) == 1 else result.set_index("Metric")["Value"]
+        if "Value" in result.columns:
+            return result.set_index(result.columns[0])["Value"]
+        if result.shape[1] == 2:
+            return result.set_index(result.columns[0])[result.columns[1]]
+
+    return None
+
+
+# ==================================================
+# LOCAL SUMMARY
+# ==================================================
+def _num(value):
+    value = float(value)
+    if value.is_integer() or abs(value) >= 1e6:
+        return int(round(value))
+    return round(value, 2)
+
+
+def summarize(data):
+    """
+    Compact, deterministic numeric summary of a result
+    """
+    if not isinstance(data, pd.Series):
+        return {"value": _num(data)}
+
+    values = pd.to_numeric(data, errors="coerce").dropna()
+    if values.empty:
+        return {"groups": 0}
+
+    ranked = values.sort_values(ascending=False)
+    mean = float(values.mean())
+    std = float(values.std(ddof=0)) or 1.0
+    z = (values - mean) / std
+
+    summary = {
+        "groups": int(len(values)),
+        "mean": _num(mean),
+        "top": [[str(k), _num(v)] for k, v in ranked.head(TOP_N).items()],
+        "bottom": [[str(k), _num(v)] for k, v in ranked.tail(TOP_N).iloc[::-1].items()],
+        "spread": _num(ranked.iloc[0] - ranked.iloc[-1]),
+        "outliers": {str(k): _num(v) for k, v in z[z.abs() >= OUTLIER_Z].items()}
+    }
+
+    if (values >= 0).all() and values.sum() > 0:
+        summary["top_share_pct"] = _num(ranked.iloc[0] / values.sum() * 100)
+
+    return summary
+
+
+def data_hash(data):
+    if isinstance(data, pd.Series):
+        return hashlib.sha1(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes()).hexdigest()
+    return hash(float(data))
+
+
+def local_narrative(summary, metric, dimension):
+    """
+    Plain-text fallback when the LLM is unavailable
+    """
+    if "value" in summary:
+        return f"{metric.title()}: {summary['value']}."
+    if not summary.get("groups"):
+        return ""
+
+    by = f" by {dimension.lower()}" if dimension and dimension != "NONE" else ""
+    top, bottom = summary["top"][0], summary["bottom"][0]
+    text = (
+        f"{metric.title()}{by}: highest in {top[0]} ({top[1]}), lowest in {bottom[0]} "
+        f"({bottom[1]}); spread {summary['spread']} around a mean of {summary['mean']}."
+    )
+    if summary["outliers"]:
+        text += f" Outliers: {', '.join(summary['outliers'])}."
+    return text
+
+
+# ==================================================
+# CACHE
+# ==================================================
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+    return None
 
-    prompt = f"""
-You are an HR analyst.
 
-Explain the insight from this data
-in 3 business lines.
+def _cache_put(key, text):
+    with _cache_lock:
+        _cache[key] = text
+        while len(_cache) > INSIGHT_CACHE_SIZE:
+            _cache.popitem(last=False)
 
-Metric: {metric}
-Dimension: {dimension}
 
-Data:
-{summary}
+# ==================================================
+# LLM (one call for many results)
+# ==================================================
+def _batch_prompt(items):
+    blocks = []
+    for i, (summary, metric, dimension) in enumerate(items, 1):
+        blocks.append(
+            f"[{i}] metric={metric} dimension={dimension or 'NONE'}\n"
+            f"{json.dumps(summary, sort_keys=True, separators=(',', ':'))}"
+        )
+
+    return f"""
+You are an HR analyst.
+For EACH numbered summary below, explain the insight in at most
+3 short business sentences. Use only the numbers given.
+
+Return ONLY a JSON array of strings, one per summary, in order.
+
+{chr(10).join(blocks)}
 """
-    return call_llm(prompt, "en")
+
+
+def explain_batch(results, language="en"):
+    """
+    results: [(data, metric, dimension)] → [narrative], ONE LLM call
+    for everything not already cached
+    """
+    narratives = [None] * len(results)
+    pending = []
+
+    for i, (data, metric, dimension) in enumerate(results):
+        series = result_to_series(data)
+        if series is None:
+            narratives[i] = ""
+            continue
+
+        key = (metric, dimension, data_hash(series), language)
+        cached = _cache_get(key)
+        if cached is not None:
+            narratives[i] = cached
+        else:
+            pending.append((i, key, summarize(series), metric, dimension))
+
+    if not pending:
+        return narratives
+
+    texts = None
+    try:
+        response = call_llm(_batch_prompt([p[2:] for p in pending]), language=language)
+        texts = parse_llm_json(response)
+        if not isinstance(texts, list) or len(texts) != len(pending):
+            raise ValueError(f"expected {len(pending)} narratives")
+    except Exception as e:
+        logging.error(f"Insight narration failed: {e}")
+        texts = None
+
+    for n, (i, key, summary, metric, dimension) in enumerate(pending):
+        if texts is not None:
+            narratives[i] = str(texts[n]).strip()
+            _cache_put(key, narratives[i])
+        else:
+            narratives[i] = local_narrative(summary, metric, dimension)
+
+    return narratives
+
+
+def explain_insight(data, metric, dimension, language="en"):
+    return explain_batch([(data, metric, dimension)], language)[0]
+
+
+# ==================================================
+# ASYNC NARRATION (micro-batched)
+# ==================================================
+_requests = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _drain():
+    """
+    Collects requests for up to INSIGHT_BATCH_WINDOW_MS, then narrates
+    each language group with one call
+    """
+    while True:
+        batch = [_requests.get()]
+        deadline = time.monotonic() + INSIGHT_BATCH_WINDOW_MS / 1000
+
+        while len(batch) < INSIGHT_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        by_language = {}
+        for item in batch:
+            by_language.setdefault(item[3], []).append(item)
+
+        for language, items in by_language.items():
+            try:
+                texts = explain_batch([item[:3] for item in items], language)
+                for item, text in zip(items, texts):
+                    item[4].set_result(text)
+            except Exception as e:
+                for item in items:
+                    item[4].set_exception(e)
+
+
+def narrate_async(data, metric, dimension, language="en"):
+    """
+    Future resolving to the narrative; never blocks the caller
+    """
+    global _worker
+
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(target=_drain, name="insight-narrator", daemon=True)
+            _worker.start()
+
+    future = Future()
+
+    # Cache hits skip the batching window
+    series = result_to_series(data)
+    cached = None if series is None else _cache_get((metric, dimension, data_hash(series), language))
+    if cached is not None:
+        future.set_result(cached)
+        return future
+
+    _requests.put((data, metric, dimension, language, future))
+    return future
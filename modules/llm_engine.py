@@ -1,3 +1,4 @@
+import json
 import requests
 import os
 
@@ -26,3 +27,12 @@ def call_llm(prompt, language="en"):
         return resp["choices"][0]["message"]["content"]
     except:
         return f"❌ Unexpected LLM Response: {resp}"
+
+
+def parse_llm_json(response):
+    """
+    Parses JSON replies, tolerating ```json fences around them
+    """
+    response = response.strip()
+    response = response.replace("```json", "").replace("```", "")
+    return json.loads(response)
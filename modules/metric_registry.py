@@ -7,7 +7,7 @@ HR_METRICS = {
     "attrition": {
         "type": "ratio",
         "column": "Status",
-        "positive": "Resigned"
+        "positive": ["Resigned", "Terminated"]
     },
     "salary": {
         "type": "avg",
@@ -15,7 +15,8 @@ HR_METRICS = {
     },
     "gender": {
         "type": "distribution",
-        "column": "Gender"
+        "column": "Gender",
+        "filter": {"Status": ["Active"]}
     },
     "tenure": {
         "type": "avg",
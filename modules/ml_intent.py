@@ -1,14 +1,16 @@
-def is_ml_query(query: str) -> bool:
-    q = query.lower()
+ML_QUERY_TRIGGERS = [
+    "attrition risk",
+    "predict attrition",
+    "attrition prediction",
+    "who will leave",
+    "likelihood of leaving",
+    "high risk employees",
+    "flight risk"
+]
+
 
-    ml_triggers = [
-        "attrition risk",
-        "predict attrition",
-        "attrition prediction",
-        "who will leave",
-        "likelihood of leaving",
-        "high risk employees",
-        "flight risk"
-    ]
+def is_ml_query(query: str) -> bool:
+    # Imported here: the query parser builds on this trigger list
+    from modules.query_parser import parse_query, PREDICTION
 
-    return any(k in q for k in ml_triggers)
+    return parse_query(query)["type"] == PREDICTION
@@ -61,6 +61,25 @@ metric_keywords = {
         "diversity",
         "male",
         "female"
+    ],
+    "survival": [
+        "survival",
+        "survival curve",
+        "retention curve",
+        "kaplan meier",
+        "kaplan-meier"
+    ],
+    "median_tenure": [
+        "median tenure",
+        "tenure",
+        "length of service",
+        "years of service"
+    ],
+    "retention": [
+        "retention",
+        "retained",
+        "cohort",
+        "cohorts"
     ]
 }
 
@@ -69,6 +88,13 @@ metric_keywords = {
 # DIMENSION KEYWORDS (FALLBACK)
 # ==================================================
 dimension_keywords = {
+    "MONTH": [
+        "month",
+        "monthly",
+        "per month",
+        "by month",
+        "month over month"
+    ],
     "YEAR": [
         "year",
         "years",
@@ -96,6 +122,12 @@ dimension_keywords = {
         "gender",
         "male",
         "female"
+    ],
+    "JOB_LEVEL": [
+        "job level",
+        "level",
+        "grade",
+        "seniority"
     ]
 }
 
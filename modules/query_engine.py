@@ -2,7 +2,8 @@ from modules.schema_registry import DIMENSIONS
 from modules.metric_registry import HR_METRICS
 from modules.filter_engine import apply_filters
 
-def compute_metric(df, metric, dimension, filters=None):
+
+def compute_metric(df, metric, dimension=None, filters=None):
     metric_cfg = HR_METRICS.get(metric)
     if not metric_cfg:
         return None
@@ -10,22 +11,40 @@ def compute_metric(df, metric, dimension, filters=None):
     if filters:
         df = apply_filters(df, filters)
 
-    if dimension:
-        col = DIMENSIONS.get(dimension)
+    col = None
+    if dimension and dimension != "NONE":
+        col = DIMENSIONS.get(dimension, dimension)
         if col not in df.columns:
             return None
-        grp = df.groupby(col)
-    else:
-        grp = df
+
+    if metric_cfg.get("filter"):
+        df = apply_filters(df, metric_cfg["filter"])
+
+    grp = df.groupby(col, observed=True) if col else df
 
     if metric_cfg["type"] == "count":
-        return grp["Employee_ID"].count()
+        return grp[metric_cfg["column"]].nunique()
 
     if metric_cfg["type"] == "avg":
-        return grp[metric_cfg["column"]].mean()
+        return grp[metric_cfg["column"]].mean().round(2)
+
+    if metric_cfg["type"] == "distribution":
+        counts = grp[metric_cfg["column"]].value_counts()
+        # Categorical columns report unobserved categories as 0
+        return counts[counts > 0]
 
     if metric_cfg["type"] == "ratio":
-        df["_flag"] = (df["Status"] == metric_cfg["positive"]).astype(int)
-        return grp["_flag"].mean() * 100
+        # Exited IDs only; nunique() skips the NaNs left by where()
+        exited = df["Employee_ID"].where(
+            df[metric_cfg["column"]].isin(metric_cfg["positive"])
+        )
+
+        if not col:
+            total = df["Employee_ID"].nunique()
+            return round(exited.nunique() / total * 100, 2) if total else 0
+
+        total = grp["Employee_ID"].nunique()
+        left = exited.groupby(df[col], observed=True).nunique()
+        return (left / total * 100).fillna(0).round(2)
 
     return None
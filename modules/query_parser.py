@@ -0,0 +1,338 @@
+# modules/query_parser.py
+#
+# ONE parse per query. Every trigger list the app checks (greetings,
+# definitions, model metrics, predictions, metric / dimension / chart
+# words, comparison separators, time cues and the dataset's own values)
+# is folded into a single compiled alternation; one finditer pass
+# collects every hit and the structured request is derived from them.
+# The time-window and comparison parsers only run when that pass saw
+# one of their cues.
+
+import logging
+import re
+import threading
+import time
+from collections import Counter
+
+from config import AS_OF_DATE, QUERY_MAX_CHARS, QUERY_PARSE_BUDGET_US
+from modules.comparison_extractor import extract_comparison, get_vocabulary, vocabulary_phrases
+from modules.ml_intent import ML_QUERY_TRIGGERS
+from modules.nlu import normalize_text, metric_keywords, dimension_keywords
+from modules.question_pool import DEFINITION_TRIGGERS, ML_TRIGGERS, METRIC_TRIGGERS, EXPLANATION_TRIGGERS
+from modules.time_extractor import MONTHS, extract_time_window
+from modules.time_index import get_time_index
+
+# ==================================================
+# REQUEST TYPES (checked in this order)
+# ==================================================
+GREETING = "GREETING"
+DEFINITION = "DEFINITION"
+MODEL_METRICS = "MODEL_METRICS"
+PREDICTION = "PREDICTION"
+METRIC = "METRIC"
+EXPLANATION = "EXPLANATION"
+GENERAL = "GENERAL"
+
+# ==================================================
+# VOCABULARY
+# ==================================================
+GREETINGS = ["hi", "hello", "hey", "hola", "hallo"]
+MODEL_METRIC_TRIGGERS = ["auc", "precision", "recall"]
+PREDICTION_TRIGGERS = list(dict.fromkeys(ML_TRIGGERS + ML_QUERY_TRIGGERS))
+CHART_KEYWORDS = ["chart", "plot", "graph", "bar", "line", "pie"]
+COMPARISON_WORDS = ["vs", "versus", "compared to", "compared with", "against"]
+TIME_WORDS = [
+    "quarter", "qtd", "ytd", "year to date", "this year", "current year",
+    "last", "past", "previous", "trailing", "since", "month"
+]
+
+# First listed type wins (same precedence as nlu.extract_chart_type)
+CHART_TYPES = {
+    "LINE": ["line", "trend", "time series"],
+    "PIE": ["pie", "ratio", "share"],
+    "BAR": ["bar", "compare", "comparison"]
+}
+
+# Headcount words that also appear in other metrics' questions
+# ("salary of female employees"): only used when nothing else matched
+GENERIC_METRIC_TERMS = {
+    "employee", "employees", "people", "persons", "individuals", "participants", "staff", "workforce"
+}
+
+# Dataset values that are also common words: only filters when written
+# in capitals ("IT", "HR")
+AMBIGUOUS_VALUES = {"it", "hr"}
+
+# "rolling attrition", "rolling 6 month attrition" → trailing-window series
+ROLLING = re.compile(r"\brolling(?: (\d{1,2})[ -]?(?:months?|mo)\b)?")
+ROLLING_DEFAULT_MONTHS = 12
+
+# Dates, years, quarters, month names: anything extract_time_window reads
+_TIME_FRAGMENTS = [
+    r"(?:19|20)\d{2}(?:-\d{2}-\d{2})?",
+    r"q[1-4]",
+    r"(?:" + "|".join(MONTHS) + r")[a-z]*"
+]
+
+
+def _static_entries():
+    """
+    [(phrase, kind, value)] for every trigger list
+    """
+    entries = []
+
+    def add(terms, kind, value=None):
+        entries.extend((t.lower(), kind, value) for t in terms)
+
+    add(DEFINITION_TRIGGERS + ["meaning"], "definition")
+    add(MODEL_METRIC_TRIGGERS, "model_metric")
+    add(PREDICTION_TRIGGERS, "prediction")
+    add(EXPLANATION_TRIGGERS, "explanation")
+    add(METRIC_TRIGGERS, "metric_word")
+    add(CHART_KEYWORDS, "chart_word")
+    add(COMPARISON_WORDS, "versus")
+    add(TIME_WORDS, "time")
+
+    for metric, words in metric_keywords.items():
+        add(words, "metric", metric)
+    for dim, words in dimension_keywords.items():
+        add(words, "dimension", dim)
+    for chart, words in CHART_TYPES.items():
+        add(words, "chart", chart)
+
+    return entries
+
+
+STATIC_ENTRIES = _static_entries()
+
+
+# ==================================================
+# MATCHER (one alternation, built once per dataset)
+# ==================================================
+def build_matcher(entries):
+    """
+    (compiled pattern, {phrase: [(kind, value)]}).
+    A phrase also carries the hits of every shorter phrase inside it, so
+    "attrition risk" is both a prediction and the attrition metric.
+    """
+    phrases = {}
+    for phrase, kind, value in entries:
+        phrases.setdefault(phrase, [])
+
+    terms = {}
+    for phrase in phrases:
+        padded = f" {phrase} "
+        terms[phrase] = [
+            (kind, value) for p, kind, value in entries
+            if f" {p} " in padded
+        ]
+
+    alternation = "|".join(re.escape(p) for p in sorted(phrases, key=len, reverse=True))
+    # Literal phrases first so "separation" is not read as a month
+    pattern = re.compile(r"\b(" + alternation + "|" + "|".join(_TIME_FRAGMENTS) + r")(?:s|es)?\b")
+    return pattern, terms
+
+
+STATIC_MATCHER = build_matcher(STATIC_ENTRIES)
+
+_cache = {"df": None, "matcher": None}
+_cache_lock = threading.Lock()
+
+
+def get_matcher(df=None):
+    """
+    Static vocabulary + the dataset's department / location / level /
+    gender values (cached per dataset object)
+    """
+    if df is None:
+        return STATIC_MATCHER
+
+    with _cache_lock:
+        if _cache["df"] is df:
+            return _cache["matcher"]
+
+    values = [(p, "value", (col, v)) for p, col, v in vocabulary_phrases(df)]
+    matcher = build_matcher(STATIC_ENTRIES + values)
+
+    with _cache_lock:
+        _cache["df"] = df
+        _cache["matcher"] = matcher
+    return matcher
+
+
+# ==================================================
+# COUNTERS / BUDGET
+# ==================================================
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def parser_stats():
+    """
+    Queries parsed, how many overran QUERY_PARSE_BUDGET_US, mean cost
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    parsed = stats.get("parsed", 0)
+    stats["mean_us"] = round(stats.pop("total_us", 0) / parsed, 1) if parsed else 0.0
+    return stats
+
+
+def reset_parser_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def _record(request):
+    with _stats_lock:
+        _stats["parsed"] += 1
+        _stats["total_us"] += request["elapsed_us"]
+        _stats[request["type"].lower()] += 1
+        if request["elapsed_us"] > QUERY_PARSE_BUDGET_US:
+            _stats["over_budget"] += 1
+
+    if request["elapsed_us"] > QUERY_PARSE_BUDGET_US:
+        logging.info(f"Query parse over budget: {request['elapsed_us']} µs for '{request['text'][:80]}'")
+
+
+# ==================================================
+# PARSER
+# ==================================================
+def _as_of(df):
+    if AS_OF_DATE:
+        return AS_OF_DATE
+    if df is None:
+        return None
+    try:
+        return get_time_index(df).as_of
+    except ValueError:
+        return None
+
+
+def _first(found, kind, order, skip=()):
+    """
+    First value of `order` among the hits of `kind`, ignoring hits that
+    overlap a span in `skip`
+    """
+    values = {
+        value for value, span in found.get(kind, [])
+        if not any(span[0] < end and start < span[1] for start, end in skip)
+    }
+    return next((v for v in order if v in values), None)
+
+
+def _filters(found, text, metric):
+    """
+    ({column: [values]}, spans used) from the dataset values in the query
+    """
+    filters, spans = {}, []
+
+    for (col, value), span in found.get("value", []):
+        phrase = str(value).lower()
+        if phrase in AMBIGUOUS_VALUES and not re.search(r"\b" + re.escape(phrase.upper()) + r"\b", text):
+            continue
+        if col == "Gender" and metric == "gender":
+            continue
+        if value not in filters.setdefault(col, []):
+            filters[col].append(value)
+        spans.append(span)
+
+    return {col: values for col, values in filters.items() if values}, spans
+
+
+def parse_query(text, df=None, as_of=None):
+    """
+    Structured request:
+    {
+        "text", "type", "metric", "dimension", "chart", "wants_chart",
+        "filters", "window", "comparison", "rolling", "elapsed_us"
+    }
+    `df` adds the dataset's values (filters, comparison sides) and
+    anchors relative windows on its latest date.
+    """
+    started = time.perf_counter()
+    text = (text or "")[:QUERY_MAX_CHARS]
+    q = normalize_text(text)
+
+    request = {
+        "text": q,
+        "type": GENERAL,
+        "metric": None,
+        "dimension": None,
+        "chart": "NONE",
+        "wants_chart": False,
+        "filters": {},
+        "window": None,
+        "comparison": None,
+        "rolling": None,
+        "elapsed_us": 0
+    }
+
+    if q.strip(" !.?") in GREETINGS:
+        request["type"] = GREETING
+    else:
+        pattern, terms = get_matcher(df)
+
+        found = {}
+        for m in pattern.finditer(q):
+            for kind, value in terms.get(m[1], (("time", None),)):
+                found.setdefault(kind, []).append((value, m.span()))
+
+        if "time" in found or "versus" in found:
+            as_of = as_of if as_of is not None else _as_of(df)
+
+        if "time" in found:
+            request["window"] = extract_time_window(q, as_of=as_of)
+
+        if "versus" in found and df is not None:
+            request["comparison"] = extract_comparison(q, get_vocabulary(df), as_of=as_of)
+
+        specific = [m for m in metric_keywords if any(
+            value == m and q[span[0]:span[1]] not in GENERIC_METRIC_TERMS
+            for value, span in found.get("metric", [])
+        )]
+        metric = specific[0] if specific else _first(found, "metric", metric_keywords)
+
+        filters, skip = ({}, []) if request["comparison"] else _filters(found, text, metric)
+
+        rolling = ROLLING.search(q) if "rolling" in q else None
+        if rolling:
+            request["rolling"] = int(rolling[1] or ROLLING_DEFAULT_MONTHS)
+            # "rolling 12 month" sizes the window, it is no MONTH breakdown
+            skip.append(rolling.span())
+
+        # "last year" names the window, not a YEAR breakdown;
+        # "female employees" is a filter, not a GENDER breakdown
+        window = request["window"]
+        at = q.find(window["text"]) if window is not None else -1
+        if at >= 0:
+            skip.append((at, at + len(window["text"])))
+
+        request.update({
+            "metric": metric,
+            "dimension": _first(found, "dimension", dimension_keywords, skip),
+            "chart": _first(found, "chart", CHART_TYPES) or "NONE",
+            "wants_chart": "chart_word" in found,
+            "filters": filters
+        })
+
+        analytic = (
+            request["dimension"] or request["window"] or request["comparison"]
+            or request["filters"] or request["wants_chart"]
+        )
+
+        if "definition" in found and not analytic:
+            request["type"] = DEFINITION
+        elif "model_metric" in found:
+            request["type"] = MODEL_METRICS
+        elif "prediction" in found:
+            request["type"] = PREDICTION
+        elif metric or "metric_word" in found:
+            request["type"] = METRIC
+        elif "explanation" in found:
+            request["type"] = EXPLANATION
+
+    request["elapsed_us"] = round((time.perf_counter() - started) * 1e6, 1)
+    _record(request)
+    return request
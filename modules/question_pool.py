@@ -1,95 +1,89 @@
+# ==================================================
+# TRIGGER VOCABULARY (shared with the domain guard)
+# ==================================================
+DEFINITION_TRIGGERS = [
+    "what is", "define", "definition of", "meaning of",
+    "explain", "difference between", "how do you define",
+    "what does", "what do you mean by"
+]
+
+HR_CONCEPTS = [
+    # Core HR
+    "headcount", "attrition", "turnover", "retention",
+    "engagement", "performance", "promotion",
+    "tenure", "experience", "salary", "compensation",
+    "ctc", "bonus", "incentive",
+
+    # Talent & hiring
+    "time to hire", "time to fill", "hiring", "recruitment",
+    "offer acceptance", "funnel",
+
+    # DEI
+    "gender ratio", "diversity", "inclusion", "pay gap",
+
+    # Org
+    "span of control", "org structure", "job level",
+    "grade", "band", "fte",
+
+    # Attrition concepts
+    "regretted attrition", "voluntary attrition",
+    "involuntary attrition", "early attrition"
+]
+
+ML_TRIGGERS = [
+    "predict", "prediction", "risk", "likelihood",
+    "chance of leaving", "who will leave",
+    "flight risk", "high risk employees",
+    "attrition risk", "resignation risk"
+]
+
+METRIC_TRIGGERS = [
+    # Core metrics
+    "headcount", "attrition", "turnover",
+    "salary", "compensation", "ctc",
+    "engagement", "performance", "rating",
+
+    # Hiring
+    "hires", "joined", "new joiners",
+    "open positions",
+
+    # DEI
+    "gender", "female", "male", "diversity",
+
+    # Time-based
+    "by department", "by team", "by location",
+    "by year", "by month", "trend", "over time",
+
+    # Output
+    "table", "chart", "graph", "excel", "csv"
+]
+
+EXPLANATION_TRIGGERS = [
+    "why", "reason", "cause", "drivers",
+    "what is causing", "how to reduce",
+    "how can we improve", "insights",
+    "recommendations", "suggest"
+]
+
+
+# Parser request type → question category
+QUESTION_CATEGORIES = {
+    "GREETING": "GENERAL",
+    "DEFINITION": "DEFINITION",
+    "MODEL_METRICS": "ML",
+    "PREDICTION": "ML",
+    "METRIC": "METRIC",
+    "EXPLANATION": "EXPLANATION",
+    "GENERAL": "GENERAL"
+}
+
+
 def classify_question(query: str) -> str:
-    q = query.lower()
-
-    # ==================================================
-    # 1️⃣ HR DEFINITIONS / CONCEPTS
-    # ==================================================
-    definition_triggers = [
-        "what is", "define", "definition of", "meaning of",
-        "explain", "difference between", "how do you define",
-        "what does", "what do you mean by"
-    ]
-
-    hr_concepts = [
-        # Core HR
-        "headcount", "attrition", "turnover", "retention",
-        "engagement", "performance", "promotion",
-        "tenure", "experience", "salary", "compensation",
-        "ctc", "bonus", "incentive",
-
-        # Talent & hiring
-        "time to hire", "time to fill", "hiring", "recruitment",
-        "offer acceptance", "funnel",
-
-        # DEI
-        "gender ratio", "diversity", "inclusion", "pay gap",
-
-        # Org
-        "span of control", "org structure", "job level",
-        "grade", "band", "fte",
-
-        # Attrition concepts
-        "regretted attrition", "voluntary attrition",
-        "involuntary attrition", "early attrition"
-    ]
-
-    if any(t in q for t in definition_triggers) and any(c in q for c in hr_concepts):
-        return "DEFINITION"
-
-    # ==================================================
-    # 2️⃣ ML / PREDICTIVE QUESTIONS
-    # ==================================================
-    ml_triggers = [
-        "predict", "prediction", "risk", "likelihood",
-        "chance of leaving", "who will leave",
-        "flight risk", "high risk employees",
-        "attrition risk", "resignation risk"
-    ]
-
-    if any(k in q for k in ml_triggers):
-        return "ML"
-
-    # ==================================================
-    # 3️⃣ METRIC / ANALYTICS QUESTIONS
-    # ==================================================
-    metric_triggers = [
-        # Core metrics
-        "headcount", "attrition", "turnover",
-        "salary", "compensation", "ctc",
-        "engagement", "performance", "rating",
-
-        # Hiring
-        "hires", "joined", "new joiners",
-        "open positions",
-
-        # DEI
-        "gender", "female", "male", "diversity",
-
-        # Time-based
-        "by department", "by team", "by location",
-        "by year", "by month", "trend", "over time",
-
-        # Output
-        "table", "chart", "graph", "excel", "csv"
-    ]
-
-    if any(k in q for k in metric_triggers):
-        return "METRIC"
-
-    # ==================================================
-    # 4️⃣ EXPLANATION / WHY QUESTIONS
-    # ==================================================
-    explanation_triggers = [
-        "why", "reason", "cause", "drivers",
-        "what is causing", "how to reduce",
-        "how can we improve", "insights",
-        "recommendations", "suggest"
-    ]
-
-    if any(k in q for k in explanation_triggers):
-        return "EXPLANATION"
-
-    # ==================================================
-    # 5️⃣ GENERAL HR QUESTIONS
-    # ==================================================
-    return "GENERAL"
+    """
+    DEFINITION / ML / METRIC / EXPLANATION / GENERAL, read off the
+    unified query parser (one scan for every trigger list above)
+    """
+    # Imported here: the query parser builds on the lists above
+    from modules.query_parser import parse_query
+
+    return QUESTION_CATEGORIES[parse_query(query)["type"]]
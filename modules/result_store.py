@@ -0,0 +1,262 @@
+# modules/result_store.py
+#
+# Large answers (e.g. attrition risk for every employee) stay on the
+# server under a result-set ID. Callers fetch pages / windows with the
+# sort and filter applied here, and exports are streamed in chunks.
+
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import DEFAULT_ROLE, DEFAULT_TENANT, RESULT_SET_MIN_ROWS, RESULT_STORE_MAX_MB, RESULT_STORE_TTL
+from modules.filter_engine import build_mask
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}
+
+# Sorted / filtered row orders kept per result set
+ORDER_CACHE_SIZE = 8
+
+
+class ResultSet:
+
+    def __init__(self, frame, title=None, tenant=None, role=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.frame = frame.reset_index(drop=True)
+        # Served / exported as-is: the dataset's attrs (label lookups,
+        # report tokens) neither travel into Parquet nor stay alive here
+        self.frame.attrs = {}
+        self.title = title
+        # Rows come from one tenant's dataset as one role sees it
+        self.tenant = tenant or DEFAULT_TENANT
+        self.role = role or DEFAULT_ROLE
+        self.created = time.time()
+        self.last_access = self.created
+        self.nbytes = int(self.frame.memory_usage(deep=True).sum())
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.frame)
+
+    def visible_to(self, tenant=None, role=None):
+        return (tenant or DEFAULT_TENANT, role or DEFAULT_ROLE) == (self.tenant, self.role)
+
+    @property
+    def columns(self):
+        return [str(c) for c in self.frame.columns]
+
+    # ---------------------------
+    # Row order (sort + filter)
+    # ---------------------------
+    def _order(self, sort_by=None, ascending=True, filters=None):
+        """
+        Row positions after filter + sort, cached so paging is a slice
+        """
+        if sort_by is not None and sort_by not in self.frame.columns:
+            raise ValueError(f"Unknown sort column: {sort_by}")
+
+        key = (
+            sort_by, bool(ascending),
+            tuple(sorted((c, str(v)) for c, v in (filters or {}).items()))
+        )
+
+        with self._lock:
+            if key in self._orders:
+                self._orders.move_to_end(key)
+                return self._orders[key]
+
+        if sort_by is None:
+            order = np.arange(len(self.frame))
+        else:
+            order = self.frame[sort_by].sort_values(
+                ascending=ascending, kind="stable", na_position="last"
+            ).index.to_numpy()
+
+        if filters:
+            mask = build_mask(self.frame, filters)
+            order = order[mask[order]]
+
+        with self._lock:
+            self._orders[key] = order
+            while len(self._orders) > ORDER_CACHE_SIZE:
+                self._orders.popitem(last=False)
+
+        return order
+
+    # ---------------------------
+    # Pages / windows
+    # ---------------------------
+    def window(self, start, stop, sort_by=None, ascending=True, filters=None):
+        """
+        Rows [start, stop) of the sorted / filtered view + the view size
+        """
+        self.last_access = time.time()
+        order = self._order(sort_by, ascending, filters)
+        start = max(int(start), 0)
+        stop = max(min(int(stop), len(order)), start)
+        return self.frame.iloc[order[start:stop]], len(order)
+
+    def page(self, page=1, page_size=DEFAULT_PAGE_SIZE, sort_by=None, ascending=True, filters=None):
+        """
+        1-based page of the sorted / filtered view
+        """
+        page_size = min(max(int(page_size), 1), MAX_PAGE_SIZE)
+        start = (max(int(page), 1) - 1) * page_size
+        rows, total = self.window(start, start + page_size, sort_by, ascending, filters)
+
+        return {
+            "rows": rows,
+            "page": max(int(page), 1),
+            "page_size": page_size,
+            "total_rows": total,
+            "total_pages": max((total + page_size - 1) // page_size, 1)
+        }
+
+    # ---------------------------
+    # Chunked export
+    # ---------------------------
+    def iter_csv(self, sort_by=None, ascending=True, filters=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """
+        Yields the CSV export as bytes, one chunk of rows at a time
+        """
+        order = self._order(sort_by, ascending, filters)
+
+        for start in range(0, max(len(order), 1), chunk_rows):
+            chunk = self.frame.iloc[order[start:start + chunk_rows]]
+            yield chunk.to_csv(index=False, header=start == 0).encode("utf-8")
+
+    def iter_parquet(self, sort_by=None, ascending=True, filters=None, chunk_rows=EXPORT_CHUNK_ROWS):
+        """
+        Yields a Parquet file as bytes, one row group per chunk
+        """
+        if pq is None:
+            raise ValueError("Parquet export needs pyarrow (pip install pyarrow)")
+
+        order = self._order(sort_by, ascending, filters)
+        sink = io.BytesIO()
+        writer = None
+
+        for start in range(0, max(len(order), 1), chunk_rows):
+            table = pa.Table.from_pandas(
+                self.frame.iloc[order[start:start + chunk_rows]], preserve_index=False
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table)
+
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+
+        writer.close()
+        yield sink.getvalue()
+
+    def iter_export(self, fmt="csv", **view):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        return self.iter_parquet(**view) if fmt == "parquet" else self.iter_csv(**view)
+
+    def export_file(self, fmt="csv", **view):
+        """
+        Export written chunk by chunk to a temp file (memory-bounded) and
+        reopened read-only: a plain binary reader st.download_button accepts
+        """
+        with tempfile.NamedTemporaryFile(suffix=f".{fmt}", delete=False) as out:
+            for chunk in self.iter_export(fmt, **view):
+                out.write(chunk)
+        reader = open(out.name, "rb")
+        try:
+            # The open reader keeps the data; the name is not needed any more
+            os.unlink(out.name)
+        except OSError:
+            pass
+        return reader
+
+
+# ==================================================
+# STORE
+# ==================================================
+_results = OrderedDict()
+_store_lock = threading.Lock()
+
+
+def _evict():
+    """
+    Drops expired result sets, then the least recently used ones
+    until the store fits its memory budget
+    """
+    now = time.time()
+    budget = RESULT_STORE_MAX_MB * 1024 * 1024
+
+    for rid in [r for r, rs in _results.items() if now - rs.last_access > RESULT_STORE_TTL]:
+        del _results[rid]
+
+    total = sum(rs.nbytes for rs in _results.values())
+    while len(_results) > 1 and total > budget:
+        _, old = _results.popitem(last=False)
+        total -= old.nbytes
+        logging.info(f"Result set {old.id} evicted ({old.nbytes / 1e6:.1f} MB)")
+
+
+def register_result(frame, title=None, tenant=None, role=None):
+    result = ResultSet(frame, title, tenant, role)
+
+    with _store_lock:
+        _results[result.id] = result
+        _evict()
+
+    logging.info(f"Result set {result.id}: {len(result)} rows, {result.nbytes / 1e6:.1f} MB")
+    return result
+
+
+def get_result(result_id):
+    """
+    Returns the ResultSet or None if it expired / never existed
+    """
+    with _store_lock:
+        result = _results.get(result_id)
+        if result is None:
+            return None
+        if time.time() - result.last_access > RESULT_STORE_TTL:
+            del _results[result_id]
+            return None
+        _results.move_to_end(result_id)
+        result.last_access = time.time()
+        return result
+
+
+def as_result(frame, title=None, tenant=None, role=None):
+    """
+    Large tables become a server-side ResultSet (served back only to the
+    same tenant and role); small ones pass through
+    """
+    if isinstance(frame, pd.DataFrame) and len(frame) >= RESULT_SET_MIN_ROWS:
+        return register_result(frame, title, tenant, role)
+    return frame
+
+
+def store_stats():
+    with _store_lock:
+        return {
+            "result_sets": len(_results),
+            "rows": sum(len(rs) for rs in _results.values()),
+            "mb": round(sum(rs.nbytes for rs in _results.values()) / 1e6, 2)
+        }
@@ -0,0 +1,245 @@
+# modules/row_security.py
+#
+# Row-level security. A role maps to a filter over the master frame
+#
+#   {"Department": ["Finance"], "Location": ["London"], "manager": "E00042"}
+#
+# ("manager" = that employee and everyone below them through Manager_ID;
+# keys are AND-ed, {} = every row). Per dataset version the Manager_ID
+# hierarchy is flattened ONCE into preorder arrays: a subtree is the
+# contiguous range tin[m] <= tin[x] < tin[m] + size[m], an O(1) check
+# per row. Each role's mask is built once per version and kept packed
+# (1 bit per row); the role's frame is materialized once from it, so
+# every cache keyed on the frame (answers, snapshots, time index) is
+# partitioned by role and enforcement costs nothing per query.
+
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from config import ROLES_FILE, DEFAULT_ROLE
+from modules.data_optimizer import employee_key
+from modules.filter_engine import build_mask
+
+# Materialized role frames kept per dataset version
+ROLE_VIEW_CACHE = 8
+
+
+class AccessError(ValueError):
+    pass
+
+
+_roles = None
+
+
+def load_roles():
+    """
+    Roles of HR_ROLES_FILE (read once; none configured → {})
+    """
+    global _roles
+    if _roles is None:
+        roles = {}
+        if ROLES_FILE:
+            with open(ROLES_FILE) as f:
+                roles = json.load(f)
+            logging.info(f"Roles loaded from {ROLES_FILE}: {', '.join(roles)}")
+        _roles = roles
+    return _roles
+
+
+def restricted(role=None, roles=None):
+    """
+    True when `role` (or the default role) does not see every row
+    """
+    role = role or DEFAULT_ROLE
+    if not role:
+        return False
+    return bool((roles if roles is not None else load_roles()).get(role, True))
+
+
+# ==================================================
+# ORG HIERARCHY (flattened once)
+# ==================================================
+class OrgTree:
+
+    def __init__(self, df):
+        n = len(df)
+        ids = df["Employee_ID"].to_numpy()
+        first = ~pd.Index(ids).duplicated()
+        rows = np.flatnonzero(first)
+        found = pd.Index(ids[first]).get_indexer(df["Manager_ID"].to_numpy())
+        parent = np.where(found >= 0, rows[np.maximum(found, 0)], -1)
+
+        # Manager loops (A → B → A, self-managers) are cut: after 2^k ≥ n
+        # steps only chains inside / feeding a loop are still going, and
+        # they stop ON the loop; those nodes become roots
+        up = parent.copy()
+        going = np.flatnonzero(up >= 0)
+        for _ in range(max(1, int(np.ceil(np.log2(n + 1))))):
+            up[going] = up[up[going]]
+            going = going[up[going] >= 0]
+        cyclic = np.unique(up[going])
+        parent[cyclic] = -1
+        if len(cyclic):
+            logging.info(f"Org tree: {len(cyclic)} employees on reporting loops made top-level")
+
+        # Depth by pointer jumping (log2(depth) passes): depth[x] holds
+        # the edges from x to up[x] until up[x] runs past the root
+        depth = (parent >= 0).astype(np.int64)
+        up = parent.copy()
+        going = np.flatnonzero(up >= 0)
+        while len(going):
+            ahead = up[going]
+            depth[going] += depth[ahead]
+            up[going] = up[ahead]
+            going = going[up[going] >= 0]
+
+        # One sort by (depth, manager): every level comes out with
+        # siblings next to each other
+        order = np.argsort(depth * (n + 1) + parent + 1)
+        bounds = np.searchsorted(depth[order], np.arange((depth.max() if n else -1) + 2))
+        levels = [order[bounds[d]:bounds[d + 1]] for d in range(len(bounds) - 1)]
+
+        # Subtree sizes, deepest level first
+        size = np.ones(n, dtype=np.int64)
+        for nodes in reversed(levels[1:]):
+            managers, slot = np.unique(parent[nodes], return_inverse=True)
+            size[managers] += np.bincount(slot, weights=size[nodes]).astype(np.int64)
+
+        # Preorder numbers, top level first: siblings take consecutive
+        # ranges right after their manager
+        tin = np.zeros(n, dtype=np.int64)
+        if levels:
+            roots = levels[0]
+            tin[roots] = np.cumsum(size[roots]) - size[roots]
+        for nodes in levels[1:]:
+            managers = parent[nodes]
+            before = np.cumsum(size[nodes]) - size[nodes]
+            starts = np.flatnonzero(np.r_[True, managers[1:] != managers[:-1]])
+            group_start = np.repeat(starts, np.diff(np.r_[starts, len(nodes)]))
+            tin[nodes] = tin[managers] + 1 + before - before[group_start]
+
+        self.parent, self.depth, self.size, self.tin = parent, depth, size, tin
+
+    def subtree(self, row):
+        """
+        Bool mask: employee at `row` and everyone reporting up to them
+        """
+        lo = self.tin[row]
+        return (self.tin >= lo) & (self.tin < lo + self.size[row])
+
+
+# ==================================================
+# ROLE MASKS / VIEWS (one set per dataset version)
+# ==================================================
+class RowSecurity:
+
+    def __init__(self, df, roles=None):
+        self.df = df
+        self.roles = roles if roles is not None else load_roles()
+        self._tree = None
+        self._bits = {}
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def tree(self):
+        with self._lock:
+            if self._tree is None:
+                if "Manager_ID" not in self.df.columns:
+                    raise AccessError("This dataset has no Manager_ID hierarchy")
+                self._tree = OrgTree(self.df)
+            return self._tree
+
+    def _build_mask(self, role):
+        spec = self.roles.get(role)
+        if spec is None:
+            raise AccessError(f"Unknown role: {role}")
+
+        filters = {col: values for col, values in spec.items() if col != "manager"}
+        mask = build_mask(self.df, filters)
+
+        if "manager" in spec:
+            key = employee_key(self.df, spec["manager"])
+            rows = np.flatnonzero(self.df["Employee_ID"].to_numpy() == key) if key is not None else []
+            if len(rows):
+                mask &= self.tree().subtree(rows[0])
+            else:
+                logging.warning(f"Role {role}: manager {spec['manager']} not in the dataset")
+                mask[:] = False
+        return mask
+
+    def mask(self, role):
+        """
+        Bool mask of the rows `role` may see (built once, stored packed)
+        """
+        bits = self._bits.get(role)
+        if bits is None:
+            bits = np.packbits(self._build_mask(role))
+            with self._lock:
+                self._bits[role] = bits
+        return np.unpackbits(bits, count=len(self.df)).view(bool)
+
+    def view(self, role):
+        """
+        The role's rows as a frame, materialized once per version
+        """
+        if self.roles.get(role, True) == {}:
+            return self.df
+
+        with self._lock:
+            view = self._views.get(role)
+            if view is not None:
+                self._views.move_to_end(role)
+                return view
+
+        view = self.df[self.mask(role)]
+        view.attrs["role"] = role
+
+        with self._lock:
+            self._views[role] = view
+            while len(self._views) > ROLE_VIEW_CACHE:
+                self._views.popitem(last=False)
+        logging.info(f"Role {role}: {len(view)} of {len(self.df)} rows visible")
+        return view
+
+
+_cache = {"df": None, "security": None}
+_cache_lock = threading.Lock()
+
+
+def get_row_security(df, caches=None, roles=None):
+    """
+    RowSecurity of df: kept in `caches` (a tenant's, dropped with its
+    dataset version) or in a single-entry cache for other frames
+    """
+    if caches is not None:
+        security = caches.get("security")
+        if security is None or security.df is not df:
+            security = caches["security"] = RowSecurity(df, roles)
+        return security
+
+    with _cache_lock:
+        if _cache["df"] is df:
+            return _cache["security"]
+
+    security = RowSecurity(df, roles)
+
+    with _cache_lock:
+        _cache["df"] = df
+        _cache["security"] = security
+    return security
+
+
+def secure_view(df, role=None, caches=None, roles=None):
+    """
+    Rows of df visible to `role` (default role when None; no role
+    configured → every row)
+    """
+    role = role or DEFAULT_ROLE
+    if not role or df is None or df.empty:
+        return df
+    return get_row_security(df, caches, roles).view(role)
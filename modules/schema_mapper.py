@@ -0,0 +1,199 @@
+# modules/schema_mapper.py
+#
+# Maps the known master layouts onto ONE canonical schema (the
+# hr_master_10000 one) right at load time:
+#
+#   hr_master    Termination_Date, Age, Job_Level, Gender M/F/O
+#   enterprise   Exit_Date, Tenure_Years, Risk_Score, Gender Male/Female
+#
+# The layout is detected from its signature columns (or forced per
+# tenant, by name or as the tenant's own definition), columns are renamed, categorical values are remapped on the
+# distinct values only (factorize → code lookup, never a per-row apply)
+# and every known column is coerced / validated ONCE, so a bad dataset
+# fails here instead of deep inside an analytics function. Nothing is
+# kept per layout at module level: tenants with different layouts share
+# one process, the layout travels in df.attrs["layout"] (its skipped
+# quality rules in df.attrs["skip_rules"]) and a tenant's own layout
+# lives in its tenant registry entry.
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+# ==================================================
+# CANONICAL SCHEMA
+# ==================================================
+CANONICAL_TYPES = {
+    "Employee_ID": "id", "Manager_ID": "id",
+    "Gender": "category", "Department": "category", "Location": "category",
+    "Region": "category", "Employment_Type": "category", "Status": "category",
+    "Age": "number", "Job_Level": "number", "Salary": "number",
+    "Performance_Rating": "number", "Engagement_Score": "number",
+    "Last_Promotion_Year": "number", "Experience_Years": "number",
+    "Tenure_Years": "number", "Risk_Score": "number",
+    "Hire_Date": "date", "Termination_Date": "date", "Snapshot_Date": "date"
+}
+
+REQUIRED_COLUMNS = ["Employee_ID", "Status", "Hire_Date"]
+
+STATUS_VALUES = ["Active", "Resigned", "Terminated"]
+
+# Canonical values by lower-cased source value (unknown values are kept)
+VALUE_MAPS = {
+    "Gender": {
+        "m": "M", "male": "M", "man": "M",
+        "f": "F", "female": "F", "woman": "F",
+        "o": "O", "other": "O", "non-binary": "O", "nonbinary": "O"
+    },
+    "Status": {
+        "active": "Active",
+        "resigned": "Resigned", "voluntary": "Resigned",
+        "terminated": "Terminated", "involuntary": "Terminated"
+    }
+}
+
+# ==================================================
+# LAYOUTS (signature columns → renames; "skip_rules" = data quality
+# rules that do not apply, e.g. "duplicate_employee_id" for snapshot
+# extracts without a Snapshot_Date). Built-in only: a tenant passes
+# its own {"name", "columns", "skip_rules"} as `layout` instead.
+# ==================================================
+LAYOUTS = {
+    "hr_master": {
+        "signature": ["Termination_Date", "Job_Level"],
+        "columns": {}
+    },
+    "enterprise": {
+        "signature": ["Exit_Date", "Risk_Score"],
+        "columns": {"Exit_Date": "Termination_Date"}
+    }
+}
+
+# Renames applied whatever the layout (column names compared lower-cased)
+COLUMN_ALIASES = {
+    "emp_id": "Employee_ID", "employee_id": "Employee_ID",
+    "exit_date": "Termination_Date", "termination_date": "Termination_Date",
+    "sex": "Gender",
+    "snapshot_date": "Snapshot_Date", "as_of_date": "Snapshot_Date"
+}
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def resolve_layout(layout, columns):
+    """
+    (name, definition) for a built-in layout name, a tenant's own
+    definition {"name", "columns", "skip_rules"} or None (detected)
+    """
+    if isinstance(layout, dict):
+        return layout.get("name", "custom"), layout
+    name = layout or detect_layout(columns)
+    return name, LAYOUTS.get(name, {})
+
+
+def detect_layout(columns):
+    """
+    Layout whose signature columns are all present (most specific
+    first), "custom" when none matches
+    """
+    present = set(columns)
+    matches = [
+        name for name, layout in LAYOUTS.items()
+        if set(layout["signature"]) <= present
+    ]
+    if not matches:
+        return "custom"
+    return max(matches, key=lambda name: len(LAYOUTS[name]["signature"]))
+
+
+# ==================================================
+# MAPPING
+# ==================================================
+def remap_values(series, mapping):
+    """
+    Categorical with values replaced via `mapping` (lower-cased keys);
+    the lookup runs once per distinct value
+    """
+    codes, uniques = pd.factorize(series)
+    targets = pd.Index([mapping.get(str(v).strip().lower(), v) for v in uniques])
+    categories = pd.Index(sorted(set(targets), key=str))
+    lookup = categories.get_indexer(targets)
+    codes = np.where(codes >= 0, lookup[codes] if len(lookup) else codes, -1)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _rename_map(columns, definition):
+    renames = dict(definition.get("columns", {}))
+    for col in columns:
+        alias = COLUMN_ALIASES.get(col.lower())
+        if alias and col not in renames and alias != col:
+            renames[col] = alias
+
+    # Never rename onto a column the dataset already has
+    return {
+        src: dst for src, dst in renames.items()
+        if src in columns and dst not in columns
+    }
+
+
+def _coerce(df, col, kind, problems):
+    raw = df[col]
+    if kind == "date":
+        values = pd.to_datetime(raw, errors="coerce")
+    elif kind == "number":
+        if pd.api.types.is_numeric_dtype(raw):
+            return
+        values = pd.to_numeric(raw, errors="coerce")
+    else:
+        return
+
+    bad = int((values.isna() & raw.notna()).sum())
+    if bad and bad == int(raw.notna().sum()):
+        problems.append(f"{col}: no value parses as a {kind}")
+    elif bad:
+        logging.warning(f"Schema: {bad} unparseable {col} values set to missing")
+    df[col] = values
+
+
+def map_schema(df, layout=None):
+    """
+    New frame renamed / remapped / type-checked into the canonical
+    schema (the caller's frame is left as it was). Raises SchemaError
+    listing every blocking problem.
+    """
+    layout, definition = resolve_layout(layout, df.columns)
+
+    renames = _rename_map(list(df.columns), definition)
+    # Shallow: columns are replaced below, never written into
+    df = df.rename(columns=renames) if renames else df.copy(deep=False)
+
+    problems = []
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        problems.append(f"missing required columns: {', '.join(missing)}")
+
+    for col, mapping in VALUE_MAPS.items():
+        if col in df.columns:
+            df[col] = remap_values(df[col], mapping)
+
+    for col, kind in CANONICAL_TYPES.items():
+        if col in df.columns:
+            _coerce(df, col, kind, problems)
+
+    if "Status" in df.columns:
+        unknown = [v for v in df["Status"].cat.categories if v not in STATUS_VALUES]
+        if len(unknown) == len(df["Status"].cat.categories) and unknown:
+            problems.append(f"Status: no known values ({', '.join(map(str, unknown[:5]))})")
+        elif unknown:
+            logging.warning(f"Schema: unknown Status values {unknown[:5]} count as neither active nor exited")
+
+    if problems:
+        raise SchemaError(f"{layout} layout: " + "; ".join(problems))
+
+    df.attrs["layout"] = layout
+    df.attrs["skip_rules"] = list(definition.get("skip_rules", []))
+    logging.info(f"Schema: {layout} layout, {len(renames)} columns renamed")
+    return df
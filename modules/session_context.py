@@ -0,0 +1,164 @@
+# modules/session_context.py
+#
+# Follow-up questions without the LLM. A session keeps the last
+# resolved request (metric, dimension, filters, window, chart) and its
+# answer. A follow-up such as "now by location", "as a pie chart",
+# "only Berlin" or "what about salary" is parsed as a DELTA and merged
+# into that request locally; the router then answers the merged
+# request straight from the data (and its answer cache). A session only
+# continues on the rows its last answer came from: another tenant, role
+# or dataset version starts over.
+
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from config import SESSION_LIMIT
+from modules.charts import build_chart
+
+# Phrases that mark a question as continuing the previous one
+FOLLOWUP_CUES = re.compile(
+    r"^(?:now|and|also|then|ok(?:ay)?|so|but|same|just|only|what about|how about|instead)\b|\binstead\b"
+)
+
+AS_TABLE = re.compile(r"\b(?:as|in|into) (?:a )?table\b|\btabular\b")
+NO_BREAKDOWN = re.compile(r"\b(?:overall|in total|no breakdown|without (?:a )?breakdown)\b")
+ALL_TIME = re.compile(r"\b(?:all time|whole period|any time)\b")
+NO_FILTERS = re.compile(r"\b(?:everyone|all employees|whole company|no filters?|remove (?:the )?filters?|clear (?:the )?filters?)\b")
+
+# Longer follow-ups are almost always new questions
+MAX_FOLLOWUP_WORDS = 12
+
+
+def dataset_scope(df):
+    """
+    (tenant, dataset version, role) of the frame an answer came from
+    """
+    return (df.attrs.get("tenant"), df.attrs.get("version"), df.attrs.get("role"))
+
+
+class SessionContext:
+
+    def __init__(self):
+        self.last = None
+        self.last_result = None
+        self.scope = None
+        self._lock = threading.Lock()
+
+    def remember(self, request, result, scope=None):
+        """
+        Keeps the resolved request + its answer (only answers with a
+        metric) and the dataset_scope they belong to
+        """
+        if not request.get("metric"):
+            return
+        with self._lock:
+            self.last = dict(request)
+            self.last_result = result
+            self.scope = scope
+
+    def clear(self):
+        with self._lock:
+            self.last = None
+            self.last_result = None
+            self.scope = None
+
+    # ---------------------------
+    # Delta → merged request
+    # ---------------------------
+    def resolve(self, request, scope=None):
+        """
+        Merged request when `request` (parse_query output) is a
+        follow-up of the last answer in the same `scope`, else None.
+        The merged request lists what changed under "delta".
+        """
+        with self._lock:
+            last, last_scope = self.last, self.scope
+        if last is None or last_scope != scope or request["type"] not in ("METRIC", "GENERAL", "EXPLANATION"):
+            return None
+
+        q = request["text"]
+        if len(q.split()) > MAX_FOLLOWUP_WORDS:
+            return None
+
+        # A question with its own metric is new unless it is cued
+        # ("attrition by location" ≠ "now by location")
+        cue = FOLLOWUP_CUES.search(q) is not None
+        if request["metric"] and not cue:
+            return None
+        delta = {}
+
+        if request["dimension"]:
+            delta["dimension"] = request["dimension"]
+        elif NO_BREAKDOWN.search(q):
+            delta["dimension"] = None
+
+        if AS_TABLE.search(q):
+            delta["wants_chart"] = False
+        elif request["wants_chart"] or request["chart"] != "NONE":
+            delta["wants_chart"] = True
+            delta["chart"] = request["chart"] if request["chart"] != "NONE" else last["chart"]
+
+        if NO_FILTERS.search(q):
+            delta["filters"] = {}
+        elif request["filters"]:
+            # Same column → replace ("what about London" after Berlin)
+            delta["filters"] = {**last["filters"], **request["filters"]}
+
+        if request["window"] is not None:
+            delta["window"] = request["window"]
+        elif ALL_TIME.search(q):
+            delta["window"] = None
+
+        if request["metric"] and request["metric"] != last["metric"]:
+            delta["metric"] = request["metric"]
+
+        if not delta:
+            return None
+
+        merged = {**last, **delta, "text": q, "delta": sorted(delta)}
+        if {"dimension", "filters", "window"} & set(delta):
+            merged["comparison"] = None
+        return merged
+
+    def reuse(self, merged, scope=None):
+        """
+        Answer rebuilt from the last one when only the chart changed
+        (never across scopes: the rows may differ)
+        """
+        with self._lock:
+            result, last_scope = self.last_result, self.scope
+        if (
+            last_scope == scope
+            and merged["delta"] in (["chart", "wants_chart"], ["wants_chart"])
+            and merged["wants_chart"]
+            and merged.get("dimension")
+            and isinstance(result, pd.DataFrame)
+            and result.shape[1] == 2
+        ):
+            return build_chart(result, merged["chart"])
+        return None
+
+
+# ==================================================
+# SESSIONS (API clients pass a session_id)
+# ==================================================
+_sessions = OrderedDict()
+_sessions_lock = threading.Lock()
+
+
+def get_session(session_id):
+    """
+    SessionContext for an id; least recently used ones are dropped
+    beyond SESSION_LIMIT
+    """
+    with _sessions_lock:
+        session = _sessions.get(session_id)
+        if session is None:
+            session = _sessions[session_id] = SessionContext()
+        _sessions.move_to_end(session_id)
+        while len(_sessions) > SESSION_LIMIT:
+            _sessions.popitem(last=False)
+        return session
@@ -0,0 +1,252 @@
+# modules/shared_store.py
+#
+# Read-only dataset store shared by every Streamlit session / worker
+# process on the host. Columns are written once as .npy files under
+# /dev/shm and memory-mapped by readers (zero-copy, no pickling).
+#
+#   <root>/<name>/<version>/manifest.json
+#   <root>/<name>/<version>/<column>.npy
+#   <root>/<name>/CURRENT          → version readers should map
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev setups only
+    fcntl = None
+
+from modules.data_optimizer import employee_id_labels, register_employee_labels
+
+SHARED_ROOT = os.getenv(
+    "HR_SHARED_DIR",
+    "/dev/shm/hrgpt" if os.path.isdir("/dev/shm") else os.path.join(tempfile.gettempdir(), "hrgpt")
+)
+
+# Old versions kept on disk for readers still mapping them
+KEEP_VERSIONS = 2
+# A stale copy served because the loader failed is kept this long before retrying
+STALE_RETRY_SECONDS = 60
+
+_attached = {}
+_attach_lock = threading.Lock()
+
+
+# ==================================================
+# PATHS
+# ==================================================
+def _dataset_dir(name):
+    return os.path.join(SHARED_ROOT, name)
+
+
+def current_version(name):
+    try:
+        with open(os.path.join(_dataset_dir(name), "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _column_file(col):
+    return "".join(c if c.isalnum() or c in "_-" else "_" for c in str(col)) + ".npy"
+
+
+# ==================================================
+# PUBLISH (one writer)
+# ==================================================
+def publish(df, name="hr_master"):
+    """
+    Writes a new immutable version and swaps CURRENT to it atomically
+    """
+    base = _dataset_dir(name)
+    os.makedirs(base, exist_ok=True)
+
+    version = f"v{time.time_ns()}"
+    tmp_dir = os.path.join(base, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        entry = {"name": col, "file": _column_file(col)}
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry["kind"] = "category"
+            entry["categories"] = series.cat.categories.tolist()
+            entry["ordered"] = bool(series.cat.ordered)
+            values = series.cat.codes.to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            entry["kind"] = "datetime"
+            values = series.to_numpy()
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            entry["kind"] = "numeric"
+            values = series.to_numpy()
+        else:
+            # Free text is stored fixed-width; readers get a copy
+            entry["kind"] = "string"
+            values = series.astype(str).to_numpy().astype("U")
+
+        np.save(os.path.join(tmp_dir, entry["file"]), values, allow_pickle=False)
+        columns.append(entry)
+
+    manifest = {
+        "version": version,
+        "rows": len(df),
+        "published_at": time.time(),
+        "columns": columns,
+        "employee_id_labels": employee_id_labels(df)
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, default=str)
+
+    os.rename(tmp_dir, os.path.join(base, version))
+
+    pointer = os.path.join(base, f".CURRENT.{os.getpid()}")
+    with open(pointer, "w") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(base, "CURRENT"))
+
+    _prune(name, keep=version)
+    logging.info(f"Shared dataset {name} published: {version} ({len(df)} rows)")
+
+    return version
+
+
+def _prune(name, keep):
+    base = _dataset_dir(name)
+    versions = sorted(v for v in os.listdir(base) if v.startswith("v"))
+    for old in versions[:-KEEP_VERSIONS]:
+        if old != keep:
+            # Mapped pages stay valid for readers until they re-attach
+            shutil.rmtree(os.path.join(base, old), ignore_errors=True)
+
+
+# ==================================================
+# ATTACH (every reader)
+# ==================================================
+def attach(name="hr_master", version=None):
+    """
+    Maps a published version as a read-only DataFrame (zero-copy)
+    """
+    version = version or current_version(name)
+    if version is None:
+        return None
+
+    vdir = os.path.join(_dataset_dir(name), version)
+    with open(os.path.join(vdir, "manifest.json")) as f:
+        manifest = json.load(f)
+
+    data = {}
+    for entry in manifest["columns"]:
+        values = np.load(os.path.join(vdir, entry["file"]), mmap_mode="r", allow_pickle=False)
+
+        if entry["kind"] == "category":
+            data[entry["name"]] = pd.Categorical.from_codes(
+                values,
+                categories=entry["categories"],
+                ordered=entry["ordered"],
+                validate=False
+            )
+        elif entry["kind"] == "string":
+            data[entry["name"]] = values.astype(object)
+        else:
+            data[entry["name"]] = values
+
+    df = pd.DataFrame(data, copy=False)
+
+    if manifest.get("employee_id_labels") is not None:
+        register_employee_labels(df, manifest["employee_id_labels"])
+
+    df.attrs["shared_version"] = version
+    df.attrs["published_at"] = manifest["published_at"]
+    return df
+
+
+def _is_mapped(values):
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = getattr(values, "base", None)
+    return False
+
+
+def private_nbytes(df):
+    """
+    Bytes df holds in this process: columns still mapped from the store
+    are shared pages (once per host), not counted
+    """
+    total = int(df.index.memory_usage())
+    for col in df.columns:
+        series = df[col]
+        size = int(series.memory_usage(deep=True, index=False))
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            values = series.cat.codes.to_numpy()
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_datetime64_any_dtype(series):
+            values = series.to_numpy()
+        else:
+            values = None
+
+        if values is not None and _is_mapped(values):
+            size -= values.nbytes
+        total += size
+    return total
+
+
+def release(name):
+    """
+    Drops this process' view of a dataset (tenant evicted); the files
+    stay for other processes
+    """
+    with _attach_lock:
+        _attached.pop(name, None)
+
+
+def get_shared_dataset(name, loader, ttl=300):
+    """
+    Per-process view of the shared dataset.
+    - Re-maps only when CURRENT changes (one small file read per call)
+    - First process to find it missing/stale loads + publishes under a lock
+    """
+    version = current_version(name)
+    cached = _attached.get(name)
+
+    if version and cached is not None and cached.attrs["shared_version"] == version:
+        now = time.time()
+        if now - cached.attrs["published_at"] < ttl or now < cached.attrs.get("retry_at", 0):
+            return cached
+
+    with _attach_lock:
+        os.makedirs(_dataset_dir(name), exist_ok=True)
+        with open(os.path.join(_dataset_dir(name), ".lock"), "w") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                version = current_version(name)
+                df = attach(name, version) if version else None
+
+                if df is None or time.time() - df.attrs["published_at"] >= ttl:
+                    fresh = loader()
+                    if fresh is None or fresh.empty:
+                        if df is None:
+                            return fresh
+                        # Keep serving the stale copy rather than nothing,
+                        # without calling the loader again on every request
+                        logging.warning(f"Shared dataset {name}: reload failed, serving {version}")
+                        df.attrs["retry_at"] = time.time() + STALE_RETRY_SECONDS
+                    else:
+                        df = attach(name, publish(fresh, name))
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+        _attached[name] = df
+        return df
@@ -0,0 +1,322 @@
+# modules/snapshot_store.py
+#
+# Monthly workforce snapshots. Every month (first hire → as-of date) is
+# materialized once as a small Parquet partition of workforce STATE
+# counts per (Department, Location, Job_Level, Gender, Hire_Year):
+#
+#   Active  employees on payroll at month end
+#   Hired   hires during the month
+#   Exited  exits during the month
+#
+#   <root>/<name>/month=YYYY-MM/part.parquet
+#   <root>/<name>/manifest.json        → per-month totals / checksum + version
+#
+# A refresh recomputes the monthly counts in one vectorized pass
+# (bincount over hire / exit months) and WRITES only months that are
+# new or whose totals changed — normally just the latest month.
+# Monthly trends and rolling attrition then read the partitions (once
+# per store version) instead of replaying hire / exit history. Cohort
+# retention is Kaplan–Meier (modules/survival.py) for every breakdown.
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from config import SNAPSHOT_DIR
+from modules.filter_engine import build_mask
+from modules.time_index import get_time_index, _days, _month_id, TERMINATION_COLUMNS, _NAT
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    ds = None
+    pq = None
+
+# Grouping kept in every snapshot (those present in the dataset)
+SNAPSHOT_COLUMNS = ["Department", "Location", "Job_Level", "Gender", "Hire_Year"]
+COUNT_COLUMNS = ["Active", "Hired", "Exited"]
+
+
+def _label(month):
+    """
+    months since epoch → "YYYY-MM"
+    """
+    return str(np.datetime64(int(month), "M"))
+
+
+class SnapshotStore:
+
+    def __init__(self, root=SNAPSHOT_DIR, name="hr_master"):
+        if pq is None:
+            raise ValueError("Snapshots need pyarrow (pip install pyarrow)")
+
+        self.path = os.path.join(root, name)
+        self.manifest = self._read_manifest()
+        self._frame = None
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Manifest
+    # ---------------------------
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.path, "manifest.json")) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"version": None, "columns": [], "months": {}}
+
+    def _write_manifest(self):
+        fd, tmp = tempfile.mkstemp(dir=self.path, prefix=".manifest.", suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp, os.path.join(self.path, "manifest.json"))
+
+    @property
+    def months(self):
+        return sorted(self.manifest["months"])
+
+    # ---------------------------
+    # Materialize
+    # ---------------------------
+    @staticmethod
+    def monthly_counts(df):
+        """
+        (month labels, group frame, counts[3, months, groups]) for
+        every month from the first hire to the as-of date
+        """
+        time_index = get_time_index(df)
+        columns = [c for c in SNAPSHOT_COLUMNS if c in df.columns]
+
+        term_col = next(c for c in TERMINATION_COLUMNS if c in df.columns)
+        hire = _days(df["Hire_Date"])
+        term = _days(df[term_col])
+        has_hire = hire != _NAT
+        has_term = (term != _NAT) & has_hire
+        # Same rule as the time index: exit before hire → leaves on the hire day
+        term = np.where(has_term, np.maximum(term, hire), _NAT)
+
+        groups = df[columns].groupby(columns, observed=True, dropna=False, sort=True)
+        codes = groups.ngroup().to_numpy()
+        keys = groups.size().index.to_frame(index=False)
+
+        n_months, n_groups = time_index.n_months, len(keys)
+        hire_m = _month_id(hire[has_hire]) - time_index.month0
+        term_m = _month_id(term[has_term]) - time_index.month0
+
+        def count(months, g):
+            return np.bincount(months * n_groups + g, minlength=n_months * n_groups).reshape(n_months, n_groups)
+
+        hired = count(hire_m, codes[has_hire])
+        exited = count(term_m, codes[has_term])
+        # On payroll at month end: hired in / before the month, exit month not reached
+        active = np.cumsum(hired - exited, axis=0)
+
+        labels = [_label(time_index.month0 + m) for m in range(n_months)]
+        return labels, keys, np.stack([active, hired, exited])
+
+    def refresh(self, df):
+        """
+        Writes the months that are new or changed; returns their labels
+        """
+        started = time.perf_counter()
+        labels, keys, counts = self.monthly_counts(df)
+        columns = list(keys.columns)
+
+        known = self.manifest["months"] if self.manifest["columns"] == columns else {}
+        totals = counts.sum(axis=2)
+
+        # Order-free checksum of each month's cells (group hash × counts),
+        # so a moved employee rewrites the month even when totals match
+        key_hash = pd.util.hash_pandas_object(keys, index=False).to_numpy(np.uint64)
+        mixed = (counts.astype(np.uint64) * np.array([1, 1 << 21, 1 << 42], dtype=np.uint64)[:, None, None]).sum(axis=0)
+        digests = (mixed * key_hash).sum(axis=1)
+
+        key_table = pa.Table.from_pandas(keys, preserve_index=False)
+        written = []
+        for m, label in enumerate(labels):
+            entry = dict(zip(COUNT_COLUMNS, map(int, totals[:, m])))
+            entry["digest"] = f"{digests[m]:016x}"
+            if known.get(label) == entry:
+                continue
+
+            cells = counts[:, m, :]
+            keep = cells.any(axis=0)
+            table = key_table.filter(pa.array(keep))
+            for i, col in enumerate(COUNT_COLUMNS):
+                table = table.append_column(col, pa.array(cells[i, keep].astype(np.int32)))
+
+            month_dir = os.path.join(self.path, f"month={label}")
+            os.makedirs(month_dir, exist_ok=True)
+            # Unique temp name: other threads / processes may refresh the same month
+            fd, tmp = tempfile.mkstemp(dir=month_dir, prefix=".part.", suffix=".parquet")
+            os.close(fd)
+            pq.write_table(table, tmp, compression="zstd")
+            os.replace(tmp, os.path.join(month_dir, "part.parquet"))
+
+            known[label] = entry
+            written.append(label)
+
+        if written or self.manifest["columns"] != columns:
+            self.manifest = {
+                "version": f"v{time.time_ns()}",
+                "columns": columns,
+                "months": {label: known[label] for label in labels}
+            }
+            os.makedirs(self.path, exist_ok=True)
+            self._write_manifest()
+
+            logging.info(
+                f"Snapshots: {len(written)} of {len(labels)} months written "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+        return written
+
+    # ---------------------------
+    # Read
+    # ---------------------------
+    def frame(self):
+        """
+        Every partition as one DataFrame (Month + groups + counts),
+        read once per store version
+        """
+        with self._lock:
+            if self._frame is not None and self._frame[0] == self.manifest["version"]:
+                return self._frame[1]
+
+        # Manifest months only: partitions of months no longer in the data are ignored
+        dataset = ds.dataset(
+            [os.path.join(self.path, f"month={m}", "part.parquet") for m in self.months],
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("month", pa.string())]), flavor="hive"),
+            partition_base_dir=self.path
+        )
+        frame = dataset.to_table().to_pandas().rename(columns={"month": "Month"})
+
+        # Few distinct values: parse / encode each once
+        codes, months = pd.factorize(frame["Month"])
+        frame["Month"] = pd.PeriodIndex(months, freq="M").take(codes)
+        for col in frame.columns.difference(COUNT_COLUMNS + ["Month", "Hire_Year"]):
+            if frame[col].dtype == object or pd.api.types.is_string_dtype(frame[col]):
+                frame[col] = frame[col].astype("category")
+
+        with self._lock:
+            self._frame = (self.manifest["version"], frame)
+        return frame
+
+    def _select(self, filters=None):
+        frame = self.frame()
+        return frame[build_mask(frame, filters)] if filters else frame
+
+    def _pivot(self, frame, value, column=None):
+        """
+        Month × (total | column values) sums of one count column
+        """
+        if column is None:
+            return frame.groupby("Month")[value].sum()
+        return frame.groupby(["Month", column], observed=True)[value].sum().unstack(fill_value=0)
+
+    # ---------------------------
+    # Trend queries
+    # ---------------------------
+    def monthly(self, metric, column=None, filters=None, start=None, end=None):
+        """
+        Headcount at each month end, or monthly attrition rate
+        (exits / headcount at the start of the month)
+        """
+        frame = self._select(filters)
+        active = self._pivot(frame, "Active", column)
+
+        if metric == "headcount":
+            data = active
+        else:
+            exited = self._pivot(frame, "Exited", column)
+            opening = active.shift(1)
+            data = (exited / opening.where(opening > 0) * 100).round(2).fillna(0)
+
+        lo = pd.Period(start, freq="M") if start is not None else None
+        hi = pd.Period(pd.Timestamp(end) - pd.Timedelta(days=1), freq="M") if end is not None else None
+        return data.loc[lo:hi]
+
+    def yearly(self, metric, filters=None):
+        """
+        Headcount at each year end / exits per calendar year
+        """
+        frame = self._select(filters)
+        if metric == "headcount":
+            series = self._pivot(frame, "Active")
+            data = series.groupby(series.index.year).last()
+        else:
+            series = self._pivot(frame, "Exited")
+            data = series.groupby(series.index.year).sum()
+        return data.rename_axis("Year")
+
+    def rolling_attrition(self, months=12, column=None, filters=None, start=None, end=None):
+        """
+        Exits over the trailing `months` / average month-end headcount
+        over the same months, at every month with enough history
+        """
+        frame = self._select(filters)
+        exits = self._pivot(frame, "Exited", column).rolling(months).sum()
+        average = self._pivot(frame, "Active", column).rolling(months).mean()
+        data = (exits / average.where(average > 0) * 100).round(2).dropna(how="all")
+
+        lo = pd.Period(start, freq="M") if start is not None else None
+        hi = pd.Period(pd.Timestamp(end) - pd.Timedelta(days=1), freq="M") if end is not None else None
+        return data.loc[lo:hi]
+
+
+# ==================================================
+# CACHE (one refreshed store per dataset name, e.g. per tenant)
+# ==================================================
+_cache = {}
+_cache_lock = threading.Lock()
+# One create + refresh at a time per (root, name)
+_build_locks = {}
+
+
+def get_snapshots(df, root=SNAPSHOT_DIR, name=None):
+    if name is None:
+        # Row-level security: a role's rows get their own store
+        name = df.attrs.get("dataset", "hr_master")
+        if df.attrs.get("role"):
+            name = f"{name}@{df.attrs['role']}"
+    key = (root, name)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] is df:
+            return entry[1]
+        build_lock = _build_locks.setdefault(key, threading.Lock())
+
+    with build_lock:
+        # Another thread may have refreshed it while this one waited
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry is not None and entry[0] is df:
+                return entry[1]
+
+        store = SnapshotStore(root, name)
+        store.refresh(df)
+
+        with _cache_lock:
+            _cache[key] = (df, store)
+    return store
+
+
+def drop_snapshots(name):
+    """
+    Forgets the cached stores of a dataset and its role views (files
+    stay on disk)
+    """
+    with _cache_lock:
+        for key in [k for k in _cache if k[1] == name or k[1].startswith(f"{name}@")]:
+            del _cache[key]
@@ -0,0 +1,276 @@
+# modules/sql_backend.py
+#
+# Embedded SQL execution backend for the metric engine.
+# data/*.csv → one local database file (DuckDB if installed, else SQLite
+# with indexes); metric/dimension/filter specs compile to ONE aggregate
+# query, so the grouping runs inside the database engine.
+#
+# Build:  python scripts/build_analytics_db.py
+
+import glob
+import logging
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+import pandas as pd
+
+from config import SQL_DB_PATH, SQL_ENGINE, SQL_MASTER_CSV, QUALITY_CHECKS
+from modules.metric_registry import HR_METRICS
+from modules.schema_registry import DIMENSIONS
+from modules.schema_mapper import map_schema
+from modules.data_quality import validate
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+DEFAULT_DB_PATH = SQL_DB_PATH
+DEFAULT_ENGINE = SQL_ENGINE or ("duckdb" if duckdb else "sqlite")
+
+INDEXED_COLUMNS = [
+    "Employee_ID", "Status", "Department", "Location",
+    "Gender", "Job_Level", "Hire_Year", "Exit_Year"
+]
+
+
+# ==================================================
+# BUILD
+# ==================================================
+def prepare_table(df):
+    """
+    Same derived columns the pandas path adds in prepare_master
+    """
+    if "Employee_ID" in df.columns:
+        df["Employee_ID"] = df["Employee_ID"].astype(str)
+
+    for col in [c for c in df.columns if c.endswith("_Date")]:
+        df[col] = pd.to_datetime(df[col], errors="coerce")
+
+    if "Hire_Date" in df.columns:
+        df["Hire_Year"] = df["Hire_Date"].dt.year
+        df["Hire_Month"] = df["Hire_Date"].dt.month
+
+    if "Termination_Date" in df.columns:
+        df["Exit_Year"] = df["Termination_Date"].dt.year
+
+    return df
+
+
+def _connect(path, engine):
+    if engine == "duckdb":
+        if duckdb is None:
+            raise ImportError("duckdb is not installed (pip install duckdb)")
+        return duckdb.connect(path)
+    return sqlite3.connect(path, check_same_thread=False)
+
+
+def _write_table(conn, engine, name, df):
+    if engine == "duckdb":
+        conn.register("_incoming", df)
+        conn.execute(f'CREATE OR REPLACE TABLE "{name}" AS SELECT * FROM _incoming')
+        conn.unregister("_incoming")
+        return
+
+    df.to_sql(name, conn, if_exists="replace", index=False, chunksize=50_000)
+    for col in INDEXED_COLUMNS:
+        if col in df.columns:
+            conn.execute(f'CREATE INDEX "ix_{name}_{col}" ON "{name}" ("{col}")')
+
+
+def build_database(data_dir="data", path=DEFAULT_DB_PATH, engine=DEFAULT_ENGINE, frames=None):
+    """
+    (Re)builds the database file atomically from data/*.csv.
+    `frames` ({table: DataFrame}) overrides the CSVs (benchmarks).
+    """
+    if frames is None:
+        frames = {}
+        for csv in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+            name = os.path.splitext(os.path.basename(csv))[0]
+            frames[name] = pd.read_csv(csv)
+        master = os.path.splitext(SQL_MASTER_CSV)[0]
+        if master in frames:
+            frames["hr_master"] = frames[master]
+
+    tmp_path = f"{path}.building"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    start = time.perf_counter()
+    conn = _connect(tmp_path, engine)
+    try:
+        for name, df in frames.items():
+            if name == "hr_master":
+                # Same rows / values the pandas path serves
+                df = map_schema(df.copy())
+                if QUALITY_CHECKS:
+                    df = validate(df)
+            _write_table(conn, engine, name, prepare_table(df.copy()))
+            logging.info(f"SQL backend: {name} ({len(df)} rows)")
+        conn.commit()
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, path)
+    logging.info(f"SQL backend built: {path} [{engine}] in {time.perf_counter() - start:.1f}s")
+    return path
+
+
+# ==================================================
+# COMPILE SPEC → SQL
+# ==================================================
+def _quote(col):
+    return '"' + col.replace('"', '""') + '"'
+
+
+def _where(filters, columns):
+    clauses, params = [], []
+
+    for col, value in (filters or {}).items():
+        if col not in columns:
+            raise ValueError(f"Unknown filter column: {col}")
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        clauses.append(f"{_quote(col)} IN ({', '.join('?' for _ in values)})")
+        params += [str(v) if col == "Employee_ID" else v for v in values]
+
+    return clauses, params
+
+
+def compile_metric(metric, dimension=None, filters=None, columns=(), table="hr_master"):
+    """
+    Returns (sql, params, kind) or None if the spec is unsupported
+    """
+    cfg = HR_METRICS.get(metric)
+    if not cfg:
+        return None
+
+    dim_col = None
+    if dimension and dimension != "NONE":
+        # Dimension key or column name, as in query_engine.compute_metric;
+        # only the table's own columns ever reach the SQL
+        dim_col = DIMENSIONS.get(dimension, dimension)
+        if dim_col not in columns:
+            return None
+
+    # "gender by gender" is just the distribution
+    if cfg["type"] == "distribution" and dim_col == cfg["column"]:
+        dim_col = None
+
+    clauses, params = _where(filters, columns)
+    metric_clauses, metric_params = _where(cfg.get("filter"), columns)
+    clauses += metric_clauses
+    params += metric_params
+
+    if dim_col:
+        clauses.append(f"{_quote(dim_col)} IS NOT NULL")
+
+    col = _quote(cfg["column"])
+    if cfg["type"] == "count":
+        select = f"COUNT(DISTINCT {col}) AS value"
+    elif cfg["type"] == "avg":
+        select = f"AVG({col}) AS value"
+    elif cfg["type"] == "ratio":
+        positive = ", ".join("?" for _ in cfg["positive"])
+        select = (
+            f'COUNT(DISTINCT CASE WHEN {col} IN ({positive}) THEN "Employee_ID" END) AS exited, '
+            f'COUNT(DISTINCT "Employee_ID") AS total'
+        )
+        params = list(cfg["positive"]) + params
+    elif cfg["type"] == "distribution":
+        select = f"{col} AS category, COUNT(*) AS value"
+    else:
+        return None
+
+    group = [_quote(dim_col)] if dim_col else []
+    if cfg["type"] == "distribution":
+        group.append(col)
+
+    select_parts = ([f"{_quote(dim_col)} AS dim"] if dim_col else []) + [select]
+    sql = f"SELECT {', '.join(select_parts)} FROM {_quote(table)}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    if group:
+        sql += " GROUP BY " + ", ".join(group)
+        sql += " ORDER BY value DESC" if cfg["type"] == "distribution" else " ORDER BY dim"
+
+    return sql, params, cfg["type"]
+
+
+# ==================================================
+# EXECUTION
+# ==================================================
+class SQLBackend:
+
+    def __init__(self, path=DEFAULT_DB_PATH, engine=DEFAULT_ENGINE):
+        if not os.path.exists(path):
+            build_database(path=path, engine=engine)
+
+        self.path = path
+        self.engine = engine
+        self.conn = _connect(path, engine) if engine == "sqlite" else duckdb.connect(path, read_only=True)
+        self._lock = threading.Lock()
+        self._columns = {}
+
+    def columns(self, table="hr_master"):
+        if table not in self._columns:
+            cursor = self.conn.execute(f"SELECT * FROM {_quote(table)} LIMIT 0")
+            self._columns[table] = [d[0] for d in cursor.description]
+        return self._columns[table]
+
+    def query(self, sql, params=()):
+        if self.engine == "duckdb":
+            # One cursor per call: DuckDB runs them in parallel
+            cursor = self.conn.cursor().execute(sql, params)
+            rows = cursor.fetchall()
+        else:
+            with self._lock:
+                cursor = self.conn.execute(sql, params)
+                rows = cursor.fetchall()
+
+        names = [d[0] for d in cursor.description]
+        return pd.DataFrame(rows, columns=names)
+
+    def compute_metric(self, metric, dimension=None, filters=None, table="hr_master"):
+        """
+        Same result shape as query_engine.compute_metric
+        """
+        compiled = compile_metric(metric, dimension, filters, self.columns(table), table)
+        if compiled is None:
+            return None
+
+        sql, params, kind = compiled
+        result = self.query(sql, params)
+        has_dim = "dim" in result.columns
+        dim_name = DIMENSIONS.get(dimension, dimension) if has_dim else None
+
+        if kind == "ratio":
+            if not has_dim:
+                total = int(result["total"].iloc[0])
+                return round(int(result["exited"].iloc[0]) / total * 100, 2) if total else 0
+            series = (result["exited"] / result["total"] * 100).fillna(0).round(2)
+            return pd.Series(series.to_numpy(), index=pd.Index(result["dim"], name=dim_name))
+
+        if kind == "distribution":
+            category = HR_METRICS[metric]["column"]
+            keys = [result["dim"], result["category"]] if has_dim else [result["category"]]
+            names = [dim_name, category] if has_dim else [category]
+            index = pd.MultiIndex.from_arrays(keys, names=names) if has_dim else pd.Index(keys[0], name=category)
+            return pd.Series(result["value"].to_numpy(), index=index, name="count")
+
+        values = result["value"]
+        if kind == "avg":
+            values = values.astype(float).round(2)
+
+        if not has_dim:
+            value = values.iloc[0]
+            return value.item() if hasattr(value, "item") else value
+
+        return pd.Series(values.to_numpy(), index=pd.Index(result["dim"], name=dim_name))
+
+
+@lru_cache(maxsize=1)
+def get_sql_backend(path=DEFAULT_DB_PATH, engine=DEFAULT_ENGINE):
+    return SQLBackend(path, engine)
@@ -0,0 +1,202 @@
+# modules/star_schema.py
+#
+# Star-schema view over the per-domain sheets written by
+# scripts/derive_sheets.py. employees_master is the dimension table;
+# every other sheet is a fact table keyed on Employee_ID.
+#
+# Nothing is joined up front: frame(columns) reads ONLY the requested
+# columns (usecols) from the sheets that own them and joins them on an
+# int32 surrogate key.
+
+import logging
+import os
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from modules.data_optimizer import SharedAttr, optimize_dtypes, register_employee_labels
+from modules.metric_registry import HR_METRICS
+from modules.schema_registry import DIMENSIONS
+
+DIMENSION_TABLE = "employees"
+
+SHEETS = {
+    "employees": "employees_master.csv",
+    "compensation": "compensation.csv",
+    "performance": "performance.csv",
+    "engagement": "engagement.csv",
+    "experience": "experience.csv",
+    "attrition": "attrition.csv"
+}
+
+# Columns computed from another column after the read
+DERIVED = {
+    "Hire_Year": ("Hire_Date", lambda s: s.dt.year),
+    "Hire_Month": ("Hire_Date", lambda s: s.dt.month),
+    "Exit_Year": ("Termination_Date", lambda s: s.dt.year)
+}
+
+DATE_COLUMNS = ["Hire_Date", "Termination_Date", "Exit_Date"]
+
+# Aggregations cross_domain accepts (anything else is a 400 at the API)
+CROSS_DOMAIN_AGGS = ("mean", "median", "sum", "min", "max", "count")
+
+
+def _empty_column(dtype, size, full):
+    """
+    Target array for a scatter join; missing rows get NaN / NaT / None
+    """
+    if full:
+        return np.empty(size, dtype=dtype)
+    if np.issubdtype(dtype, np.datetime64):
+        return np.full(size, np.datetime64("NaT"), dtype=dtype)
+    if dtype == object:
+        return np.full(size, None, dtype=object)
+    return np.full(size, np.nan)
+
+
+class StarSchema:
+
+    def __init__(self, data_dir="data"):
+        self.data_dir = data_dir
+        self.owners = {}
+        self._columns = {}
+
+        # Header-only reads: which sheet owns which column.
+        # The dimension table wins for shared attributes (Department, ...)
+        tables = [DIMENSION_TABLE] + [t for t in SHEETS if t != DIMENSION_TABLE]
+        for table in tables:
+            header = pd.read_csv(self._path(table), nrows=0).columns
+            for col in header:
+                if col != "Employee_ID":
+                    self.owners.setdefault(col, table)
+
+        self.labels = pd.Index(
+            pd.read_csv(self._path(DIMENSION_TABLE), usecols=["Employee_ID"])["Employee_ID"].astype(str)
+        ).sort_values()
+        self.dim_size = len(self.labels)
+        # One lookup registered for the schema's lifetime, shared by every frame()
+        self.label_lookup = SharedAttr(self.labels)
+
+    def _path(self, table):
+        return os.path.join(self.data_dir, SHEETS[table])
+
+    @property
+    def available_columns(self):
+        return sorted(set(self.owners) | set(DERIVED))
+
+    # ---------------------------
+    # Lazy column loads
+    # ---------------------------
+    def _load(self, table, columns):
+        """
+        Reads missing columns of one sheet; returns (keys, {col: values})
+        """
+        cache = self._columns.setdefault(table, {})
+        missing = [c for c in columns if c not in cache]
+
+        if missing:
+            part = pd.read_csv(self._path(table), usecols=["Employee_ID"] + missing)
+            keys = self.labels.get_indexer(part["Employee_ID"].astype(str)).astype(np.int32)
+
+            known = keys >= 0
+            if not known.all():
+                logging.warning(f"{table}: {int((~known).sum())} rows without a dimension row dropped")
+
+            cache.setdefault("__keys__", keys[known])
+            for col in missing:
+                values = part[col][known]
+                if col in DATE_COLUMNS:
+                    values = pd.to_datetime(values, errors="coerce")
+                cache[col] = values.to_numpy()
+
+        return cache["__keys__"], {c: cache[c] for c in columns}
+
+    # ---------------------------
+    # Join on surrogate keys
+    # ---------------------------
+    def frame(self, columns, how="inner"):
+        """
+        Narrow frame with Employee_ID (int key) + the requested columns.
+        how="inner" keeps employees present in every fact sheet used,
+        how="left" keeps every employee of the dimension table.
+        """
+        wanted = []
+        for col in columns:
+            source = DERIVED[col][0] if col in DERIVED else col
+            if source not in self.owners:
+                raise ValueError(f"Unknown column: {col}")
+            if source not in wanted:
+                wanted.append(source)
+
+        by_table = {}
+        for col in wanted:
+            by_table.setdefault(self.owners[col], []).append(col)
+
+        # Keys are dense in [0, dim_size), so every sheet joins by
+        # direct addressing (out[keys] = values) — no sort, no hash table
+        present = np.ones(self.dim_size, dtype=bool)
+        data = {"Employee_ID": np.arange(self.dim_size, dtype=np.int32)}
+
+        for table, cols in by_table.items():
+            keys, values = self._load(table, cols)
+
+            if len(np.unique(keys)) != len(keys):
+                raise ValueError(f"{table}: Employee_ID is not unique, cannot join 1:1")
+
+            if table != DIMENSION_TABLE:
+                hit = np.zeros(self.dim_size, dtype=bool)
+                hit[keys] = True
+                if how == "inner":
+                    present &= hit
+
+            for col, vals in values.items():
+                out = _empty_column(vals.dtype, self.dim_size, full=len(keys) == self.dim_size)
+                out[keys] = vals
+                data[col] = out
+
+        df = pd.DataFrame(data)[present].reset_index(drop=True)
+
+        for col in columns:
+            if col in DERIVED:
+                source, fn = DERIVED[col]
+                df[col] = fn(df[source])
+
+        df = optimize_dtypes(df[["Employee_ID"] + list(dict.fromkeys(columns))])
+        return register_employee_labels(df, self.label_lookup)
+
+    # ---------------------------
+    # Query helpers
+    # ---------------------------
+    def frame_for_metric(self, metric, dimension=None, filters=None):
+        """
+        Only the columns compute_metric needs for this spec
+        """
+        cfg = HR_METRICS.get(metric)
+        if cfg is None:
+            raise ValueError(f"Unknown metric: {metric}")
+        columns = [cfg["column"]] if cfg["column"] != "Employee_ID" else []
+        columns += list(cfg.get("filter", {}))
+        if cfg["type"] == "ratio":
+            columns.append("Status")
+        if dimension and dimension != "NONE":
+            # Dimension key or column name, as in compute_metric (frame() rejects unknown columns)
+            columns.append(DIMENSIONS.get(dimension, dimension))
+        columns += list(filters or {})
+
+        return self.frame(list(dict.fromkeys(columns)), how="left")
+
+    def cross_domain(self, measures, by, agg="mean"):
+        """
+        e.g. cross_domain(["Performance_Rating", "Salary"], by="Job_Level")
+        """
+        if agg not in CROSS_DOMAIN_AGGS:
+            raise ValueError(f"Unsupported aggregation: {agg} (use {', '.join(CROSS_DOMAIN_AGGS)})")
+        df = self.frame(list(measures) + [by])
+        return df.groupby(by, observed=True)[list(measures)].agg(agg).round(2)
+
+
+@lru_cache(maxsize=1)
+def get_star_schema(data_dir="data"):
+    return StarSchema(data_dir)
@@ -0,0 +1,205 @@
+# modules/survival.py
+#
+# Tenure survival analysis (Kaplan–Meier). Every employee contributes a
+# duration (hire → exit, or hire → as-of date when still employed, i.e.
+# censored). Durations are sorted ONCE together with the group code;
+# np.unique over (group, day) gives the exits / removals at every event
+# time of every group in one pass, and each group's curve is a single
+# cumprod over its slice. Median tenure and cohort retention matrices
+# are read off the same curves.
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import AS_OF_DATE
+from modules.filter_engine import build_mask
+from modules.schema_registry import DIMENSIONS
+from modules.time_index import get_time_index, _days, _day, TERMINATION_COLUMNS, _NAT
+
+DAYS_PER_YEAR = 365.25
+# Chart resolution of the curves (points per year)
+CURVE_STEPS_PER_YEAR = 12
+ALL = "All"
+
+
+def resolve_column(df, dimension):
+    """
+    Dimension key (schema_registry) or column name → column in df
+    """
+    if dimension is None or dimension == "NONE":
+        return None
+    column = DIMENSIONS.get(dimension, dimension)
+    if column not in df.columns and column not in ("Hire_Year", "Hire_Month"):
+        raise ValueError(f"Unknown dimension: {dimension}")
+    return column
+
+
+def _groups(df, column):
+    if column is None:
+        return np.zeros(len(df), dtype=np.int64), pd.Index([ALL])
+    if column == "Hire_Month" and column not in df.columns:
+        values = pd.to_datetime(df["Hire_Date"], errors="coerce").dt.to_period("M")
+    elif column == "Hire_Year" and column not in df.columns:
+        values = pd.to_datetime(df["Hire_Date"], errors="coerce").dt.year
+    else:
+        values = df[column]
+    codes, labels = pd.factorize(values, sort=True)
+    return codes, pd.Index(labels, name=column)
+
+
+_events = {"df": None, "events": None}
+_events_lock = threading.Lock()
+
+
+def tenure_events(df):
+    """
+    (durations in days, exited flags, usable-row mask), cached per
+    dataset object. Employees still on payroll are censored at the
+    as-of date.
+    """
+    with _events_lock:
+        if _events["df"] is df:
+            return _events["events"]
+
+    events = _tenure_events(df)
+
+    with _events_lock:
+        _events["df"] = df
+        _events["events"] = events
+    return events
+
+
+def _tenure_events(df):
+    term_col = next((c for c in TERMINATION_COLUMNS if c in df.columns), None)
+    if "Hire_Date" not in df.columns or term_col is None:
+        raise ValueError("Survival analysis needs Hire_Date and Termination_Date")
+
+    as_of = _day(AS_OF_DATE) if AS_OF_DATE else _day(get_time_index(df).as_of)
+
+    hire = _days(df["Hire_Date"])
+    term = _days(df[term_col])
+    usable = (hire != _NAT) & (hire <= as_of)
+    exited = (term != _NAT) & usable & (term <= as_of)
+
+    # Exit before hire (dirty rows) counts as leaving on the hire day
+    end = np.where(exited, np.maximum(term, hire), as_of)
+    return np.where(usable, end - hire, 0), exited, usable
+
+
+# ==================================================
+# KAPLAN–MEIER
+# ==================================================
+class SurvivalCurves:
+    """
+    Step curves S_g(t) per group: event times (days) and survival after
+    each of them
+    """
+
+    def __init__(self, durations, exited, codes, labels):
+        keep = codes >= 0
+        durations, exited, codes = durations[keep], exited[keep], codes[keep]
+        self.labels = labels
+        self.sizes = np.bincount(codes, minlength=len(labels))
+        self.follow_up = np.zeros(len(labels), dtype=np.int64)
+        np.maximum.at(self.follow_up, codes, durations)
+
+        # (group, day) sorted once; removals / exits at every distinct pair
+        span = int(durations.max()) + 1 if len(durations) else 1
+        keys, inverse, removed = np.unique(codes * span + durations, return_inverse=True, return_counts=True)
+        exits = np.bincount(inverse, weights=exited, minlength=len(keys))
+        group, day = keys // span, keys % span
+
+        # At risk = group size − everyone removed at earlier times of the group
+        starts = np.searchsorted(group, np.arange(len(labels)))
+        before = np.cumsum(removed) - removed
+        at_risk = self.sizes[group] - (before - before[starts[group]])
+        factor = 1.0 - exits / at_risk
+
+        self.times, self.survival = [], []
+        for g in range(len(labels)):
+            lo, hi = starts[g], starts[g + 1] if g + 1 < len(labels) else len(keys)
+            events = exits[lo:hi] > 0
+            self.times.append(day[lo:hi][events])
+            self.survival.append(np.cumprod(factor[lo:hi][events]))
+
+    def at(self, years):
+        """
+        Group × time matrix of S(t) (NaN beyond a group's follow-up)
+        """
+        days = np.asarray(years, dtype=float) * DAYS_PER_YEAR
+        values = np.ones((len(self.labels), len(days)))
+
+        for g, (times, survival) in enumerate(zip(self.times, self.survival)):
+            pos = np.searchsorted(times, days, side="right")
+            values[g] = np.where(pos > 0, survival[np.maximum(pos - 1, 0)], 1.0)
+            values[g, days > self.follow_up[g]] = np.nan
+
+        return pd.DataFrame(values.T, index=pd.Index(years, name="Tenure (Years)"), columns=self.labels)
+
+    def medians(self):
+        """
+        First time (years) each curve drops to 50% (NaN if it never does)
+        """
+        result = []
+        for times, survival in zip(self.times, self.survival):
+            below = np.flatnonzero(survival <= 0.5)
+            result.append(times[below[0]] / DAYS_PER_YEAR if len(below) else np.nan)
+        return pd.Series(result, index=self.labels, name="Median Tenure (Years)").round(2)
+
+
+def survival_curves(df, dimension=None, filters=None):
+    """
+    SurvivalCurves per value of `dimension`; filters mask the cached
+    tenure events instead of copying rows
+    """
+    column = resolve_column(df, dimension)
+    durations, exited, usable = tenure_events(df)
+    codes, labels = _groups(df, column)
+
+    keep = usable & (codes >= 0)
+    if filters:
+        keep &= build_mask(df, filters)
+    if not keep.any():
+        raise ValueError("No employees with a hire date match the filters")
+
+    # Groups emptied by the filters are dropped
+    present = np.bincount(codes[keep], minlength=len(labels)) > 0
+    codes = np.where(keep, (np.cumsum(present) - 1)[codes], -1)
+    return SurvivalCurves(durations, exited, codes, labels[present])
+
+
+def kaplan_meier(df, dimension=None, filters=None, max_years=None, steps_per_year=CURVE_STEPS_PER_YEAR):
+    """
+    Survival probability (% still employed) by tenure, one column per
+    value of `dimension` ("All" without one)
+    """
+    curves = survival_curves(df, dimension, filters)
+    horizon = max_years if max_years is not None else curves.follow_up.max() / DAYS_PER_YEAR
+    grid = np.round(np.arange(0, np.floor(horizon * steps_per_year) + 1) / steps_per_year, 3)
+    return (curves.at(grid) * 100).round(1).dropna(how="all")
+
+
+def median_tenure(df, dimension=None, filters=None):
+    """
+    Kaplan–Meier median tenure in years (overall number / per group)
+    """
+    medians = survival_curves(df, dimension, filters).medians()
+    if dimension is None or dimension == "NONE":
+        return medians.iloc[0]
+    return medians.sort_values(ascending=False)
+
+
+def cohort_retention(df, dimension="YEAR", filters=None, max_years=None):
+    """
+    Cohort × whole years since hire: % of the cohort still employed at
+    each hire anniversary (censoring-aware; NaN past the cohort's
+    follow-up)
+    """
+    curves = survival_curves(df, dimension, filters)
+    horizon = max_years if max_years is not None else int(curves.follow_up.max() // DAYS_PER_YEAR)
+    matrix = (curves.at(np.arange(horizon + 1)).T * 100).round(1)
+    matrix.columns.name = "Years Since Hire"
+    matrix.index.name = "Cohort"
+    return matrix[curves.sizes > 0]
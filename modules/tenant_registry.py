@@ -0,0 +1,317 @@
+# modules/tenant_registry.py
+#
+# One deployment, many organizations. Every tenant has its own data
+# source (Supabase table / CSV / Parquet, any known layout), attrition
+# model and aggregate caches (answers, snapshots). A tenant's dataset is
+# loaded and warmed up (time index, model) on first access, reloaded
+# after DATASET_TTL, and kept in memory LRU under one global budget:
+# a load evicts the least recently used OTHER tenants until the
+# resident total fits again.
+#
+#   HR_TENANTS_FILE=tenants.json
+#   {
+#     "acme":   {"source": "csv", "path": "data/hr_master_enterprise.csv", "layout": "enterprise"},
+#     "initech": {"source": "parquet", "path": "data/initech.parquet",
+#                 "layout": {"name": "initech", "columns": {"Worker_Code": "Employee_ID"},
+#                            "skip_rules": ["duplicate_employee_id"]}},
+#     "globex": {"source": "supabase", "url": "https://...", "key_env": "GLOBEX_SUPABASE_KEY",
+#                "model": "ml/models/globex_attrition.pkl",
+#                "roles": {"sales_head": {"Department": ["Sales"]}}}
+#   }
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+from config import DATASET_TTL, SHARED_DATASET, TENANTS_FILE, DEFAULT_TENANT, TENANT_MEMORY_MB
+from modules.analytics import fetch_master, prepare_master, supabase_source
+from modules.data_quality import quality_report
+from modules.shared_store import get_shared_dataset, private_nbytes, release
+from modules.snapshot_store import drop_snapshots
+from modules.time_index import get_time_index
+from ml.predict import MODEL_PATH, load_attrition_model
+
+# HR_TENANT_MEMORY_MB and every size reported here are MiB
+MIB = 1024 * 1024
+
+
+# ==================================================
+# SOURCES
+# ==================================================
+def source_loader(spec):
+    """
+    Tenant spec → loader() returning the prepared master frame
+    """
+    kind = spec.get("source", "supabase")
+    layout = spec.get("layout")
+
+    if kind == "supabase":
+        key = os.getenv(spec["key_env"], "") if "key_env" in spec else spec.get("key")
+        source = supabase_source(spec.get("url"), key, spec.get("table", "hr_master"))
+        return lambda: fetch_master(source, layout)
+
+    if kind in ("csv", "parquet"):
+        read = pd.read_csv if kind == "csv" else pd.read_parquet
+        path = spec["path"]
+        return lambda: prepare_master(read(path), layout=layout)
+
+    raise ValueError(f"Unknown tenant source: {kind}")
+
+
+class Tenant:
+
+    def __init__(self, name, loader, model_path=None, roles=None):
+        self.name = name
+        self.loader = loader
+        self.model_path = model_path or MODEL_PATH
+        # Row-level security roles (None = HR_ROLES_FILE)
+        self.roles = roles
+        # The default tenant keeps the historical dataset name (shared store, snapshots)
+        self.dataset_name = "hr_master" if name == DEFAULT_TENANT else f"hr_master_{name}"
+
+        self.df = None
+        self.loaded_at = 0.0
+        self.nbytes = 0
+        # Per-tenant aggregate caches, emptied on reload / eviction
+        self.caches = {}
+        self.lock = threading.Lock()
+        self.stats = {
+            "loads": 0, "hits": 0, "evictions": 0,
+            "load_ms": 0.0, "warm_ms": 0.0, "last_access": None
+        }
+
+    def model(self):
+        return load_attrition_model(self.model_path)
+
+    def unload(self):
+        self.df, self.nbytes, self.caches = None, 0, {}
+        if SHARED_DATASET:
+            release(self.dataset_name)
+        drop_snapshots(self.dataset_name)
+
+
+class TenantRegistry:
+
+    def __init__(self, budget_mb=TENANT_MEMORY_MB, ttl=DATASET_TTL):
+        self.budget = budget_mb * MIB
+        self.ttl = ttl
+        # Access order: least recently used first
+        self.tenants = OrderedDict()
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Tenants
+    # ---------------------------
+    def register(self, name, loader, model_path=None, roles=None):
+        tenant = Tenant(name, loader, model_path, roles)
+        with self._lock:
+            old = self.tenants.pop(name, None)
+            self.tenants[name] = tenant
+        if old is not None:
+            old.unload()
+        return tenant
+
+    def load_file(self, path):
+        """
+        Registers every tenant of a JSON tenants file
+        """
+        with open(path) as f:
+            specs = json.load(f)
+        for name, spec in specs.items():
+            self.register(name, source_loader(spec), spec.get("model"), spec.get("roles"))
+        logging.info(f"Tenants registered from {path}: {', '.join(specs)}")
+
+    def __contains__(self, name):
+        return name in self.tenants
+
+    def get(self, name=None):
+        name = name or DEFAULT_TENANT
+        with self._lock:
+            tenant = self.tenants.get(name)
+            if tenant is not None:
+                self.tenants.move_to_end(name)
+        if tenant is None:
+            raise ValueError(f"Unknown tenant: {name}")
+        return tenant
+
+    def owner(self, df):
+        """
+        Tenant whose CURRENT dataset version df is or was derived from
+        (role views, filtered frames); None for other frames
+        """
+        tenant = self.tenants.get(df.attrs.get("tenant")) if df is not None else None
+        if tenant is None or tenant.df is None:
+            return None
+        if tenant.df is df or df.attrs.get("version") == tenant.df.attrs.get("version"):
+            return tenant
+        return None
+
+    # ---------------------------
+    # Datasets
+    # ---------------------------
+    def dataset(self, name=None):
+        """
+        The tenant's prepared master frame: loaded + warmed on first
+        access, reloaded after the TTL
+        """
+        tenant = self.get(name)
+        loaded = False
+
+        with tenant.lock:
+            tenant.stats["last_access"] = time.time()
+            if tenant.df is None or time.time() - tenant.loaded_at >= self.ttl:
+                self._load(tenant)
+                loaded = True
+            else:
+                tenant.stats["hits"] += 1
+            df = tenant.df
+
+        if loaded:
+            self._evict(keep=tenant)
+        return df
+
+    def _load(self, tenant):
+        started = time.perf_counter()
+        if SHARED_DATASET:
+            df = get_shared_dataset(tenant.dataset_name, tenant.loader, ttl=self.ttl)
+        else:
+            df = tenant.loader()
+
+        if df is not None:
+            df.attrs["tenant"] = tenant.name
+            df.attrs["dataset"] = tenant.dataset_name
+
+        if df is not tenant.df:
+            tenant.caches = {}
+            if df is not None:
+                df.attrs["version"] = f"v{time.time_ns()}"
+        tenant.df, tenant.loaded_at = df, time.time()
+        # Pages mapped from the shared store are not this tenant's to evict
+        tenant.nbytes = 0 if df is None else private_nbytes(df)
+        tenant.stats["loads"] += 1
+        tenant.stats["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        if df is not None and not df.empty:
+            self._warm(tenant)
+
+        logging.info(
+            f"Tenant {tenant.name}: {0 if df is None else len(df)} rows, "
+            f"{tenant.nbytes / MIB:.1f} MiB loaded in {tenant.stats['load_ms']:.0f} ms"
+        )
+
+    def _warm(self, tenant):
+        """
+        Builds what the first query would otherwise pay for
+        """
+        started = time.perf_counter()
+        try:
+            get_time_index(tenant.df)
+        except Exception as e:
+            logging.info(f"Tenant {tenant.name}: no time index ({e})")
+        try:
+            tenant.model()
+        except Exception as e:
+            logging.warning(f"Tenant {tenant.name}: attrition model not loaded ({e})")
+        tenant.stats["warm_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def _evict(self, keep):
+        """
+        Unloads least recently used tenants (never `keep` or one that
+        is loading right now) until the resident total fits the budget
+        """
+        with self._lock:
+            resident = [t for t in self.tenants.values() if t.df is not None]
+            total = sum(t.nbytes for t in resident)
+
+            for tenant in resident:
+                if total <= self.budget:
+                    break
+                if tenant is keep or not tenant.lock.acquire(blocking=False):
+                    continue
+                try:
+                    total -= tenant.nbytes
+                    logging.info(f"Tenant {tenant.name} evicted ({tenant.nbytes / MIB:.1f} MiB)")
+                    tenant.unload()
+                    tenant.stats["evictions"] += 1
+                finally:
+                    tenant.lock.release()
+
+    def reset(self, name=None):
+        """
+        Drops the loaded dataset of one tenant (all without a name)
+        """
+        with self._lock:
+            tenants = list(self.tenants.values()) if name is None else [self.tenants[name]]
+        for tenant in tenants:
+            with tenant.lock:
+                tenant.unload()
+
+    def clear_caches(self, key=None):
+        """
+        Empties one kind of per-tenant cache (all without a key);
+        role-partitioned entries are keyed (key, role)
+        """
+        with self._lock:
+            for tenant in self.tenants.values():
+                if key is None:
+                    tenant.caches = {}
+                    continue
+                for k in [k for k in tenant.caches if k == key or (isinstance(k, tuple) and k[0] == key)]:
+                    del tenant.caches[k]
+
+    # ---------------------------
+    # Stats
+    # ---------------------------
+    def stats(self):
+        with self._lock:
+            tenants = list(self.tenants.values())
+
+        rows = []
+        for tenant in tenants:
+            df = tenant.df
+            report = quality_report(df) if df is not None else None
+            rows.append({
+                "tenant": tenant.name,
+                "resident": df is not None,
+                "rows": 0 if df is None else len(df),
+                "layout": None if df is None else df.attrs.get("layout"),
+                "quarantined": None if report is None else report["quarantined"],
+                "mb": round(tenant.nbytes / MIB, 2),
+                **tenant.stats
+            })
+        return {
+            "budget_mb": round(self.budget / MIB, 2),
+            "resident_mb": round(sum(t.nbytes for t in tenants) / MIB, 2),
+            "tenants": rows
+        }
+
+
+# ==================================================
+# PROCESS-WIDE REGISTRY
+# ==================================================
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry(default_loader=None):
+    """
+    The registry of this process (tenants file loaded once). Unless the
+    file defines it, the default tenant reads the app's Supabase
+    hr_master through `default_loader` (fetch_master).
+    """
+    global _registry
+
+    with _registry_lock:
+        if _registry is None:
+            registry = TenantRegistry()
+            if TENANTS_FILE:
+                registry.load_file(TENANTS_FILE)
+            if DEFAULT_TENANT not in registry:
+                registry.register(DEFAULT_TENANT, default_loader or fetch_master)
+            _registry = registry
+    return _registry
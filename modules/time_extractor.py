@@ -1,13 +1,183 @@
 import re
 
-def extract_time_window(query):
+import pandas as pd
+
+from config import AS_OF_DATE
+
+# ==================================================
+# VOCABULARY
+# ==================================================
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12
+}
+
+ORDINAL_QUARTERS = {"first": 1, "second": 2, "third": 3, "fourth": 4}
+
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*\.?"
+_YEAR = r"((?:19|20)\d{2})"
+_DATE = r"(\d{4}-\d{2}-\d{2})"
+_RANGE = r"\s*(?:to|until|through|and|-|–)\s*"
+_UNIT = r"(day|week|month|quarter|year)s?"
+_N = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+# What may follow a bare year: "headcount 2023 by department as a bar chart"
+_TRAILER = (
+    r"(?:\s+(?:(?:as|in)\s+)?(?:an?\s+)?(?:bar|line|pie|chart|table|graph|plot|trend)s?"
+    r"|\s+(?:by|per)\s+[a-z_]+(?:\s+level)?)*\s*[?.!]?$"
+)
+
+
+# ==================================================
+# HELPERS
+# ==================================================
+def _month_start(year, month):
+    return pd.Timestamp(year=int(year), month=int(month), day=1)
+
+
+def _quarter_start(year, quarter):
+    return _month_start(year, 3 * (int(quarter) - 1) + 1)
+
+
+def _number(token):
+    return int(token) if token.isdigit() else NUMBER_WORDS[token]
+
+
+def _shift(ts, unit, n):
+    if unit == "day":
+        return ts - pd.Timedelta(days=n)
+    if unit == "week":
+        return ts - pd.Timedelta(weeks=n)
+    months = {"month": 1, "quarter": 3, "year": 12}[unit] * n
+    return ts - pd.DateOffset(months=months)
+
+
+# ==================================================
+# PATTERNS (first match wins, most specific first)
+# Every handler returns (start, end) with `end` exclusive
+# ==================================================
+def _date_range(m, as_of):
+    return pd.Timestamp(m[1]), pd.Timestamp(m[2]) + pd.Timedelta(days=1)
+
+
+def _month_range(m, as_of):
+    start = _month_start(m[2], MONTHS[m[1]])
+    end = _month_start(m[4], MONTHS[m[3]]) + pd.DateOffset(months=1)
+    return start, end
+
+
+def _year_range(m, as_of):
+    return _month_start(m[1], 1), _month_start(int(m[2]) + 1, 1)
+
+
+def _quarter(m, as_of):
+    quarter = m["q"] or ORDINAL_QUARTERS[m["oq"]]
+    year = m["y1"] or m["y2"] or m["y3"] or as_of.year
+    start = _quarter_start(year, quarter)
+    return start, start + pd.DateOffset(months=3)
+
+
+def _relative_quarter(m, as_of):
+    start = _quarter_start(as_of.year, (as_of.month - 1) // 3 + 1)
+    if m[1] in ("last", "previous"):
+        return start - pd.DateOffset(months=3), start
+    return start, as_of + pd.Timedelta(days=1)
+
+
+def _year_to_date(m, as_of):
+    return _month_start(as_of.year, 1), as_of + pd.Timedelta(days=1)
+
+
+def _relative_year(m, as_of):
+    return _month_start(as_of.year - 1, 1), _month_start(as_of.year, 1)
+
+
+def _relative_month(m, as_of):
+    start = _month_start(as_of.year, as_of.month)
+    if m[1] in ("last", "previous"):
+        return start - pd.DateOffset(months=1), start
+    return start, as_of + pd.Timedelta(days=1)
+
+
+def _rolling(m, as_of):
+    end = as_of + pd.Timedelta(days=1)
+    return _shift(end, m[2], _number(m[1])), end
+
+
+def _since(m, as_of):
+    start = _month_start(m[2], MONTHS[m[1]]) if m[1] else _month_start(m[2], 1)
+    return start, as_of + pd.Timedelta(days=1)
+
+
+def _single_month(m, as_of):
+    start = _month_start(m[2], MONTHS[m[1]])
+    return start, start + pd.DateOffset(months=1)
+
+
+def _single_year(m, as_of):
+    year = int(m[1] or m[2])
+    return _month_start(year, 1), _month_start(year + 1, 1)
+
+
+PATTERNS = [
+    (re.compile(rf"(?:from|between)?\s*{_DATE}{_RANGE}{_DATE}"), _date_range),
+    (re.compile(rf"(?:from|between)?\s*\b{_MONTH}\s+{_YEAR}{_RANGE}{_MONTH}\s+{_YEAR}\b"), _month_range),
+    (re.compile(rf"(?:from|between)?\s*\b{_YEAR}{_RANGE}{_YEAR}\b"), _year_range),
+    (re.compile(
+        r"\b(?:(?P<y1>(?:19|20)\d{2})\s*)?q(?P<q>[1-4])\b(?:\s*(?:of\s+)?(?P<y2>(?:19|20)\d{2}))?"
+        r"|\b(?P<oq>first|second|third|fourth) quarter\b(?:\s*(?:of\s+)?(?P<y3>(?:19|20)\d{2}))?"
+    ), _quarter),
+    (re.compile(r"\b(last|previous|this|current) quarter\b|\bquarter to date\b|\bqtd\b"), _relative_quarter),
+    (re.compile(r"\b(?:ytd|year to date|this year|current year)\b"), _year_to_date),
+    (re.compile(rf"\b(?:last|past|previous|trailing)\s+{_N}\s+{_UNIT}\b"), _rolling),
+    (re.compile(r"\b(?:last|previous) year\b"), _relative_year),
+    (re.compile(r"\b(last|previous|this|current) month\b"), _relative_month),
+    (re.compile(rf"\bsince\s+(?:{_MONTH}\s+)?{_YEAR}\b"), _since),
+    (re.compile(rf"\b{_MONTH}\s+{_YEAR}\b"), _single_month),
+    (re.compile(rf"\b(?:in|during|for|of)\s+{_YEAR}\b|\b{_YEAR}(?={_TRAILER})"), _single_year)
+]
+
+
+def resolve_as_of(as_of=None):
+    """
+    Anchor for relative windows: explicit > HR_AS_OF_DATE > today
+    """
+    if as_of is not None:
+        return pd.Timestamp(as_of).normalize()
+    if AS_OF_DATE:
+        return pd.Timestamp(AS_OF_DATE).normalize()
+    return pd.Timestamp.today().normalize()
+
+
+# ==================================================
+# PARSER
+# ==================================================
+def extract_time_window(query, as_of=None):
+    """
+    Returns {"start", "end", "label", "text"} or None.
+    `end` is exclusive; `text` is the matched phrase.
+    """
     q = query.lower()
+    as_of = resolve_as_of(as_of)
+
+    for pattern, handler in PATTERNS:
+        m = pattern.search(q)
+        if not m:
+            continue
+
+        start, end = handler(m, as_of)
+        if end <= start:
+            continue
 
-    if "last year" in q:
-        return {"type": "YEAR", "value": -1}
-    if "last 3 years" in q:
-        return {"type": "YEAR", "value": -3}
-    if "last 6 months" in q:
-        return {"type": "MONTH", "value": -6}
+        return {
+            "start": start,
+            "end": end,
+            "label": f"{start:%Y-%m-%d} → {end - pd.Timedelta(days=1):%Y-%m-%d}",
+            "text": m.group(0).strip()
+        }
 
     return None
@@ -0,0 +1,223 @@
+# modules/time_index.py
+#
+# Date-sorted index over Hire_Date / Termination_Date for windowed
+# headcount and attrition. Both date columns are sorted once; per
+# dimension, hires and exits are also counted into monthly partitions
+# (cumulative). A window query is then:
+#   - full months        → one lookup in the cumulative partition table
+#   - partial boundary   → binary search (searchsorted) + the rows of
+#                          at most one month
+# so cost follows the window, not the table.
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+TERMINATION_COLUMNS = ["Termination_Date", "Exit_Date"]
+
+_NAT = np.iinfo(np.int64).min
+
+
+def _days(series):
+    """
+    Dates → int64 days since epoch (NaT → _NAT)
+    """
+    values = pd.to_datetime(series, errors="coerce").to_numpy("datetime64[D]")
+    return values.astype(np.int64)
+
+
+def _day(ts):
+    return int(np.datetime64(pd.Timestamp(ts).date(), "D").astype(np.int64))
+
+
+def _month_id(days):
+    """
+    int days → months since epoch (vectorized)
+    """
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+class TimeIndex:
+
+    def __init__(self, df):
+        term_col = next((c for c in TERMINATION_COLUMNS if c in df.columns), None)
+        if "Hire_Date" not in df.columns or term_col is None:
+            raise ValueError("Time windows need Hire_Date and Termination_Date")
+
+        self.df = df
+        hire = _days(df["Hire_Date"])
+        term = _days(df[term_col])
+
+        has_hire = hire != _NAT
+        has_term = (term != _NAT) & has_hire
+        # Dirty rows (exit before hire) count as leaving on the hire day
+        term = np.where(has_term, np.maximum(term, hire), _NAT)
+
+        self.hire_pos = np.flatnonzero(has_hire)
+        order = np.argsort(hire[self.hire_pos], kind="stable")
+        self.hire_pos = self.hire_pos[order]
+        self.hire_sorted = hire[self.hire_pos]
+
+        self.term_pos = np.flatnonzero(has_term)
+        order = np.argsort(term[self.term_pos], kind="stable")
+        self.term_pos = self.term_pos[order]
+        self.term_sorted = term[self.term_pos]
+
+        last = max(
+            self.hire_sorted[-1] if len(self.hire_sorted) else 0,
+            self.term_sorted[-1] if len(self.term_sorted) else 0
+        )
+        self.as_of = pd.Timestamp(np.datetime64(int(last), "D"))
+
+        first = self.hire_sorted[0] if len(self.hire_sorted) else last
+        self.month0 = int(_month_id(np.array([first]))[0])
+        self.n_months = int(_month_id(np.array([last]))[0]) - self.month0 + 1
+
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    # ---------------------------
+    # Monthly partitions per dimension
+    # ---------------------------
+    def _partition(self, column):
+        """
+        (labels, codes, cum_hires, cum_exits); cum_*[m, g] = events of
+        group g in months before month m (relative to month0)
+        """
+        with self._lock:
+            if column in self._partitions:
+                return self._partitions[column]
+
+        if column not in self.df.columns:
+            raise ValueError(f"Unknown dimension column: {column}")
+        codes, labels = pd.factorize(self.df[column], sort=True)
+        labels = pd.Index(labels, name=column)
+
+        groups = len(labels)
+        tables = []
+        for pos, dates in ((self.hire_pos, self.hire_sorted), (self.term_pos, self.term_sorted)):
+            g = codes[pos]
+            keep = g >= 0
+            month = _month_id(dates[keep]) - self.month0
+            counts = np.bincount(month * groups + g[keep], minlength=self.n_months * groups)
+            cum = np.zeros((self.n_months + 1, groups), dtype=np.int64)
+            np.cumsum(counts.reshape(self.n_months, groups), axis=0, out=cum[1:])
+            tables.append(cum)
+
+        part = (labels, codes, tables[0], tables[1])
+        with self._lock:
+            self._partitions[column] = part
+        return part
+
+    def _before(self, day, kind, column):
+        """
+        Events (hires / exits) strictly before `day`, per group
+        """
+        pos, dates = (self.hire_pos, self.hire_sorted) if kind == "hire" else (self.term_pos, self.term_sorted)
+
+        if column is None:
+            return np.array([np.searchsorted(dates, day)])
+
+        labels, codes, cum_hires, cum_exits = self._partition(column)
+        cum = cum_hires if kind == "hire" else cum_exits
+
+        month = int(_month_id(np.array([day]))[0]) - self.month0
+        if month < 0:
+            return np.zeros(len(labels), dtype=np.int64)
+        if month >= self.n_months:
+            return cum[-1].copy()
+
+        # Full months from the partition table + the partial month by binary search
+        month_start = int(np.datetime64(month + self.month0, "M").astype("datetime64[D]").astype(np.int64))
+        lo, hi = np.searchsorted(dates, [month_start, day])
+        partial = codes[pos[lo:hi]]
+        return cum[month] + np.bincount(partial[partial >= 0], minlength=len(labels))
+
+    def _series(self, values, column):
+        if column is None:
+            return int(values[0])
+        series = pd.Series(values, index=self._partition(column)[0])
+        return series[series > 0]
+
+    # ---------------------------
+    # Windowed metrics
+    # ---------------------------
+    def headcount_at(self, end, column=None):
+        """
+        Employees hired before `end` and not exited before `end`
+        """
+        day = _day(end)
+        result = self._series(self._before(day, "hire", column) - self._before(day, "exit", column), column)
+        return result.sort_values(ascending=False) if column else result
+
+    def hires(self, start, end, column=None):
+        lo, hi = _day(start), _day(end)
+        return self._series(self._before(hi, "hire", column) - self._before(lo, "hire", column), column)
+
+    def exits(self, start, end, column=None):
+        lo, hi = _day(start), _day(end)
+        return self._series(self._before(hi, "exit", column) - self._before(lo, "exit", column), column)
+
+    def attrition_rate(self, start, end, column=None):
+        """
+        Exits in [start, end) / employees on payroll at any point of the window
+        """
+        lo, hi = _day(start), _day(end)
+        exits = self._before(hi, "exit", column) - self._before(lo, "exit", column)
+        population = self._before(hi, "hire", column) - self._before(lo, "exit", column)
+
+        rates = np.round(np.divide(
+            exits * 100.0, population,
+            out=np.zeros(len(exits)), where=population > 0
+        ), 2)
+
+        if column is None:
+            return float(rates[0])
+
+        labels = self._partition(column)[0]
+        return pd.Series(rates, index=labels)[population > 0].sort_values(ascending=False)
+
+    def by_year(self, metric, start, end):
+        """
+        Headcount at each year end / exits per year, clipped to the window
+        """
+        results = {}
+        for year in range(pd.Timestamp(start).year, (pd.Timestamp(end) - pd.Timedelta(days=1)).year + 1):
+            y_start = max(pd.Timestamp(year=year, month=1, day=1), pd.Timestamp(start))
+            y_end = min(pd.Timestamp(year=year + 1, month=1, day=1), pd.Timestamp(end))
+            if metric == "headcount":
+                results[year] = self.headcount_at(y_end)
+            else:
+                results[year] = self.exits(y_start, y_end)
+        return pd.Series(results).sort_index().rename_axis("Year")
+
+    def window_rows(self, start, end):
+        """
+        Row positions of employees on payroll at any point of the window
+        """
+        hi = np.searchsorted(self.hire_sorted, _day(end))
+        hired = self.hire_pos[:hi]
+        lo = np.searchsorted(self.term_sorted, _day(start))
+        left_before = self.term_pos[:lo]
+        return np.setdiff1d(hired, left_before, assume_unique=True)
+
+
+# ==================================================
+# CACHE (one index per dataset object)
+# ==================================================
+_cache = {"df": None, "index": None}
+_cache_lock = threading.Lock()
+
+
+def get_time_index(df):
+    with _cache_lock:
+        if _cache["df"] is df:
+            return _cache["index"]
+
+    index = TimeIndex(df)
+
+    with _cache_lock:
+        _cache["df"] = df
+        _cache["index"] = index
+    return index
@@ -0,0 +1,12 @@
+import sys
+
+sys.path.insert(0, ".")
+
+from modules.sql_backend import build_database, DEFAULT_DB_PATH, DEFAULT_ENGINE
+
+# Usage: python scripts/build_analytics_db.py [sqlite|duckdb]
+engine = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_ENGINE
+
+path = build_database(path=DEFAULT_DB_PATH, engine=engine)
+
+print(f"✅ Analytics database built: {path} ({engine})")
@@ -0,0 +1,35 @@
+import argparse
+import glob
+import logging
+import sys
+
+sys.path.insert(0, ".")
+
+from modules.bulk_loader import load_csv
+
+# Usage:
+#   python scripts/bulk_load.py --url sqlite:///data/hr.db
+#   python scripts/bulk_load.py --url mysql+mysqlconnector://root:pw@localhost/hr_analytics_db \
+#       data/hr_master_10000.csv --table hr_master
+
+parser = argparse.ArgumentParser(description="Chunked, idempotent CSV → database loader")
+parser.add_argument("files", nargs="*", help="CSV files (default: data/*.csv)")
+parser.add_argument("--url", required=True)
+parser.add_argument("--table", help="target table (single file only; default: file name)")
+parser.add_argument("--key", default="Employee_ID")
+parser.add_argument("--chunksize", type=int, default=50_000)
+parser.add_argument("--batch-size", type=int, default=5_000)
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+files = args.files or sorted(glob.glob("data/*.csv"))
+if args.table and len(files) > 1:
+    parser.error("--table only works with a single file")
+
+for path in files:
+    report = load_csv(path, args.url, args.table, args.key, args.chunksize, args.batch_size)
+    print(
+        f"✅ {report['file']} → {report['table']}: {report['rows']:,} rows "
+        f"in {report['seconds']}s ({report['rows_per_sec']:,} rows/sec)"
+    )